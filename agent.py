@@ -5,11 +5,18 @@ This module contains the main voice assistant agent that handles
 conversations with customers and manages the ticket creation process.
 """
 
+import copy
 import logging
+from typing import Optional
 from livekit.agents import llm
 from livekit.agents.voice import Agent
-from config import SYSTEM_PROMPT
-from tools import ALL_TOOLS, bot_state
+from config import SYSTEM_PROMPT, CONTEXT_CONFIG, RESPONSE_CACHE_CONFIG
+from context_manager import ContextCompactor, message_text
+from conversation import update_state
+from filler import filler_player
+from response_cache import is_off_flow_question, response_cache
+from speculation import Speculator
+from tools import ALL_TOOLS, VoiceBotState
 
 logger = logging.getLogger(__name__)
 
@@ -19,18 +26,23 @@ class ITHelpDeskBot(Agent):
     IT Help Desk Voice Assistant Agent
     
     This agent handles customer conversations, collects information,
-    and creates support tickets for IT issues.
+    and creates support tickets for IT issues. `state` is this call's
+    VoiceBotState; the session passes the same object to the tools as
+    its userdata.
     """
     
-    def __init__(self):
+    def __init__(self, state: Optional[VoiceBotState] = None):
         super().__init__(
             instructions=SYSTEM_PROMPT,
             tools=ALL_TOOLS
         )
         
-        # Reset bot state for new session
-        global bot_state
-        bot_state.__init__()  # Reset to initial state
+        self.state = state if state is not None else VoiceBotState()
+        
+        self.compactor = ContextCompactor()
+        self.speculator = Speculator()
+        # Set by voice_bot.entrypoint when running with a live session
+        self.endpointing = None
     
     async def on_start(self):
         """Called when the agent starts"""
@@ -65,4 +77,76 @@ class ITHelpDeskBot(Agent):
             user_text = str(new_message.content)
         
         logger.info(f"User said: {user_text}")
+        filler_player.new_turn()
+        self._prepare_turn(turn_ctx, user_text, self.state)
+        
+        # The next caller turn answers the new stage's question
+        if self.endpointing is not None:
+            self.endpointing.apply(self.state.conversation_stage)
+    
+    def _prepare_turn(self, turn_ctx: llm.ChatContext, user_text: str, state: VoiceBotState) -> None:
+        """Update conversation state and bound the prompt for a user turn"""
+        # Track collected details and stage locally (no extra LLM call)
+        new_fields = update_state(state, user_text)
+        if new_fields and state is self.state:
+            logger.info(f"📋 Stage: {state.conversation_stage}, new fields: {', '.join(new_fields)}")
+        
+        # Bound the prompt for this turn; the full history stays in the session
+        if CONTEXT_CONFIG["enabled"]:
+            self.compactor.compact(turn_ctx, state)
+    
+    def on_user_transcribed(self, transcript: str, is_final: bool) -> None:
+        """Speculatively start the reply on a final transcript, before end-of-turn"""
+        if not self.speculator.enabled or not is_final or not transcript.strip():
+            return
+        # The transcript is tentative: work on copies, so a discarded
+        # speculation leaves no trace in the call's state. The real update
+        # happens in on_user_turn_completed.
+        turn_ctx = self.chat_ctx.copy()
+        self._prepare_turn(turn_ctx, transcript, copy.deepcopy(self.state))
+        turn_ctx.add_message(role="user", content=transcript)
+        self.speculator.start(transcript, self.session.llm, turn_ctx, self.tools)
+    
+    def on_user_speaking(self) -> None:
+        """The user resumed talking, so any speculative reply is stale"""
+        self.speculator.discard("user kept talking")
     
+    async def llm_node(self, chat_ctx, tools, model_settings):
+        """Generate the reply (or reuse a cached/speculative one), masking a slow first token"""
+        last = chat_ctx.items[-1] if chat_ctx.items else None
+        user_text = message_text(last) if getattr(last, "role", None) == "user" else None
+        
+        # Repeated off-flow questions (catalog, prices, ...) skip the LLM
+        cacheable = (RESPONSE_CACHE_CONFIG["enabled"] and user_text is not None
+                     and is_off_flow_question(user_text, self.state.last_turn_fields))
+        stage = self.state.conversation_stage
+        if cacheable:
+            answer = response_cache.lookup(user_text, stage)
+            if answer is not None:
+                logger.info(f"⚡ Answered from response cache (hit rate {response_cache.hit_rate():.0%})")
+                self.speculator.discard("answered from cache")
+                yield answer
+                return
+        
+        speculation = None
+        if self.speculator.enabled and user_text is not None:
+            speculation = self.speculator.take(user_text)
+        
+        if speculation is not None:
+            stream = speculation.chunks()
+        else:
+            stream = Agent.default.llm_node(self, chat_ctx, tools, model_settings)
+        
+        reply, called_tool = "", False
+        async with filler_player.masking("llm") as first_token:
+            async for chunk in stream:
+                first_token()
+                if isinstance(chunk, str):
+                    reply += chunk
+                elif getattr(chunk, "delta", None) is not None:
+                    reply += chunk.delta.content or ""
+                    called_tool = called_tool or bool(chunk.delta.tool_calls)
+                yield chunk
+        
+        if cacheable and not called_tool:
+            response_cache.store(user_text, stage, reply, self.state.collected_info)
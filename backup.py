@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Online Database Backups
+
+This module copies the live ticket database with SQLite's online backup
+API, a few pages at a time. The source is only read-locked for the
+duration of one step and the backup sleeps between steps, so
+create_ticket/update_ticket calls from the voice workers are never held
+up for long. Writes from other connections make SQLite restart the copy;
+when that keeps happening the step size grows until the copy completes.
+
+Archived tickets (ticket_archive.py) are not in the database file, so
+each backup also copies the monthly partitions into
+`tickets-<time>-archive/` next to `tickets-<time>.db`. They are copied
+after the database snapshot: every partition its archive_index refers to
+exists by then. If they cannot be copied, the backup is removed and the
+error raised; a backup without them would lose archived tickets on
+restore. To restore, put the .db file back as DATABASE_PATH and its
+archive directory as ARCHIVE_DIR (or archive/ next to the database).
+
+Backups are written to a temporary file, renamed into `BACKUP_DIR` when
+complete, and pruned to the newest `BACKUP_KEEP`. Duration, pages per
+second, steps, restarts and escalations are recorded under `backup.*` in metrics;
+writers record their lock wait under `database.writer_wait_seconds`.
+
+Usage:
+    python backup.py                       # one backup now
+    python backup.py --schedule            # back up every BACKUP_INTERVAL seconds
+    python backup.py --writers 4           # one backup while writer threads measure their wait
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import signal
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from config import BACKUP_CONFIG, DATABASE_CONFIG
+from metrics import metrics
+from ticket_archive import TicketArchive, default_archive_dir
+
+logger = logging.getLogger(__name__)
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def backup_database(source_path: str, dest_path: str, pages_per_step: Optional[int] = None,
+                    step_sleep: Optional[float] = None) -> dict:
+    """
+    Copy a live SQLite database in small steps; return backup statistics
+
+    If writers keep restarting the copy, the step size is quadrupled after
+    `max_restarts` restarts (up to the whole database in one step), so the
+    backup always finishes.
+    """
+    pages = pages_per_step or BACKUP_CONFIG["pages_per_step"]
+    step_sleep = BACKUP_CONFIG["step_sleep"] if step_sleep is None else step_sleep
+    stats = {"steps": 0, "restarts": 0, "escalations": 0, "pages": 0}
+
+    partial = dest_path + ".tmp"
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    start = time.perf_counter()
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(partial)
+    try:
+        while True:
+            attempt = {"remaining": None, "restarts": 0}
+
+            def progress(status, remaining, total):
+                stats["steps"] += 1
+                stats["pages"] = total
+                if attempt["remaining"] is not None and remaining > attempt["remaining"]:
+                    # The source changed under us; SQLite starts over
+                    stats["restarts"] += 1
+                    attempt["restarts"] += 1
+                    if attempt["restarts"] >= BACKUP_CONFIG["max_restarts"] and pages > 0:
+                        raise _TooManyRestarts()
+                attempt["remaining"] = remaining
+                if remaining and step_sleep:
+                    # The source is unlocked between steps; let writers in
+                    time.sleep(step_sleep)
+
+            try:
+                source.backup(target, pages=pages, progress=progress)
+                break
+            except _TooManyRestarts:
+                stats["escalations"] += 1
+                pages = -1 if pages * 4 >= stats["pages"] else pages * 4
+                logger.info(f"💾 Backup restarted {attempt['restarts']} times, now copying "
+                            f"{'in one step' if pages < 0 else f'{pages} pages per step'}")
+    finally:
+        target.close()
+        source.close()
+    os.replace(partial, dest_path)
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["pages_per_second"] = stats["pages"] / stats["seconds"] if stats["seconds"] else 0.0
+    stats["bytes"] = os.path.getsize(dest_path)
+    stats["path"] = dest_path
+
+    metrics.observe("backup.seconds", stats["seconds"])
+    metrics.observe("backup.pages_per_second", stats["pages_per_second"])
+    metrics.increment("backup.steps", stats["steps"])
+    metrics.increment("backup.restarts", stats["restarts"])
+    metrics.increment("backup.escalations", stats["escalations"])
+    metrics.increment("backup.completed")
+    return stats
+
+
+def archive_backup_dir(dest_path: str) -> str:
+    """Directory holding the archive partitions of a database backup"""
+    return dest_path[:-len(".db")] + "-archive"
+
+
+def backup_archive(archive_dir: str, dest_dir: str) -> int:
+    """Copy every archive partition into dest_dir; return how many were copied"""
+    partial = dest_dir + ".tmp"
+    shutil.rmtree(partial, ignore_errors=True)
+    os.makedirs(partial)
+    paths = TicketArchive(archive_dir).partition_paths()
+    try:
+        for path in paths:
+            shutil.copy2(path, os.path.join(partial, os.path.basename(path)))
+        os.replace(partial, dest_dir)
+    except OSError:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+    return len(paths)
+
+
+def prune_backups(directory: str, keep: int):
+    """Delete all but the newest `keep` backups, with their archive partitions"""
+    backups = sorted(name for name in os.listdir(directory)
+                     if name.startswith("tickets-") and name.endswith(".db"))
+    for name in backups[:-keep] if keep > 0 else []:
+        path = os.path.join(directory, name)
+        os.remove(path)
+        shutil.rmtree(archive_backup_dir(path), ignore_errors=True)
+
+
+def run_backup(source_path: Optional[str] = None, directory: Optional[str] = None,
+               archive_dir: Optional[str] = None) -> dict:
+    """Back up the ticket database and its archive partitions, then apply retention"""
+    source_path = source_path or DATABASE_CONFIG["path"]
+    directory = directory or BACKUP_CONFIG["directory"]
+    archive_dir = archive_dir or DATABASE_CONFIG["archive_dir"] or default_archive_dir(source_path)
+    os.makedirs(directory, exist_ok=True)
+    dest_path = os.path.join(directory, f"tickets-{time.strftime('%Y%m%d-%H%M%S')}.db")
+
+    stats = backup_database(source_path, dest_path)
+    try:
+        stats["archive_partitions"] = backup_archive(archive_dir, archive_backup_dir(dest_path))
+    except OSError:
+        os.remove(dest_path)
+        metrics.increment("backup.archive_failed")
+        logger.error(f"Could not copy archive partitions from {archive_dir}; backup discarded")
+        raise
+    prune_backups(directory, BACKUP_CONFIG["keep"])
+    logger.info(f"💾 Backup written to {dest_path}: {stats['pages']} pages in {stats['seconds']:.2f}s "
+                f"({stats['pages_per_second']:.0f} pages/s, {stats['steps']} steps, "
+                f"{stats['restarts']} restarts), {stats['archive_partitions']} archive partitions")
+    return stats
+
+
+def run_backup_worker(heartbeat=None, interval: float = 1.0):
+    """Back up the database every BACKUP_INTERVAL seconds until SIGTERM/SIGINT"""
+    async def main():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop.set)
+
+        async def beat():
+            while heartbeat is not None and not stop.is_set():
+                heartbeat.value = time.time()
+                await asyncio.sleep(interval)
+
+        beat_task = asyncio.create_task(beat())
+        logger.info(f"💾 Backups every {BACKUP_CONFIG['interval_seconds']:.0f}s "
+                    f"to {BACKUP_CONFIG['directory']}")
+        try:
+            while not stop.is_set():
+                try:
+                    # The copy runs in a thread so the heartbeat keeps beating
+                    await asyncio.to_thread(run_backup)
+                except Exception as e:
+                    metrics.increment("backup.failed")
+                    logger.error(f"Error backing up database: {e}")
+                try:
+                    await asyncio.wait_for(stop.wait(), BACKUP_CONFIG["interval_seconds"])
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            beat_task.cancel()
+
+    asyncio.run(main())
+
+
+def measure_with_writers(writers: int) -> dict:
+    """Run one backup while writer threads create tickets; report their wait times"""
+    from database import get_db
+    from benchmark_database import synthetic_ticket
+
+    db = get_db()
+    stop = threading.Event()
+
+    def write(seed: int):
+        rng = random.Random(seed)
+        n = 0
+        while not stop.is_set():
+            db.create_ticket(synthetic_ticket(rng, n))
+            n += 1
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=write, args=(i,), daemon=True) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+    metrics.reset()  # only count writes made while the backup runs
+    stats = run_backup()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    waits = metrics.snapshot("database.writer_wait_seconds")["histograms"]
+    stats["writer_wait_ms"] = {key: value * 1000 if key != "count" else value
+                               for key, value in waits.get("database.writer_wait_seconds", {}).items()
+                               if key not in ("total",)}
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Online backups of the ticket database")
+    parser.add_argument("--schedule", action="store_true", help="Back up every BACKUP_INTERVAL seconds")
+    parser.add_argument("--writers", type=int, default=0,
+                        help="Create tickets from N threads during the backup and report their wait")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.schedule:
+        run_backup_worker()
+    elif args.writers:
+        stats = measure_with_writers(args.writers)
+        wait = stats["writer_wait_ms"]
+        print(f"Backup: {stats['seconds']:.2f}s, {stats['pages_per_second']:.0f} pages/s, "
+              f"{stats['restarts']} restarts, {stats['escalations']} escalations")
+        if wait:
+            print(f"Writer wait: p50 {wait['p50']:.2f}ms  p99 {wait['p99']:.2f}ms  max {wait['max']:.2f}ms")
+    else:
+        run_backup()
+
+
+if __name__ == "__main__":
+    main()
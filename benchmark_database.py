@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+TicketDatabase Micro-benchmark
+
+Measures create_ticket, get_ticket, update_ticket and get_all_tickets
+against synthetic tables of different sizes, single-threaded and with
+concurrent writer processes, and compares the results with a stored
+baseline.
+
+Each size gets its own scratch database, populated with deterministic
+synthetic rows (bulk-inserted, so setup stays fast even at 1M rows).
+Every operation is warmed up before it is timed.
+
+Usage:
+    python benchmark_database.py --sizes 10000 100000 1000000
+    python benchmark_database.py --save-baseline bench_baseline.json
+    python benchmark_database.py --baseline bench_baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from database import Ticket, TicketDatabase
+from metrics import summarize
+
+ISSUES = [
+    ("Wi-Fi not working", 20.0),
+    ("Email login issues - password reset", 15.0),
+    ("Slow laptop performance - CPU change", 25.0),
+    ("Printer problems - power plug change", 10.0),
+]
+
+
+def synthetic_ticket(rng: random.Random, n: int) -> Ticket:
+    issue, price = rng.choice(ISSUES)
+    return Ticket(
+        name=f"Customer {n}",
+        email=f"customer{n}@example.com",
+        phone=f"555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        address=f"{rng.randint(1, 9999)} Main Street, Springfield",
+        issue=issue,
+        price=price,
+    )
+
+
+def populate(db_path: str, rows: int, seed: int, batch_size: int = 50000):
+    """Bulk insert `rows` synthetic tickets, bypassing the per-row API"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    conn = sqlite3.connect(db_path)
+    for offset in range(0, rows, batch_size):
+        batch = []
+        for n in range(offset, min(rows, offset + batch_size)):
+            ticket = synthetic_ticket(rng, n)
+            created_at = (start + timedelta(seconds=n * 37)).isoformat()
+            batch.append((ticket.name, ticket.email, ticket.phone, ticket.address,
+                          ticket.issue, ticket.price, created_at))
+        conn.executemany('''
+            INSERT INTO tickets (name, email, phone, address, issue, price, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', batch)
+        conn.commit()
+    conn.close()
+
+
+def time_operation(fn, iterations: int, warmup: int) -> dict:
+    """Run fn(i) warmup + iterations times; return latency summary in ms"""
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    summary = summarize(samples)
+    summary["ops_per_sec"] = 1000 * len(samples) / sum(samples) if samples else 0.0
+    return summary
+
+
+def benchmark_single(db: TicketDatabase, rows: int, options) -> dict:
+    rng = random.Random(options.seed)
+    ids = [rng.randint(1, rows) for _ in range(options.iterations + options.warmup)]
+    results = {}
+
+    results["get_ticket"] = time_operation(
+        lambda i: db.get_ticket(ids[i]), options.iterations, options.warmup)
+    results["update_ticket"] = time_operation(
+        lambda i: db.update_ticket(ids[i], {"phone": f"555-000-{i:04d}"}),
+        options.iterations, options.warmup)
+    # The same update without audit rows, to show the audit log's overhead
+    def raw_update(i):
+        conn = sqlite3.connect(db.db_path)
+        conn.execute("UPDATE tickets SET phone = ? WHERE id = ?", (f"555-111-{i:04d}", ids[i]))
+        conn.commit()
+        conn.close()
+
+    results["update_raw"] = time_operation(raw_update, options.iterations, options.warmup)
+    results["create_ticket"] = time_operation(
+        lambda i: db.create_ticket(synthetic_ticket(rng, rows + i)),
+        options.iterations, options.warmup)
+    results["get_all_tickets"] = time_operation(
+        lambda i: db.get_all_tickets(), options.list_iterations, min(1, options.warmup))
+    return results
+
+
+def writer_process(args: tuple) -> dict:
+    """Create tickets as fast as possible from one process"""
+    db_path, operations, seed = args
+    db = TicketDatabase(db_path)
+    rng = random.Random(seed)
+    samples = []
+    errors = 0
+    start = time.perf_counter()
+    for n in range(operations):
+        op_start = time.perf_counter()
+        try:
+            db.create_ticket(synthetic_ticket(rng, n))
+        except sqlite3.OperationalError:
+            # "database is locked" once the busy timeout is exhausted
+            errors += 1
+        samples.append((time.perf_counter() - op_start) * 1000)
+    return {"samples": samples, "errors": errors, "elapsed": time.perf_counter() - start}
+
+
+def benchmark_concurrent(db_path: str, options) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    jobs = [(db_path, options.iterations, options.seed + i) for i in range(options.writers)]
+    with ctx.Pool(options.writers) as pool:
+        results = pool.map(writer_process, jobs)
+    # Writers run side by side; the slowest one bounds aggregate throughput
+    elapsed = max(r["elapsed"] for r in results)
+
+    samples = [s for r in results for s in r["samples"]]
+    summary = summarize(samples)
+    summary["ops_per_sec"] = len(samples) / elapsed if elapsed else 0.0
+    summary["errors"] = sum(r["errors"] for r in results)
+    summary["writers"] = options.writers
+    return {"create_ticket": summary}
+
+
+def compare_with_baseline(report: dict, baseline: dict, tolerance: float) -> list:
+    """Return regressions where p50 or p95 grew by more than `tolerance`"""
+    regressions = []
+    for size, modes in report["results"].items():
+        for mode, operations in modes.items():
+            for op, summary in operations.items():
+                base = baseline.get("results", {}).get(size, {}).get(mode, {}).get(op)
+                if not base:
+                    continue
+                for stat in ("p50", "p95"):
+                    if stat in base and base[stat] > 0 and stat in summary:
+                        change = summary[stat] / base[stat] - 1
+                        if change > tolerance:
+                            regressions.append({
+                                "size": size, "mode": mode, "operation": op, "stat": stat,
+                                "baseline_ms": base[stat], "current_ms": summary[stat],
+                                "change": change,
+                            })
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="TicketDatabase micro-benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--iterations", type=int, default=1000, help="Timed operations per test")
+    parser.add_argument("--warmup", type=int, default=100, help="Untimed operations per test")
+    parser.add_argument("--list-iterations", type=int, default=3,
+                        help="Timed get_all_tickets calls (each reads the whole table)")
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent writer processes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", help="Directory for scratch databases (default: temporary)")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed p50/p95 slowdown vs baseline (0.2 = 20%%)")
+    parser.add_argument("--save-baseline", help="Write this run's results as a baseline")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable output")
+    return parser.parse_args(argv)
+
+
+def print_report(report: dict, regressions: list):
+    print("🗄️  TicketDatabase benchmark")
+    print("=" * 72)
+    for size, modes in report["results"].items():
+        print(f"\n{int(size):,} rows")
+        for mode, operations in modes.items():
+            for op, s in operations.items():
+                extra = f"  errors {s['errors']}" if s.get("errors") else ""
+                print(f"  {mode:<11} {op:<16} p50 {s['p50']:>9.3f}ms  p95 {s['p95']:>9.3f}ms  "
+                      f"p99 {s['p99']:>9.3f}ms  {s['ops_per_sec']:>9.0f} ops/s{extra}")
+    if regressions:
+        print("\n❌ Regressions vs baseline:")
+        for r in regressions:
+            print(f"  {r['size']} rows {r['mode']} {r['operation']} {r['stat']}: "
+                  f"{r['baseline_ms']:.3f}ms -> {r['current_ms']:.3f}ms (+{r['change']:.0%})")
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    workdir = options.workdir or tempfile.mkdtemp(prefix="ticket_bench_")
+
+    report = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "sqlite": sqlite3.sqlite_version, "cpus": os.cpu_count()},
+        "options": {"iterations": options.iterations, "warmup": options.warmup,
+                    "writers": options.writers, "seed": options.seed},
+        "results": {},
+    }
+
+    for size in options.sizes:
+        db_path = os.path.join(workdir, f"tickets_{size}.db")
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        db = TicketDatabase(db_path)
+        populate(db_path, size, options.seed)
+
+        results = {"single": benchmark_single(db, size, options)}
+        if options.writers > 1:
+            results["concurrent"] = benchmark_concurrent(db_path, options)
+        report["results"][str(size)] = results
+        os.remove(db_path)
+
+    regressions = []
+    if options.baseline:
+        with open(options.baseline) as f:
+            regressions = compare_with_baseline(report, json.load(f), options.tolerance)
+        report["regressions"] = regressions
+
+    if options.save_baseline:
+        with open(options.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if options.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, regressions)
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Startup Time Benchmark
+
+Measures cold-start cost for each entry point in a fresh interpreter:
+
+- launcher: importing main.py (should stay cheap; workers import lazily)
+- web:      importing web_interface and serving the first GET /tickets
+- voice:    importing voice_bot, prewarming the job process, and then
+            creating the first ITHelpDeskBot (first_job is timed from the
+            end of prewarm, so it shows only what lazy init leaves for the
+            first call)
+
+Usage:
+    python benchmark_startup.py [--runs 5] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Each snippet runs in a new interpreter and prints a JSON dict of timings (ms)
+LAUNCHER_SNIPPET = """
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+print(json.dumps({"import": (t1 - t0) * 1000}))
+"""
+
+WEB_SNIPPET = """
+import asyncio, json, time
+t0 = time.perf_counter()
+import web_interface
+t1 = time.perf_counter()
+
+async def first_request():
+    # Drive the ASGI app directly so no server or HTTP client is needed
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+             "method": "GET", "scheme": "http", "path": "/tickets", "raw_path": b"/tickets",
+             "query_string": b"", "root_path": "", "headers": [],
+             "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 8000)}
+    status = {}
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+    await web_interface.app(scope, receive, send)
+    return status.get("code")
+
+code = asyncio.run(first_request())
+t2 = time.perf_counter()
+print(json.dumps({"import": (t1 - t0) * 1000, "first_request": (t2 - t1) * 1000,
+                  "status": code}))
+"""
+
+VOICE_SNIPPET = """
+import json, time
+t0 = time.perf_counter()
+import voice_bot
+t1 = time.perf_counter()
+
+class Proc:
+    userdata = {}
+
+voice_bot.prewarm(Proc())
+t2 = time.perf_counter()
+voice_bot.ITHelpDeskBot()
+t3 = time.perf_counter()
+print(json.dumps({"import": (t1 - t0) * 1000, "prewarm": (t2 - t1) * 1000,
+                  "first_job": (t3 - t2) * 1000}))
+"""
+
+MODES = {
+    "launcher": LAUNCHER_SNIPPET,
+    "web": WEB_SNIPPET,
+    "voice": VOICE_SNIPPET,
+}
+
+
+def run_once(snippet: str, db_path: str) -> dict:
+    """Run one snippet in a fresh interpreter and return its timings"""
+    env = dict(os.environ, DATABASE_PATH=db_path)
+    result = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark_mode(snippet: str, runs: int) -> dict:
+    """Collect median/min/max of every timing across `runs` cold starts"""
+    samples = []
+    for _ in range(runs):
+        # A new database per run so first-request times include schema creation
+        with tempfile.TemporaryDirectory() as tmp:
+            samples.append(run_once(snippet, os.path.join(tmp, "tickets.db")))
+
+    report = {}
+    for key in samples[0]:
+        values = [s[key] for s in samples if isinstance(s.get(key), (int, float)) and key != "status"]
+        if not values:
+            report[key] = samples[-1][key]
+            continue
+        report[key] = {
+            "median_ms": round(statistics.median(values), 1),
+            "min_ms": round(min(values), 1),
+            "max_ms": round(max(values), 1),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start time per entry point")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per mode")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--json", action="store_true", help="Print machine-readable output")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        try:
+            results[mode] = benchmark_mode(MODES[mode], args.runs)
+        except RuntimeError as e:
+            results[mode] = {"error": str(e)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("🚀 Startup benchmark")
+    print("=" * 40)
+    for mode, report in results.items():
+        print(f"\n{mode}:")
+        if "error" in report:
+            print(f"  ❌ {report['error']}")
+            continue
+        for key, value in report.items():
+            if isinstance(value, dict):
+                print(f"  {key:<14} median {value['median_ms']:>8.1f} ms  "
+                      f"(min {value['min_ms']:.1f}, max {value['max_ms']:.1f})")
+            else:
+                print(f"  {key:<14} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Per-Call Summary
+
+Job processes are single-use, so the in-process metrics registry is lost
+when a call ends. CallSummary snapshots the registry when a call starts
+and, at shutdown, logs what the call added as one JSON line.
+"""
+
+import json
+import logging
+from typing import Dict, Optional
+
+from metrics import MetricsRegistry, metrics
+
+logger = logging.getLogger(__name__)
+
+
+class CallSummary:
+    """Metrics recorded between the start of a call and its summary"""
+
+    def __init__(self, room_name: str, registry: Optional[MetricsRegistry] = None):
+        self.room_name = room_name
+        self.registry = registry or metrics
+        self.start = self.registry.snapshot()
+
+    def counters(self) -> Dict[str, float]:
+        """Counter increments since the call started"""
+        before = self.start["counters"]
+        return {name: value - before.get(name, 0.0)
+                for name, value in self.registry.snapshot()["counters"].items()
+                if value != before.get(name, 0.0)}
+
+    def histograms(self) -> Dict[str, Dict[str, float]]:
+        """Sample count and total per histogram since the call started"""
+        before = self.start["histograms"]
+        totals = {}
+        for name, summary in self.registry.snapshot()["histograms"].items():
+            count = summary["count"] - before.get(name, {}).get("count", 0)
+            if count:
+                totals[name] = {"count": count,
+                                "total": summary["total"] - before.get(name, {}).get("total", 0.0)}
+        return totals
+
+    def report(self) -> Dict[str, dict]:
+        counters, histograms = self.counters(), self.histograms()
+        report = {}
+        routes = llm_routes(counters, histograms)
+        if routes:
+            report["llm_routes"] = routes
+        speculation = speculation_summary(counters, histograms)
+        if speculation:
+            report["speculation"] = speculation
+        filler = filler_summary(counters, histograms)
+        if filler:
+            report["filler"] = filler
+        context = context_summary(counters, histograms)
+        if context:
+            report["context"] = context
+        return report
+
+    async def log(self):
+        """Log this call's summary (a JobContext shutdown callback)"""
+        logger.info(f"📊 Call summary for {self.room_name}: {json.dumps(self.report(), sort_keys=True)}")
+
+
+def mean(histograms: Dict[str, Dict[str, float]], name: str) -> Optional[float]:
+    histogram = histograms.get(name)
+    if not histogram:
+        return None
+    return round(histogram["total"] / histogram["count"], 3)
+
+
+def llm_routes(counters: Dict[str, float], histograms: Dict[str, Dict[str, float]]) -> Dict[str, dict]:
+    """Requests, tokens, cost and mean latency per LLM route (llm_router.py)"""
+    routes = {}
+    for route in ("fast", "capable"):
+        prefix = f"llm.route.{route}"
+        requests = int(counters.get(f"{prefix}.requests", 0))
+        if not requests:
+            continue
+        routes[route] = {
+            "requests": requests,
+            "prompt_tokens": int(counters.get(f"{prefix}.prompt_tokens", 0)),
+            "completion_tokens": int(counters.get(f"{prefix}.completion_tokens", 0)),
+            "cost_usd": round(counters.get(f"{prefix}.cost_usd", 0.0), 6),
+            "ttft_mean_seconds": mean(histograms, f"{prefix}.ttft"),
+        }
+    return routes
+
+
+def speculation_summary(counters: Dict[str, float], histograms: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """Speculative replies started, used and wasted, and the latency they saved (speculation.py)"""
+    started = int(counters.get("speculation.started", 0))
+    if not started:
+        return {}
+    hits = int(counters.get("speculation.hits", 0))
+    saved = histograms.get("speculation.latency_saved_seconds", {})
+    return {
+        "started": started,
+        "hits": hits,
+        "wasted": int(counters.get("speculation.wasted", 0)),
+        "hit_rate": round(hits / started, 3),
+        "latency_saved_seconds": round(saved.get("total", 0.0), 3),
+    }
+
+
+def filler_summary(counters: Dict[str, float], histograms: Dict[str, Dict[str, float]]) -> Dict[str, dict]:
+    """Masked waits and filler phrases played per kind ("tool", "llm"; filler.py)"""
+    kinds = {}
+    for kind in ("tool", "llm"):
+        prefix = f"filler.{kind}"
+        waits = histograms.get(f"{prefix}.wait_seconds", {}).get("count", 0)
+        if not waits:
+            continue
+        kinds[kind] = {
+            "waits": waits,
+            "wait_mean_seconds": mean(histograms, f"{prefix}.wait_seconds"),
+            "masked_turns": int(counters.get(f"{prefix}.played", 0)),
+            "masked_seconds": round(histograms.get(f"{prefix}.masked_seconds", {}).get("total", 0.0), 3),
+            "not_ready": int(counters.get(f"{prefix}.not_ready", 0)),
+        }
+    return kinds
+
+
+def context_summary(counters: Dict[str, float], histograms: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """Prompt tokens before/after compaction and the tokens it saved (context_manager.py)"""
+    before = histograms.get("context.prompt_tokens_before", {})
+    if not before:
+        return {}
+    return {
+        "turns": before["count"],
+        "compactions": int(counters.get("context.compactions", 0)),
+        "tokens_saved": int(counters.get("context.tokens_saved", 0)),
+        "prompt_tokens_before": int(before["total"]),
+        "prompt_tokens_after": int(histograms.get("context.prompt_tokens_after", {}).get("total", 0)),
+    }
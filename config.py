@@ -2,6 +2,20 @@ import os
 from typing import Dict
 
 # Business rules for IT support issues
+SUPPORTED_ISSUES: Dict[str, float] = {
+    "Wi-Fi not working": 20.0,
+    "Email login issues - password reset": 15.0,
+    "Slow laptop performance - CPU change": 25.0,
+    "Printer problems - power plug change": 10.0,
+}
+
+# Keywords used to recognize each supported issue in caller speech
+ISSUE_KEYWORDS: Dict[str, list] = {
+    "Wi-Fi not working": ["wi-fi", "wifi", "wi fi", "wireless", "internet", "network"],
+    "Email login issues - password reset": ["password", "log in", "login", "sign in", "locked out"],
+    "Slow laptop performance - CPU change": ["slow", "laptop", "performance", "cpu", "sluggish"],
+    "Printer problems - power plug change": ["printer", "printing", "print"],
+}
 
 
 # System prompts for the LLM
@@ -49,3 +63,289 @@ OPENAI_CONFIG = {
     "temperature": 0.7,
 }
 
+
+# Access token settings for the /get-token endpoint
+TOKEN_CONFIG = {
+    "ttl_seconds": int(os.getenv("TOKEN_TTL_SECONDS", "3600")),
+    # Cached tokens are reused until this many seconds before they expire
+    "reuse_margin_seconds": int(os.getenv("TOKEN_REUSE_MARGIN_SECONDS", "300")),
+}
+
+# Token-bucket rate limits for the /get-token endpoint. Buckets (and the
+# signed-token cache) are kept in each web worker process, not in shared
+# storage, so the effective limits are these values times WEB_WORKERS.
+RATE_LIMIT_CONFIG = {
+    "per_ip": {
+        "rate": float(os.getenv("TOKEN_RATE_PER_IP", "0.5")),  # tokens per second
+        "burst": int(os.getenv("TOKEN_BURST_PER_IP", "5")),
+    },
+    "per_room": {
+        "rate": float(os.getenv("TOKEN_RATE_PER_ROOM", "0.2")),
+        "burst": int(os.getenv("TOKEN_BURST_PER_ROOM", "3")),
+    },
+    "max_keys": int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000")),
+}
+
+# Process launcher settings (main.py); worker counts of 0 mean "size to CPU count"
+LAUNCHER_CONFIG = {
+    "host": os.getenv("WEB_HOST", "0.0.0.0"),
+    "port": int(os.getenv("WEB_PORT", "8000")),
+    "web_workers": int(os.getenv("WEB_WORKERS", "0")),
+    "voice_workers": int(os.getenv("VOICE_WORKERS", "0")),
+    # LiveKit workers each serve an HTTP health check; worker i uses base + i.
+    # A voice worker only heartbeats while its health check answers.
+    "voice_health_port_base": int(os.getenv("VOICE_HEALTH_PORT_BASE", "8081")),
+    "heartbeat_interval": 1.0,
+    "heartbeat_timeout": 15.0,
+    "restart_backoff_max": 30.0,
+    "drain_timeout": float(os.getenv("DRAIN_TIMEOUT", "60")),
+}
+
+# Voice pipeline providers, selected by name from the registry in providers.py.
+# "openai" is the production stack; "fake" runs fully offline for load tests.
+PROVIDER_CONFIG = {
+    "stt": {
+        "provider": os.getenv("STT_PROVIDER", "openai"),
+        "model": "whisper-1",
+        "language": "en",
+    },
+    "llm": {
+        "provider": os.getenv("LLM_PROVIDER", "openai"),
+        "model": OPENAI_CONFIG["model"],
+        "temperature": OPENAI_CONFIG["temperature"],
+    },
+    "tts": {
+        "provider": os.getenv("TTS_PROVIDER", "openai"),
+        "model": "tts-1",
+        "voice": "alloy",
+    },
+}
+
+# Stage-aware model routing (llm_router.py), used when LLM_PROVIDER=router.
+# Simple collection/confirmation turns go to the fast model; off-script or
+# ambiguous turns escalate to the capable one.
+ROUTING_CONFIG = {
+    "fast": {
+        "provider": os.getenv("ROUTER_FAST_PROVIDER", "openai"),
+        "model": os.getenv("ROUTER_FAST_MODEL", "gpt-4o-mini"),
+        "temperature": 0.3,
+    },
+    "capable": {
+        "provider": os.getenv("ROUTER_CAPABLE_PROVIDER", "openai"),
+        "model": os.getenv("ROUTER_CAPABLE_MODEL", OPENAI_CONFIG["model"]),
+        "temperature": OPENAI_CONFIG["temperature"],
+    },
+    "fast_stages": ["greeting", "collecting_details", "understanding_issue", "confirming"],
+    # Send every turn to one route ("fast" or "capable"), e.g. to compare costs
+    "force_route": os.getenv("ROUTER_FORCE_ROUTE") or None,
+    # Utterances longer than this that add no new details count as ambiguous
+    "ambiguous_min_words": 12,
+}
+
+# Deadlines, circuit breakers and fallback chains (resilience.py). Fallbacks
+# use FALLBACK_PROVIDER (default openai); the offline fake stack gets none
+# unless FALLBACK_PROVIDER is set, so it never needs an API key.
+_FALLBACK_PROVIDER = os.getenv("FALLBACK_PROVIDER")
+_FALLBACK_PROVIDERS = {
+    kind: _FALLBACK_PROVIDER or (None if settings["provider"] == "fake" else "openai")
+    for kind, settings in PROVIDER_CONFIG.items()
+}
+RESILIENCE_CONFIG = {
+    "enabled": os.getenv("RESILIENCE", "1") != "0",
+    "breaker": {
+        "failure_threshold": int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3")),
+        "reset_timeout": float(os.getenv("BREAKER_RESET_TIMEOUT", "30")),
+    },
+    "llm": {
+        "first_token_timeout": float(os.getenv("LLM_FIRST_TOKEN_TIMEOUT", "4.0")),
+        "timeout": float(os.getenv("LLM_TIMEOUT", "15.0")),
+        "fallbacks": [
+            {"provider": _FALLBACK_PROVIDERS["llm"], "model": "gpt-4o-mini", "temperature": 0.3},
+        ] if _FALLBACK_PROVIDERS["llm"] else [],
+        # Spoken when every model in the chain fails
+        "canned_phrase": "Sorry, I'm having a little trouble right now. Could you say that again?",
+    },
+    "stt": {
+        "timeout": float(os.getenv("STT_TIMEOUT", "5.0")),
+        "fallbacks": [
+            {"provider": _FALLBACK_PROVIDERS["stt"], "model": "gpt-4o-mini-transcribe", "language": "en"},
+        ] if _FALLBACK_PROVIDERS["stt"] else [],
+    },
+    "tts": {
+        "timeout": float(os.getenv("TTS_TIMEOUT", "5.0")),
+        "fallbacks": [
+            {"provider": _FALLBACK_PROVIDERS["tts"], "model": "gpt-4o-mini-tts", "voice": "alloy"},
+        ] if _FALLBACK_PROVIDERS["tts"] else [],
+    },
+}
+
+# USD per 1M tokens (input, output) for cost accounting
+LLM_PRICING = {
+    "gpt-4": (30.0, 60.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+}
+
+# Settings for the offline stand-in providers (fake_providers.py)
+FAKE_PROVIDER_CONFIG = {
+    # Optional JSON script with "transcripts" and "llm_turns" lists
+    "script_path": os.getenv("FAKE_SCRIPT_PATH"),
+    "seed": int(os.getenv("FAKE_SEED", "0")),
+    "stt_latency": float(os.getenv("FAKE_STT_LATENCY", "0.2")),
+    "llm_first_token_latency": float(os.getenv("FAKE_LLM_TTFT", "0.4")),
+    "llm_token_latency": float(os.getenv("FAKE_LLM_TOKEN_LATENCY", "0.02")),
+    "tts_latency": float(os.getenv("FAKE_TTS_LATENCY", "0.15")),
+    # Random +/- fraction applied to every latency (deterministic per seed)
+    "latency_jitter": float(os.getenv("FAKE_LATENCY_JITTER", "0.1")),
+    # Fraction of requests that fail, and extra delay injected into a fraction
+    # of requests, for exercising timeouts and fallbacks
+    "error_rate": float(os.getenv("FAKE_ERROR_RATE", "0")),
+    "stall_rate": float(os.getenv("FAKE_STALL_RATE", "0")),
+    "stall_seconds": float(os.getenv("FAKE_STALL_SECONDS", "10")),
+    "tts_sample_rate": 24000,
+    "tts_chars_per_second": 15.0,
+}
+
+# Chat context compaction (context_manager.py): once the estimated prompt
+# exceeds the token budget, older turns are replaced by a structured summary
+CONTEXT_CONFIG = {
+    "enabled": os.getenv("CONTEXT_COMPACTION", "1") != "0",
+    "token_budget": int(os.getenv("CONTEXT_TOKEN_BUDGET", "1200")),
+    # Most recent user turns (with their replies and tool calls) always kept verbatim
+    "keep_recent_turns": int(os.getenv("CONTEXT_KEEP_RECENT_TURNS", "3")),
+}
+
+# Latency masking (filler.py): short pre-rendered acknowledgements played
+# when a tool call or LLM response takes longer than the threshold
+FILLER_CONFIG = {
+    "enabled": os.getenv("FILLER_AUDIO", "1") != "0",
+    "thresholds": {
+        "tool": float(os.getenv("FILLER_TOOL_THRESHOLD", "0.7")),
+        "llm": float(os.getenv("FILLER_LLM_THRESHOLD", "1.2")),
+    },
+    "phrases": {
+        "tool": ["One moment while I set that up.", "Just a second.", "Bear with me a moment."],
+        "llm": ["Mm-hmm.", "Let me see.", "Okay, one moment."],
+    },
+    # At most this many fillers per turn so slow turns don't become chatty
+    "max_per_turn": 1,
+    "volume": 1.0,
+    # Rendered phrases, reused by every job process (python filler.py fills it)
+    "cache_dir": os.getenv("FILLER_CACHE_DIR", "filler_audio"),
+}
+
+# Speculative replies (speculation.py): start the LLM on the final transcript
+# before end-of-turn is confirmed; discarded if the caller keeps talking
+SPECULATION_CONFIG = {
+    "enabled": os.getenv("SPECULATIVE_REPLIES", "0") == "1",
+    # Ignore very short transcripts ("uh") that rarely end a turn
+    "min_words": int(os.getenv("SPECULATION_MIN_WORDS", "1")),
+}
+
+# Endpointing profiles per conversation stage (endpointing.py). The stage is
+# what the caller is answering next: short silences suffice for yes/no
+# confirmations, dictating a phone number and address needs longer pauses.
+ENDPOINTING_CONFIG = {
+    "enabled": os.getenv("ADAPTIVE_ENDPOINTING", "1") != "0",
+    "profiles": {
+        # Name and email
+        "greeting": {"min_silence": 0.6, "min_delay": 0.8, "max_delay": 4.0},
+        # Phone number and full address
+        "collecting_details": {"min_silence": 0.8, "min_delay": 1.2, "max_delay": 6.0},
+        # Describing the issue
+        "understanding_issue": {"min_silence": 0.55, "min_delay": 0.6, "max_delay": 4.0},
+        # Yes/no confirmations
+        "confirming": {"min_silence": 0.35, "min_delay": 0.3, "max_delay": 2.0},
+        "completed": {"min_silence": 0.5, "min_delay": 0.5, "max_delay": 3.0},
+    },
+}
+
+# Response cache for repeated off-flow questions (response_cache.py)
+RESPONSE_CACHE_CONFIG = {
+    "enabled": os.getenv("RESPONSE_CACHE", "1") != "0",
+    "max_entries": int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512")),
+    "ttl_seconds": float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+    # Cosine similarity (0-1) needed to reuse an answer for a differently worded question
+    "similarity_threshold": float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.8")),
+}
+
+# Call transcripts (transcripts.py)
+TRANSCRIPT_CONFIG = {
+    "enabled": os.getenv("TRANSCRIPTS", "1") != "0",
+    "directory": os.getenv("TRANSCRIPT_DIR", "transcripts"),
+    # Write buffered entries every N caller turns, and always at call end
+    "flush_turns": int(os.getenv("TRANSCRIPT_FLUSH_TURNS", "10")),
+    "compression_level": int(os.getenv("TRANSCRIPT_COMPRESSION_LEVEL", "6")),
+}
+
+# Call audio recording (recorder.py). Off by default.
+RECORDING_CONFIG = {
+    "enabled": os.getenv("CALL_RECORDING", "0") == "1",
+    "directory": os.getenv("RECORDING_DIR", "recordings"),
+    # PCM bytes per compressed chunk (64 KiB is ~2 s of 16 kHz mono audio)
+    "chunk_bytes": int(os.getenv("RECORDING_CHUNK_BYTES", str(64 * 1024))),
+    # Chunks queued per track; further chunks are dropped until the disk catches up
+    "max_buffered_chunks": int(os.getenv("RECORDING_MAX_BUFFERED_CHUNKS", "8")),
+    "max_session_bytes": int(os.getenv("RECORDING_MAX_SESSION_MB", "200")) * 1024 * 1024,
+    "compression_level": int(os.getenv("RECORDING_COMPRESSION_LEVEL", "6")),
+}
+
+# Confirmation emails via the transactional outbox (notifications.py)
+NOTIFICATION_CONFIG = {
+    "enabled": os.getenv("NOTIFICATIONS", "1") != "0",
+    "smtp_host": os.getenv("SMTP_HOST", "localhost"),
+    "smtp_port": int(os.getenv("SMTP_PORT", "8025")),
+    "smtp_username": os.getenv("SMTP_USERNAME"),
+    "smtp_password": os.getenv("SMTP_PASSWORD"),
+    "smtp_timeout": float(os.getenv("SMTP_TIMEOUT", "10")),
+    "sender": os.getenv("NOTIFICATION_SENDER", "IT Help Desk <helpdesk@example.com>"),
+    # Messages claimed per poll, and parallel SMTP connections per batch
+    "batch_size": int(os.getenv("OUTBOX_BATCH_SIZE", "20")),
+    "concurrency": int(os.getenv("OUTBOX_CONCURRENCY", "4")),
+    "poll_interval": float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0")),
+    "lease_seconds": float(os.getenv("OUTBOX_LEASE_SECONDS", "60")),
+    # Exponential backoff between attempts; dead-letter after max_attempts
+    "max_attempts": int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6")),
+    "backoff_base": float(os.getenv("OUTBOX_BACKOFF_BASE", "2.0")),
+    "backoff_max": float(os.getenv("OUTBOX_BACKOFF_MAX", "300")),
+    # Where the local SMTP stand-in (python notifications.py --smtp-sink) stores mail
+    "sink_path": os.getenv("SMTP_SINK_PATH", "outbox_sink.mbox"),
+}
+
+# Ticket storage. "sqlite" keeps tickets in a local file (one host);
+# "postgres" uses a PostgreSQL server shared by every web/voice host
+# (postgres_database.py, needs psycopg[binary,pool]).
+DATABASE_CONFIG = {
+    "backend": os.getenv("DATABASE_BACKEND", "sqlite"),
+    "path": os.getenv("DATABASE_PATH", "tickets.db"),
+    "url": os.getenv("DATABASE_URL", "postgresql://localhost/tickets"),
+    # Connections per process; keep pool_max_size * processes below the server's max_connections
+    "pool_min_size": int(os.getenv("DATABASE_POOL_MIN", "1")),
+    "pool_max_size": int(os.getenv("DATABASE_POOL_MAX", "5")),
+    "pool_timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", "10")),
+    "archive_dir": os.getenv("ARCHIVE_DIR"),
+    # Apply pending schema migrations when the database is opened (see migrations.py)
+    "auto_migrate": os.getenv("DATABASE_AUTO_MIGRATE", "1") == "1",
+    # Let automatic migration build SQLite indexes, which blocks ticket
+    # writes for the whole build; otherwise run python migrations.py
+    "migrate_blocking": os.getenv("DATABASE_MIGRATE_BLOCKING", "0") == "1",
+}
+
+# Ticket archival into monthly partitions (ticket_archive.py). The
+# partitions are stored in ARCHIVE_DIR, default "archive/" next to the database.
+ARCHIVE_CONFIG = {
+    "archive_after_days": int(os.getenv("ARCHIVE_AFTER_DAYS", "90")),
+}
+
+# Online backups of the ticket database (backup.py)
+BACKUP_CONFIG = {
+    "directory": os.getenv("BACKUP_DIR", "backups"),
+    # Seconds between scheduled backups; 0 disables the backup worker
+    "interval_seconds": float(os.getenv("BACKUP_INTERVAL", "3600")),
+    "keep": int(os.getenv("BACKUP_KEEP", "24")),
+    # Pages copied per step and pause between steps, during which writers proceed
+    "pages_per_step": int(os.getenv("BACKUP_PAGES_PER_STEP", "64")),
+    "step_sleep": float(os.getenv("BACKUP_STEP_SLEEP", "0.005")),
+    # Restarts (caused by concurrent writes) before the step size is quadrupled
+    "max_restarts": int(os.getenv("BACKUP_MAX_RESTARTS", "3")),
+}
@@ -0,0 +1,147 @@
+"""
+Chat Context Compaction
+
+This module keeps the prompt sent to the LLM bounded during long calls.
+Once the estimated prompt size exceeds the configured token budget, the
+oldest completed turns are dropped and replaced by one compact system
+message holding the conversation stage, the customer details collected
+so far and the caller's dropped messages word for word. Field
+extraction only recognizes some phrasings ("I live at ..."), so a bare
+answer like "12 Oak Street" survives only as the caller's own words;
+assistant replies and tool calls are what compaction saves. The
+instructions and the most recent turns are always kept verbatim.
+"""
+
+import logging
+from typing import List, Optional
+
+from livekit.agents import llm
+
+from config import CONTEXT_CONFIG
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Marks the summary message so later compactions replace it instead of stacking
+SUMMARY_ID = "context-summary"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def message_text(item) -> str:
+    """Extract plain text from a chat message (string or list content)"""
+    content = getattr(item, "content", "")
+    if isinstance(content, str):
+        return content
+    parts = []
+    for part in content or []:
+        if isinstance(part, str):
+            parts.append(part)
+        elif hasattr(part, "text"):
+            parts.append(part.text)
+    return " ".join(parts)
+
+
+def item_tokens(item) -> int:
+    """Estimate the prompt tokens contributed by one chat context item"""
+    item_type = getattr(item, "type", None)
+    if item_type == "message":
+        return estimate_tokens(message_text(item)) + 4  # role/format overhead
+    if item_type == "function_call":
+        return estimate_tokens(item.name + item.arguments) + 4
+    if item_type == "function_call_output":
+        return estimate_tokens(item.output) + 4
+    return 0
+
+
+def context_tokens(items) -> int:
+    return sum(item_tokens(item) for item in items)
+
+
+def build_summary(state, caller_messages: List[str] = ()) -> Optional[str]:
+    """Render the stage, collected fields, ticket and dropped caller messages as a compact block"""
+    collected = {k: v for k, v in state.collected_info.items() if v not in (None, "")}
+    ticket = state.current_ticket
+    if not collected and ticket is None and not caller_messages:
+        return None
+
+    lines = ["Summary of earlier conversation (older turns removed):",
+             f"- Stage: {state.conversation_stage}"]
+    for key, value in collected.items():
+        lines.append(f"- {key.capitalize()}: {value}")
+    if ticket is not None and getattr(ticket, "id", None) is not None:
+        lines.append(f"- Ticket ID: {ticket.id}")
+    if caller_messages:
+        lines.append("Caller's earlier messages, verbatim:")
+        lines.extend(f"- {text}" for text in caller_messages)
+    return "\n".join(lines)
+
+
+class ContextCompactor:
+    """Drops old turns from a chat context to fit a token budget"""
+
+    def __init__(self, token_budget: Optional[int] = None, keep_recent_turns: Optional[int] = None):
+        self.token_budget = token_budget or CONTEXT_CONFIG["token_budget"]
+        self.keep_recent_turns = (CONTEXT_CONFIG["keep_recent_turns"]
+                                  if keep_recent_turns is None else keep_recent_turns)
+
+    def compact(self, chat_ctx: llm.ChatContext, state) -> int:
+        """Compact chat_ctx in place; return the estimated number of tokens saved"""
+        items = [item for item in chat_ctx.items if getattr(item, "id", None) != SUMMARY_ID]
+        before = context_tokens(chat_ctx.items)
+        metrics.observe("context.prompt_tokens_before", before)
+        if before <= self.token_budget:
+            metrics.observe("context.prompt_tokens_after", before)
+            return 0
+
+        # Leading system/developer messages are the agent's instructions
+        head = 0
+        while (head < len(items) and getattr(items[head], "type", None) == "message"
+               and items[head].role in ("system", "developer")):
+            head += 1
+        instructions, history = items[:head], items[head:]
+
+        # Split history into turns, each starting with a user message
+        turns: List[list] = []
+        for item in history:
+            if (getattr(item, "type", None) == "message" and item.role == "user") or not turns:
+                turns.append([])
+            turns[-1].append(item)
+
+        def summarize(dropped: List[list]) -> list:
+            # The caller's words stay in the prompt; replies and tool calls go
+            caller_messages = [message_text(item) for turn in dropped for item in turn
+                               if getattr(item, "type", None) == "message" and item.role == "user"]
+            summary_text = build_summary(state, caller_messages)
+            if not summary_text:
+                return []
+            return [llm.ChatMessage(id=SUMMARY_ID, role="system", content=[summary_text])]
+
+        # Drop the oldest turns until the prompt fits, keeping the recent ones
+        budget = self.token_budget - context_tokens(instructions)
+        dropped = 0
+        summary = summarize([])
+        while len(turns) - dropped > self.keep_recent_turns and context_tokens(
+                summary + [item for turn in turns[dropped:] for item in turn]) > budget:
+            dropped += 1
+            summary = summarize(turns[:dropped])
+        kept = turns[dropped:]
+
+        if not dropped:
+            metrics.observe("context.prompt_tokens_after", before)
+            return 0
+
+        compacted = instructions + summary + [item for turn in kept for item in turn]
+        chat_ctx.items[:] = compacted
+        after = context_tokens(compacted)
+        saved = max(0, before - after)
+
+        metrics.increment("context.compactions")
+        metrics.increment("context.tokens_saved", saved)
+        metrics.observe("context.prompt_tokens_after", after)
+        logger.info(f"🗜️  Compacted chat context: {before} -> {after} tokens "
+                    f"({len(turns) - len(kept)} turns summarized)")
+        return saved
@@ -0,0 +1,102 @@
+"""
+Conversation Tracking
+
+This module contains lightweight, regex-based extraction of customer
+details from caller speech and derives the conversation stage stored in
+VoiceBotState. It does not replace the LLM's understanding; it gives the
+rest of the pipeline (context compaction, model routing, endpointing) a
+cheap, local view of where the call is.
+"""
+
+import re
+from typing import Dict, Optional
+
+from config import ISSUE_KEYWORDS, SUPPORTED_ISSUES
+
+# Conversation stages, in call order
+STAGES = ["greeting", "collecting_details", "understanding_issue", "confirming", "completed"]
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{5,}\d")
+NAME_PATTERN = re.compile(
+    r"\b(?:my name is|my name's|name is|this is|call me)\s+"
+    r"([A-Za-z][A-Za-z'\-]+(?:\s+(?!and\b)[A-Za-z][A-Za-z'\-]+){0,2})",
+    re.IGNORECASE,
+)
+QUESTION_PATTERN = re.compile(
+    r"\?|^\s*(what|how|why|when|where|which|who|can|could|do|does|is|are|will|would)\b",
+    re.IGNORECASE,
+)
+ADDRESS_PATTERN = re.compile(
+    r"\b(?:my address is|address is|i live at|i'm at|located at)\s+([^.?!]+)",
+    re.IGNORECASE,
+)
+
+
+def detect_issue(text: str) -> Optional[str]:
+    """Return the supported issue whose keywords best match the text, if any"""
+    lowered = text.lower()
+    best, best_hits = None, 0
+    for issue, keywords in ISSUE_KEYWORDS.items():
+        hits = sum(1 for keyword in keywords if keyword in lowered)
+        if hits > best_hits:
+            best, best_hits = issue, hits
+    return best
+
+
+def extract_fields(text: str, expect_issue: bool = True) -> Dict[str, object]:
+    """Extract any customer details mentioned in one user utterance"""
+    fields: Dict[str, object] = {}
+
+    email = EMAIL_PATTERN.search(text)
+    if email:
+        fields["email"] = email.group(0).rstrip(".")
+
+    # Strip emails first so their digits are not mistaken for a phone number
+    without_email = EMAIL_PATTERN.sub(" ", text)
+    phone = PHONE_PATTERN.search(without_email)
+    if phone and sum(c.isdigit() for c in phone.group(0)) >= 7:
+        fields["phone"] = phone.group(0).strip()
+
+    name = NAME_PATTERN.search(text)
+    if name:
+        fields["name"] = name.group(1).strip()
+
+    address = ADDRESS_PATTERN.search(without_email)
+    if address and len(address.group(1).strip()) >= 10:
+        fields["address"] = address.group(1).strip().rstrip(",")
+
+    if expect_issue:
+        issue = detect_issue(without_email)
+        if issue:
+            fields["issue"] = issue
+            fields["price"] = SUPPORTED_ISSUES[issue]
+
+    return fields
+
+
+def derive_stage(collected_info: Dict[str, object], has_ticket: bool) -> str:
+    """Work out the conversation stage from what has been collected so far"""
+    if has_ticket:
+        return "completed"
+    if collected_info.get("issue"):
+        return "confirming"
+    if collected_info.get("phone") and collected_info.get("address"):
+        return "understanding_issue"
+    if collected_info.get("name") or collected_info.get("email"):
+        return "collecting_details"
+    return "greeting"
+
+
+def update_state(state, user_text: str) -> Dict[str, object]:
+    """Merge details from a user utterance into VoiceBotState; return new fields"""
+    # Issue keywords ("email", "laptop") also appear in contact details, so
+    # only look for an issue once contact details have been given
+    expect_issue = state.conversation_stage in ("understanding_issue", "confirming")
+    fields = extract_fields(user_text, expect_issue=expect_issue)
+    for key, value in fields.items():
+        state.collected_info[key] = value
+    state.last_user_text = user_text
+    state.last_turn_fields = fields
+    state.conversation_stage = derive_stage(state.collected_info, state.current_ticket is not None)
+    return fields
@@ -1,9 +1,17 @@
 import sqlite3
 import json
-from datetime import datetime
-from typing import Optional, Dict, Any
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 from pydantic import BaseModel
 
+from config import DATABASE_CONFIG
+from metrics import metrics
+from migrations import SCHEMA_MIGRATIONS_TABLE, apply_migrations
+from ticket_archive import TicketArchive, default_archive_dir
+
 class Ticket(BaseModel):
     id: Optional[int] = None
     name: str
@@ -14,10 +22,262 @@ class Ticket(BaseModel):
     price: float
     created_at: Optional[str] = None
 
-class TicketDatabase:
-    def __init__(self, db_path: str = "tickets.db"):
+# Ticket fields that can be updated; every change is written to ticket_audit
+AUDITED_FIELDS = ['name', 'email', 'phone', 'address', 'issue', 'price']
+
+# How ticket_rollups is computed; bump to rebuild it from the tickets on next open
+ROLLUP_VERSION = 1
+
+def validate_field(field: str, value: Any) -> Any:
+    """Check and normalize one ticket field; raise ValueError if it is invalid"""
+    if field == "price":
+        try:
+            price = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"price must be a number, got {value!r}")
+        if price <= 0:
+            raise ValueError("price must be positive")
+        return price
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"{field} is required")
+    value = value.strip()
+    if field == "email" and "@" not in value:
+        raise ValueError(f"invalid email {value!r}")
+    return value
+
+def validate_ticket_row(row: Dict[str, Any]) -> tuple:
+    """Validate an imported ticket; return (name, email, phone, address, issue, price, created_at)"""
+    if not isinstance(row, dict):
+        raise ValueError("row must be an object")
+    values = [validate_field(field, row.get(field)) for field in AUDITED_FIELDS]
+    created_at = row.get("created_at") or datetime.now().isoformat()
+    try:
+        datetime.fromisoformat(created_at)
+    except (TypeError, ValueError):
+        raise ValueError(f"created_at must be an ISO timestamp, got {created_at!r}")
+    return tuple(values) + (created_at,)
+
+def ticket_from_row(row: tuple) -> Ticket:
+    """Build a Ticket from an (id, name, email, phone, address, issue, price, created_at) row"""
+    return Ticket(
+        id=row[0],
+        name=row[1],
+        email=row[2],
+        phone=row[3],
+        address=row[4],
+        issue=row[5],
+        price=row[6],
+        created_at=row[7]
+    )
+
+class TicketStore(ABC):
+    """
+    Storage interface for tickets and their audit log, outbox, rollups and archive
+    
+    TicketDatabase stores everything in a local SQLite file;
+    PostgresTicketDatabase (postgres_database.py) in a PostgreSQL server
+    shared by several hosts. get_db() picks one from DATABASE_BACKEND.
+    Backend-independent logic (validation, archive merging, result
+    shaping) lives here.
+    """
+    backend: str
+    archive: TicketArchive
+    
+    @abstractmethod
+    def get_change_stamp(self) -> Tuple[int, str]:
+        """Return (version, updated_at) of the tickets table without reading ticket rows"""
+    
+    @abstractmethod
+    def create_ticket(self, ticket: Ticket, actor: str = "system", session_id: Optional[str] = None) -> int:
+        """Create a new ticket, its audit snapshot and confirmation message; return the ticket ID"""
+    
+    @abstractmethod
+    def get_ticket(self, ticket_id: int) -> Optional[Ticket]:
+        """Get a ticket by ID, from the hot table or the archive"""
+    
+    @abstractmethod
+    def update_ticket(self, ticket_id: int, updates: Dict[str, Any], actor: str = "system",
+                      session_id: Optional[str] = None) -> bool:
+        """Update a ticket, recording each changed field in the audit log"""
+    
+    @abstractmethod
+    def bulk_create_tickets(self, rows: Iterable[Dict[str, Any]], chunk_size: int = 1000,
+                            actor: str = "import", first_row: int = 0,
+                            max_errors: int = 1000) -> Dict[str, Any]:
+        """Insert many tickets in chunked transactions, reporting per-row errors"""
+    
+    @abstractmethod
+    def bulk_update_tickets(self, updates: Iterable[Dict[str, Any]], chunk_size: int = 1000,
+                            actor: str = "import", first_row: int = 0,
+                            max_errors: int = 1000) -> Dict[str, Any]:
+        """Apply many ticket updates in chunked transactions, reporting per-row errors"""
+    
+    @abstractmethod
+    def get_ticket_history(self, ticket_id: int) -> List[Dict[str, Any]]:
+        """Return the audit events of a ticket, oldest first"""
+    
+    @abstractmethod
+    def claim_outbox(self, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        """Claim up to `limit` due outbox messages for `lease_seconds`"""
+    
+    @abstractmethod
+    def complete_outbox(self, message_ids: List[int]):
+        """Mark delivered outbox messages as sent"""
+    
+    @abstractmethod
+    def fail_outbox(self, message_id: int, error: str, retry_at: Optional[float]):
+        """Schedule a failed message for retry, or dead-letter it when retry_at is None"""
+    
+    @abstractmethod
+    def get_outbox_stats(self) -> Dict[str, int]:
+        """Return the number of outbox messages per status"""
+    
+    @abstractmethod
+    def get_all_tickets(self, include_archived: bool = False) -> list[Ticket]:
+        """Get all tickets, newest first (archived ones too if include_archived)"""
+    
+    @abstractmethod
+    def get_analytics(self, start_day: Optional[str] = None, end_day: Optional[str] = None) -> Dict[str, Any]:
+        """Ticket volume and revenue per issue per day, from the rollup table"""
+    
+    @abstractmethod
+    def archive_tickets(self, older_than_days: int) -> Dict[str, int]:
+        """Move tickets created more than `older_than_days` ago into monthly archive partitions"""
+    
+    def close(self):
+        """Release pooled connections (SQLite opens one per call, so there is nothing to release)"""
+    
+    def get_ticket_as_of(self, ticket_id: int, timestamp: str) -> Optional[Dict[str, Any]]:
+        """Reconstruct a ticket's fields as they were at an ISO timestamp"""
+        state = None
+        for event in self.get_ticket_history(ticket_id):
+            if event["changed_at"] > timestamp:
+                break
+            if event["field"] == "created":
+                state = dict(event["new_value"])
+            elif state is not None:
+                state[event["field"]] = event["new_value"]
+        return state
+    
+    def _with_archived(self, rows: List[tuple]) -> List[tuple]:
+        """Merge archived ticket rows into hot rows, newest first"""
+        hot_ids = {row[0] for row in rows}
+        for month in self.archive.months():
+            rows.extend(row for row in self.archive.rows(month) if row[0] not in hot_ids)
+        rows.sort(key=lambda row: row[7], reverse=True)
+        return rows
+    
+    def _archived_rollups(self, archived: Dict[int, str]) -> Dict[Tuple[str, str], List[float]]:
+        """Ticket count and revenue per (day, issue) of the archived tickets
+
+        `archived` maps ticket id to month from archive_index. Partition rows
+        missing from it belong to an interrupted archive run and are still
+        counted from the hot table.
+        """
+        totals: Dict[Tuple[str, str], List[float]] = {}
+        for month in self.archive.months():
+            for row in self.archive.rows(month):
+                if archived.get(row[0]) != month:
+                    continue
+                total = totals.setdefault((row[7][:10], row[5]), [0, 0.0])
+                total[0] += 1
+                total[1] += row[6]
+        return totals
+    
+    @staticmethod
+    def _validate_creates(chunk: List[Any], index: int, fail) -> List[tuple]:
+        """Validate a chunk of new tickets starting at row `index`; report invalid rows to `fail`"""
+        values = []
+        for row in chunk:
+            try:
+                values.append(validate_ticket_row(row))
+            except ValueError as e:
+                fail(index, str(e))
+            index += 1
+        return values
+    
+    @staticmethod
+    def _validate_updates(chunk: List[Any], index: int, fail) -> List[Tuple[int, int, Dict[str, Any]]]:
+        """Validate a chunk of updates starting at row `index`; return (row, ticket_id, fields)"""
+        valid = []
+        for row in chunk:
+            try:
+                if not isinstance(row, dict):
+                    raise ValueError("row must be an object")
+                ticket_id = int(row["id"])
+                unknown = [field for field in row if field != "id" and field not in AUDITED_FIELDS]
+                if unknown:
+                    raise ValueError(f"unknown fields: {', '.join(unknown)}")
+                fields = {field: validate_field(field, value)
+                          for field, value in row.items() if field != "id"}
+                if not fields:
+                    raise ValueError("no fields to update")
+                valid.append((index, ticket_id, fields))
+            except (KeyError, TypeError, ValueError) as e:
+                fail(index, str(e) if not isinstance(e, KeyError) else "id is required")
+            index += 1
+        return valid
+    
+    @staticmethod
+    def _plan_updates(valid: List[Tuple[int, int, Dict[str, Any]]], current: Dict[int, Dict[str, Any]],
+                      actor: str, fail) -> Tuple[Dict[Tuple[str, ...], list], list, int]:
+        """
+        Turn validated updates into UPDATE parameter groups and audit rows
+        
+        `current` maps ticket ID to its current fields. Rows are grouped by
+        the fields they set, so each group is one executemany. Returns
+        (groups, audit rows, number of rows updated).
+        """
+        groups: Dict[Tuple[str, ...], list] = {}
+        audit = []
+        updated = 0
+        changed_at = datetime.now().isoformat()
+        for row_index, ticket_id, fields in valid:
+            if ticket_id not in current:
+                fail(row_index, f"ticket {ticket_id} not found")
+                continue
+            names = tuple(sorted(fields))
+            groups.setdefault(names, []).append([fields[name] for name in names] + [ticket_id])
+            for name in names:
+                old = current[ticket_id][name]
+                if old != fields[name]:
+                    audit.append((ticket_id, name, json.dumps(old), json.dumps(fields[name]),
+                                  actor, changed_at))
+                    current[ticket_id][name] = fields[name]
+            updated += 1
+        return groups, audit, updated
+    
+    @staticmethod
+    def _analytics_result(rows: List[tuple]) -> Dict[str, Any]:
+        """Shape (day, issue, tickets, revenue) rollup rows into the analytics response"""
+        totals: Dict[str, Dict[str, float]] = {}
+        for _, issue, tickets, revenue in rows:
+            total = totals.setdefault(issue, {"tickets": 0, "revenue": 0.0})
+            total["tickets"] += tickets
+            total["revenue"] += revenue
+        
+        return {
+            "days": [
+                {"day": day, "issue": issue, "tickets": tickets, "revenue": round(revenue, 2)}
+                for day, issue, tickets, revenue in rows
+            ],
+            "by_issue": {issue: {"tickets": t["tickets"], "revenue": round(t["revenue"], 2)}
+                         for issue, t in totals.items()},
+            "tickets": sum(t["tickets"] for t in totals.values()),
+            "revenue": round(sum(t["revenue"] for t in totals.values()), 2),
+        }
+
+class TicketDatabase(TicketStore):
+    """SQLite ticket storage in a single local file"""
+    backend = "sqlite"
+    
+    def __init__(self, db_path: str = "tickets.db", archive_dir: Optional[str] = None, migrate: bool = True):
         self.db_path = db_path
+        # Old tickets live in monthly partitions next to the database by default
+        self.archive = TicketArchive(archive_dir or default_archive_dir(db_path))
         self.init_database()
+        if migrate:
+            apply_migrations(self)
     
     def init_database(self):
         """Initialize the database with tickets table"""
@@ -37,15 +297,197 @@ class TicketDatabase:
             )
         ''')
         
+        # Change counter used for conditional GETs on the ticket endpoints;
+        # bumped by triggers so every writer (including other processes)
+        # invalidates cached responses without extra application code.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS table_changes (
+                table_name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            INSERT OR IGNORE INTO table_changes (table_name, version, updated_at)
+            VALUES ('tickets', 0, ?)
+        ''', (datetime.now(timezone.utc).isoformat(),))
+        
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS tickets_{event.lower()}_version
+                AFTER {event} ON tickets
+                BEGIN
+                    UPDATE table_changes
+                    SET version = version + 1,
+                        updated_at = strftime('%Y-%m-%dT%H:%M:%f', 'now')
+                    WHERE table_name = 'tickets';
+                END
+            ''')
+        
+        # Append-only change history, written in the same transaction as
+        # the ticket change it describes
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ticket_audit (
+                id INTEGER PRIMARY KEY,
+                ticket_id INTEGER NOT NULL,
+                field TEXT NOT NULL,
+                old_value TEXT,
+                new_value TEXT,
+                actor TEXT NOT NULL,
+                session_id TEXT,
+                changed_at TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_ticket_audit_ticket ON ticket_audit(ticket_id, id)
+        ''')
+        
+        # Transactional outbox: notifications are queued in the same
+        # transaction as the ticket and delivered by notifications.py
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY,
+                topic TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                created_at TEXT NOT NULL,
+                sent_at TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at)
+        ''')
+        
+        # Which archive partition (month) holds each archived ticket
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive_index (
+                ticket_id INTEGER PRIMARY KEY,
+                month TEXT NOT NULL
+            )
+        ''')
+        
+        # Daily volume and revenue per issue, maintained by triggers on every
+        # ticket write. Archiving removes hot rows but not their rollups.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ticket_rollups (
+                day TEXT NOT NULL,
+                issue TEXT NOT NULL,
+                tickets INTEGER NOT NULL,
+                revenue REAL NOT NULL,
+                PRIMARY KEY (day, issue)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS tickets_insert_rollup
+            AFTER INSERT ON tickets
+            BEGIN
+                INSERT INTO ticket_rollups (day, issue, tickets, revenue)
+                VALUES (substr(NEW.created_at, 1, 10), NEW.issue, 1, NEW.price)
+                ON CONFLICT (day, issue) DO UPDATE SET
+                    tickets = tickets + 1,
+                    revenue = revenue + excluded.revenue;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS tickets_update_rollup
+            AFTER UPDATE OF issue, price ON tickets
+            WHEN OLD.issue IS NOT NEW.issue OR OLD.price IS NOT NEW.price
+            BEGIN
+                UPDATE ticket_rollups SET tickets = tickets - 1, revenue = revenue - OLD.price
+                WHERE day = substr(OLD.created_at, 1, 10) AND issue = OLD.issue;
+                INSERT INTO ticket_rollups (day, issue, tickets, revenue)
+                VALUES (substr(NEW.created_at, 1, 10), NEW.issue, 1, NEW.price)
+                ON CONFLICT (day, issue) DO UPDATE SET
+                    tickets = tickets + 1,
+                    revenue = revenue + excluded.revenue;
+            END
+        ''')
+        
+        # Which ROLLUP_VERSION built ticket_rollups
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                table_name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                built_at TEXT NOT NULL
+            )
+        ''')
+        cursor.execute("SELECT version FROM rollup_state WHERE table_name = 'ticket_rollups'")
+        row = cursor.fetchone()
+        if row is None or row[0] < ROLLUP_VERSION:
+            self._backfill_rollups(cursor)
+        
+        # Schema changes after this baseline are migrations (migrations.py)
+        cursor.execute(SCHEMA_MIGRATIONS_TABLE)
+        
+        conn.commit()
+        conn.close()
+    
+    def _backfill_rollups(self, cursor):
+        """Rebuild ticket_rollups from the hot and archived tickets and record ROLLUP_VERSION
+
+        Runs in the caller's write transaction (init_database holds the
+        write lock from its first insert), so ticket writes cannot interleave.
+        """
+        cursor.execute("SELECT ticket_id, month FROM archive_index")
+        totals = self._archived_rollups(dict(cursor.fetchall()))
+        cursor.execute('''
+            SELECT substr(created_at, 1, 10), issue, COUNT(*), SUM(price) FROM tickets
+            WHERE id NOT IN (SELECT ticket_id FROM archive_index)
+            GROUP BY 1, 2
+        ''')
+        for day, issue, count, revenue in cursor.fetchall():
+            total = totals.setdefault((day, issue), [0, 0.0])
+            total[0] += count
+            total[1] += revenue
+        cursor.execute("DELETE FROM ticket_rollups")
+        cursor.executemany(
+            "INSERT INTO ticket_rollups (day, issue, tickets, revenue) VALUES (?, ?, ?, ?)",
+            [(day, issue, count, revenue) for (day, issue), (count, revenue) in totals.items()],
+        )
+        cursor.execute('''
+            INSERT OR REPLACE INTO rollup_state (table_name, version, built_at)
+            VALUES ('ticket_rollups', ?, ?)
+        ''', (ROLLUP_VERSION, datetime.now(timezone.utc).isoformat()))
+    
+    def _begin_write(self, cursor) -> float:
+        """Start a write transaction; return the seconds spent waiting for the write lock"""
+        start = time.perf_counter()
+        cursor.execute("BEGIN IMMEDIATE")
+        return time.perf_counter() - start
+    
+    def _commit_write(self, conn, waited: float):
+        """Commit a write transaction, recording how long the writer was held up"""
+        start = time.perf_counter()
         conn.commit()
+        # Commit waits for readers (e.g. an online backup step) to release the database
+        metrics.observe("database.writer_wait_seconds", waited + time.perf_counter() - start)
+    
+    def get_change_stamp(self) -> Tuple[int, str]:
+        """Return (version, updated_at) of the tickets table without reading ticket rows"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT version, updated_at FROM table_changes WHERE table_name = 'tickets'
+        ''')
+        
+        row = cursor.fetchone()
         conn.close()
+        
+        if row:
+            return row[0], row[1]
+        return 0, ""
     
-    def create_ticket(self, ticket: Ticket) -> int:
+    def create_ticket(self, ticket: Ticket, actor: str = "system", session_id: Optional[str] = None) -> int:
         """Create a new ticket and return the ticket ID"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         created_at = datetime.now().isoformat()
+        waited = self._begin_write(cursor)
         
         cursor.execute('''
             INSERT INTO tickets (name, email, phone, address, issue, price, created_at)
@@ -54,7 +496,16 @@ class TicketDatabase:
               ticket.issue, ticket.price, created_at))
         
         ticket_id = cursor.lastrowid
-        conn.commit()
+        snapshot = {field: getattr(ticket, field) for field in AUDITED_FIELDS}
+        cursor.execute('''
+            INSERT INTO ticket_audit (ticket_id, field, old_value, new_value, actor, session_id, changed_at)
+            VALUES (?, 'created', NULL, ?, ?, ?, ?)
+        ''', (ticket_id, json.dumps(snapshot), actor, session_id, created_at))
+        cursor.execute('''
+            INSERT INTO outbox (topic, payload, next_attempt_at, created_at)
+            VALUES ('ticket_confirmation', ?, ?, ?)
+        ''', (json.dumps({"ticket_id": ticket_id, **snapshot}), time.time(), created_at))
+        self._commit_write(conn, waited)
         conn.close()
         
         return ticket_id
@@ -70,52 +521,254 @@ class TicketDatabase:
         ''', (ticket_id,))
         
         row = cursor.fetchone()
+        if row is None:
+            # Not in the hot table; look it up in its archive partition
+            cursor.execute("SELECT month FROM archive_index WHERE ticket_id = ?", (ticket_id,))
+            archived = cursor.fetchone()
+            if archived:
+                row = self.archive.get(archived[0], ticket_id)
         conn.close()
         
         if row:
-            return Ticket(
-                id=row[0],
-                name=row[1],
-                email=row[2],
-                phone=row[3],
-                address=row[4],
-                issue=row[5],
-                price=row[6],
-                created_at=row[7]
-            )
+            return ticket_from_row(row)
         return None
     
-    def update_ticket(self, ticket_id: int, updates: Dict[str, Any]) -> bool:
-        """Update a ticket with new information"""
+    def update_ticket(self, ticket_id: int, updates: Dict[str, Any], actor: str = "system",
+                      session_id: Optional[str] = None) -> bool:
+        """Update a ticket with new information, recording each changed field in the audit log"""
+        fields = [field for field in updates if field in AUDITED_FIELDS]
+        if not fields:
+            return False
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        # Build dynamic update query
-        set_clauses = []
-        values = []
-        
-        for field, value in updates.items():
-            if field in ['name', 'email', 'phone', 'address', 'issue', 'price']:
-                set_clauses.append(f"{field} = ?")
-                values.append(value)
-        
-        if not set_clauses:
+        # Read old values and write the update and its audit rows in one transaction
+        waited = self._begin_write(cursor)
+        cursor.execute(f"SELECT {', '.join(fields)} FROM tickets WHERE id = ?", (ticket_id,))
+        row = cursor.fetchone()
+        if row is None:
+            conn.rollback()
             conn.close()
             return False
         
-        values.append(ticket_id)
-        query = f"UPDATE tickets SET {', '.join(set_clauses)} WHERE id = ?"
+        set_clauses = [f"{field} = ?" for field in fields]
+        values = [updates[field] for field in fields] + [ticket_id]
+        cursor.execute(f"UPDATE tickets SET {', '.join(set_clauses)} WHERE id = ?", values)
+        
+        changed_at = datetime.now().isoformat()
+        cursor.executemany('''
+            INSERT INTO ticket_audit (ticket_id, field, old_value, new_value, actor, session_id, changed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (ticket_id, field, json.dumps(old), json.dumps(updates[field]), actor, session_id, changed_at)
+            for field, old in zip(fields, row) if old != updates[field]
+        ])
+        
+        self._commit_write(conn, waited)
+        conn.close()
+        
+        return True
+    
+    def bulk_create_tickets(self, rows: Iterable[Dict[str, Any]], chunk_size: int = 1000,
+                            actor: str = "import", first_row: int = 0,
+                            max_errors: int = 1000) -> Dict[str, Any]:
+        """
+        Insert many tickets, `chunk_size` rows per transaction
+        
+        `rows` can be any iterable (e.g. a generator over a CSV file); only
+        one chunk is held in memory. Invalid rows are skipped and reported
+        as {"row": index, "error": message} (the first `max_errors` of
+        them); created IDs are reported as [first, last] ranges, one per
+        chunk. Rows may carry their original `created_at`. Imported
+        tickets are audited but do not send confirmation emails.
+        """
+        result: Dict[str, Any] = {"created": 0, "failed": 0, "errors": [], "id_ranges": []}
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        iterator = iter(rows)
+        index = first_row
+        
+        def fail(row_index: int, error: str):
+            result["failed"] += 1
+            if len(result["errors"]) < max_errors:
+                result["errors"].append({"row": row_index, "error": error})
         
-        cursor.execute(query, values)
-        success = cursor.rowcount > 0
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            values = self._validate_creates(chunk, index, fail)
+            index += len(chunk)
+            if not values:
+                continue
+            
+            waited = self._begin_write(cursor)
+            cursor.executemany('''
+                INSERT INTO tickets (name, email, phone, address, issue, price, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', values)
+            # One writer at a time, so the chunk's IDs are consecutive
+            last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+            ids = range(last_id - len(values) + 1, last_id + 1)
+            cursor.executemany('''
+                INSERT INTO ticket_audit (ticket_id, field, old_value, new_value, actor, session_id, changed_at)
+                VALUES (?, 'created', NULL, ?, ?, NULL, ?)
+            ''', [
+                (ticket_id, json.dumps(dict(zip(AUDITED_FIELDS, row[:6]))), actor, row[6])
+                for ticket_id, row in zip(ids, values)
+            ])
+            self._commit_write(conn, waited)
+            
+            result["created"] += len(values)
+            result["id_ranges"].append([ids[0], ids[-1]])
+        
+        conn.close()
+        return result
+    
+    def bulk_update_tickets(self, updates: Iterable[Dict[str, Any]], chunk_size: int = 1000,
+                            actor: str = "import", first_row: int = 0,
+                            max_errors: int = 1000) -> Dict[str, Any]:
+        """
+        Apply many ticket updates ({"id": ..., field: value, ...}), `chunk_size` per transaction
+        
+        Like update_ticket, every changed field is written to the audit
+        log. Rows with an unknown ID or invalid fields are reported as
+        {"row": index, "error": message} and skipped.
+        """
+        result: Dict[str, Any] = {"updated": 0, "failed": 0, "errors": []}
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        iterator = iter(updates)
+        index = first_row
+        
+        def fail(row_index: int, error: str):
+            result["failed"] += 1
+            if len(result["errors"]) < max_errors:
+                result["errors"].append({"row": row_index, "error": error})
+        
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            valid = self._validate_updates(chunk, index, fail)
+            index += len(chunk)
+            if not valid:
+                continue
+            
+            waited = self._begin_write(cursor)
+            ids = list({ticket_id for _, ticket_id, _ in valid})
+            current = {}
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                cursor.execute(f'''
+                    SELECT id, {', '.join(AUDITED_FIELDS)} FROM tickets
+                    WHERE id IN ({', '.join('?' * len(batch))})
+                ''', batch)
+                current.update({row[0]: dict(zip(AUDITED_FIELDS, row[1:])) for row in cursor.fetchall()})
+            
+            groups, audit, updated = self._plan_updates(valid, current, actor, fail)
+            result["updated"] += updated
+            for names, params in groups.items():
+                cursor.executemany(
+                    f"UPDATE tickets SET {', '.join(f'{name} = ?' for name in names)} WHERE id = ?", params)
+            cursor.executemany('''
+                INSERT INTO ticket_audit (ticket_id, field, old_value, new_value, actor, session_id, changed_at)
+                VALUES (?, ?, ?, ?, ?, NULL, ?)
+            ''', audit)
+            self._commit_write(conn, waited)
+        
+        conn.close()
+        result["errors"].sort(key=lambda error: error["row"])
+        return result
+    
+    def get_ticket_history(self, ticket_id: int) -> List[Dict[str, Any]]:
+        """Return the audit events of a ticket, oldest first"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT id, field, old_value, new_value, actor, session_id, changed_at
+            FROM ticket_audit WHERE ticket_id = ? ORDER BY id
+        ''', (ticket_id,))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [
+            {
+                "id": row[0],
+                "field": row[1],
+                "old_value": json.loads(row[2]) if row[2] is not None else None,
+                "new_value": json.loads(row[3]) if row[3] is not None else None,
+                "actor": row[4],
+                "session_id": row[5],
+                "changed_at": row[6],
+            } for row in rows
+        ]
+    
+    def claim_outbox(self, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        """
+        Claim up to `limit` due outbox messages for delivery
+        
+        Claimed messages are hidden from other workers for `lease_seconds`;
+        if the worker dies before completing them they become due again.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        now = time.time()
+        
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute('''
+            SELECT id, topic, payload, attempts FROM outbox
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY id LIMIT ?
+        ''', (now, limit))
+        rows = cursor.fetchall()
+        cursor.executemany('''
+            UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ? WHERE id = ?
+        ''', [(now + lease_seconds, row[0]) for row in rows])
         
         conn.commit()
         conn.close()
         
-        return success
+        return [
+            {"id": row[0], "topic": row[1], "payload": json.loads(row[2]), "attempts": row[3] + 1}
+            for row in rows
+        ]
+    
+    def complete_outbox(self, message_ids: List[int]):
+        """Mark delivered outbox messages as sent"""
+        conn = sqlite3.connect(self.db_path)
+        sent_at = datetime.now().isoformat()
+        conn.executemany(
+            "UPDATE outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+            [(sent_at, message_id) for message_id in message_ids],
+        )
+        conn.commit()
+        conn.close()
+    
+    def fail_outbox(self, message_id: int, error: str, retry_at: Optional[float]):
+        """Schedule a failed message for retry, or dead-letter it when retry_at is None"""
+        conn = sqlite3.connect(self.db_path)
+        if retry_at is None:
+            conn.execute("UPDATE outbox SET status = 'dead', last_error = ? WHERE id = ?",
+                         (error, message_id))
+        else:
+            conn.execute("UPDATE outbox SET next_attempt_at = ?, last_error = ? WHERE id = ?",
+                         (retry_at, error, message_id))
+        conn.commit()
+        conn.close()
     
-    def get_all_tickets(self) -> list[Ticket]:
-        """Get all tickets"""
+    def get_outbox_stats(self) -> Dict[str, int]:
+        """Return the number of outbox messages per status"""
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        conn.close()
+        return {status: count for status, count in rows}
+    
+    def get_all_tickets(self, include_archived: bool = False) -> list[Ticket]:
+        """Get all tickets, newest first (archived ones too if include_archived)"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
@@ -127,18 +780,94 @@ class TicketDatabase:
         rows = cursor.fetchall()
         conn.close()
         
-        return [
-            Ticket(
-                id=row[0],
-                name=row[1],
-                email=row[2],
-                phone=row[3],
-                address=row[4],
-                issue=row[5],
-                price=row[6],
-                created_at=row[7]
-            ) for row in rows
-        ]
+        if include_archived:
+            rows = self._with_archived(rows)
+        
+        return [ticket_from_row(row) for row in rows]
+    
+    def get_analytics(self, start_day: Optional[str] = None, end_day: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Ticket volume and revenue per issue per day, from the rollup table
+        
+        Cost depends on the number of days and issues in range, not on the
+        number of tickets. Days are ISO dates (YYYY-MM-DD), inclusive.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT day, issue, tickets, revenue FROM ticket_rollups
+            WHERE day >= ? AND day <= ? AND tickets > 0
+            ORDER BY day, issue
+        ''', (start_day or "", end_day or "9999-12-31"))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return self._analytics_result(rows)
+    
+    def archive_tickets(self, older_than_days: int) -> Dict[str, int]:
+        """
+        Move tickets created more than `older_than_days` ago into monthly archive partitions
+        
+        Each month is written to its partition before its rows are removed
+        from the hot table, so an interrupted run never loses tickets.
+        Returns the number of tickets archived per month.
+        """
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat()
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT DISTINCT substr(created_at, 1, 7) FROM tickets WHERE created_at < ?
+        ''', (cutoff,))
+        months = [row[0] for row in cursor.fetchall()]
+        
+        archived: Dict[str, int] = {}
+        for month in months:
+            cursor.execute('''
+                SELECT id, name, email, phone, address, issue, price, created_at
+                FROM tickets WHERE created_at < ? AND substr(created_at, 1, 7) = ?
+            ''', (cutoff, month))
+            rows = cursor.fetchall()
+            self.archive.write(month, rows)
+            
+            # Only remove rows that were not changed while the partition was written
+            cursor.execute("BEGIN IMMEDIATE")
+            removed = 0
+            for row in rows:
+                cursor.execute('''
+                    DELETE FROM tickets WHERE id = ? AND name = ? AND email = ? AND phone = ?
+                    AND address = ? AND issue = ? AND price = ? AND created_at = ?
+                ''', row)
+                if cursor.rowcount:
+                    removed += 1
+                    cursor.execute("INSERT OR REPLACE INTO archive_index (ticket_id, month) VALUES (?, ?)",
+                                   (row[0], month))
+            conn.commit()
+            archived[month] = removed
+        
+        conn.close()
+        return archived
+
+# Global database instance, created on first use so importing this module
+# does not touch the database
+_db: Optional[TicketStore] = None
+
+def open_db(migrate: Optional[bool] = None) -> TicketStore:
+    """Open a new store for DATABASE_BACKEND, applying pending migrations unless disabled"""
+    backend = DATABASE_CONFIG["backend"]
+    migrate = DATABASE_CONFIG["auto_migrate"] if migrate is None else migrate
+    if backend == "sqlite":
+        return TicketDatabase(DATABASE_CONFIG["path"], DATABASE_CONFIG["archive_dir"], migrate=migrate)
+    if backend == "postgres":
+        from postgres_database import PostgresTicketDatabase
+        return PostgresTicketDatabase(DATABASE_CONFIG["url"], DATABASE_CONFIG["archive_dir"], migrate=migrate)
+    raise ValueError(f"Unknown database backend '{backend}' (available: postgres, sqlite)")
 
-# Global database instance
-db = TicketDatabase()
+def get_db() -> TicketStore:
+    """Return the shared database instance, initializing it on first call"""
+    global _db
+    if _db is None:
+        _db = open_db()
+    return _db
@@ -0,0 +1,67 @@
+"""
+Adaptive Endpointing
+
+This module switches VAD silence and end-of-turn delays according to the
+conversation stage, so the bot answers a "yes" quickly but waits through
+the pauses of someone dictating an address. Every end-of-turn delay is
+logged with its stage and profile so the profiles can be tuned from data.
+"""
+
+import logging
+from typing import Optional
+
+from config import ENDPOINTING_CONFIG
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class EndpointingController:
+    """Applies the endpointing profile for a stage to one session"""
+
+    def __init__(self, session, vad=None):
+        self.session = session
+        self.vad = vad
+        self.stage: Optional[str] = None
+        self.profile: Optional[dict] = None
+
+    def apply(self, stage: str):
+        """Switch to the stage's profile if it differs from the current one"""
+        if not ENDPOINTING_CONFIG["enabled"]:
+            return
+        profile = ENDPOINTING_CONFIG["profiles"].get(stage)
+        if profile is None or profile == self.profile:
+            self.stage = stage
+            return
+
+        try:
+            self.session.update_options(
+                min_endpointing_delay=profile["min_delay"],
+                max_endpointing_delay=profile["max_delay"],
+            )
+            if self.vad is not None:
+                self.vad.update_options(min_silence_duration=profile["min_silence"])
+        except (AttributeError, TypeError) as e:
+            logger.warning(f"Could not update endpointing options: {e}")
+            return
+
+        self.stage = stage
+        self.profile = profile
+        metrics.increment(f"endpointing.switches.{stage}")
+        logger.info(f"⏱️  Endpointing profile '{stage}': silence {profile['min_silence']}s, "
+                    f"delay {profile['min_delay']}-{profile['max_delay']}s")
+
+    def on_metrics(self, event):
+        """Log end-of-utterance delays (EOUMetrics) per stage for tuning"""
+        eou = event.metrics
+        if getattr(eou, "type", None) != "eou_metrics":
+            return
+        stage = self.stage or "unknown"
+        metrics.observe(f"endpointing.{stage}.eou_delay", eou.end_of_utterance_delay)
+        metrics.observe(f"endpointing.{stage}.transcription_delay", eou.transcription_delay)
+        profile = self.profile or {}
+        logger.info(
+            "eou_delay stage=%s delay=%.3f transcription_delay=%.3f min_silence=%s min_delay=%s max_delay=%s",
+            stage, eou.end_of_utterance_delay, eou.transcription_delay,
+            profile.get("min_silence"), profile.get("min_delay"), profile.get("max_delay"),
+        )
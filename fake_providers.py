@@ -0,0 +1,293 @@
+"""
+Offline Stand-in Providers
+
+This module contains deterministic local replacements for the OpenAI
+STT, LLM and TTS components. They follow a scripted help desk call
+(including a create_ticket_tool call), simulate configurable latency and
+produce synthetic audio, so many concurrent sessions can be run without
+a network connection or API key.
+
+Select them with STT_PROVIDER=fake, LLM_PROVIDER=fake and TTS_PROVIDER=fake.
+"""
+
+import array
+import asyncio
+import itertools
+import json
+import logging
+import math
+import random
+import re
+import uuid
+from typing import Optional
+
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectionError,
+    APIConnectOptions,
+    llm,
+    stt,
+    tts,
+)
+
+from config import FAKE_PROVIDER_CONFIG
+from context_manager import estimate_tokens, message_text
+
+logger = logging.getLogger(__name__)
+
+# Scripted caller utterances and the assistant turn that answers each of them.
+# llm_turns[0] is the greeting (no user message yet); llm_turns[i] answers
+# transcripts[i - 1].
+DEFAULT_SCRIPT = {
+    "transcripts": [
+        "Hi, my name is Jane Doe and my email is jane.doe@example.com",
+        "My phone number is 555-123-4567 and I live at 42 Main Street, Springfield",
+        "My Wi-Fi is not working",
+        "Yes, please create a ticket",
+        "Yes, that's correct",
+    ],
+    "llm_turns": [
+        {"say": "Welcome to IT Help Desk. May I have your full name and email address?"},
+        {"say": "Thanks, Jane. What's your phone number and complete address?"},
+        {"say": "Got it. What IT issue are you experiencing today?"},
+        {"say": "That's one of our supported issues. The service fee is $20. Should I create a ticket?"},
+        {"say": "Let me confirm: Name Jane Doe, Email jane.doe@example.com, Phone 555-123-4567, "
+                "Address 42 Main Street, Springfield, Issue Wi-Fi not working, Price $20. Is this correct?"},
+        {"tool": "create_ticket_tool", "arguments": {
+            "name": "Jane Doe",
+            "email": "jane.doe@example.com",
+            "phone": "555-123-4567",
+            "address": "42 Main Street, Springfield",
+            "issue": "Wi-Fi not working",
+            "price": 20.0,
+        }},
+    ],
+    "tool_followup": "Ticket created. Your confirmation number is {ticket_id}. "
+                     "You'll get a confirmation at your email. Thank you!",
+    "fallback": "Is there anything else I can help you with?",
+}
+
+# Each provider instance gets its own seed so concurrent sessions differ but
+# every run with the same FAKE_SEED is reproducible
+_instance_counter = itertools.count()
+
+
+def load_script(path: Optional[str] = None) -> dict:
+    """Load a conversation script from JSON, falling back to DEFAULT_SCRIPT"""
+    path = path or FAKE_PROVIDER_CONFIG["script_path"]
+    if not path:
+        return DEFAULT_SCRIPT
+    with open(path) as f:
+        script = json.load(f)
+    return {**DEFAULT_SCRIPT, **script}
+
+
+class LatencyModel:
+    """Deterministic latency and fault injection drawn from a seeded RNG"""
+
+    def __init__(self, seed: Optional[int] = None):
+        if seed is None:
+            seed = FAKE_PROVIDER_CONFIG["seed"] * 100003 + next(_instance_counter)
+        self.rng = random.Random(seed)
+        self.jitter = FAKE_PROVIDER_CONFIG["latency_jitter"]
+        self.error_rate = FAKE_PROVIDER_CONFIG["error_rate"]
+        self.stall_rate = FAKE_PROVIDER_CONFIG["stall_rate"]
+        self.stall_seconds = FAKE_PROVIDER_CONFIG["stall_seconds"]
+
+    async def inject_faults(self, label: str):
+        """Randomly stall and/or fail a request according to the configured rates"""
+        if self.stall_rate and self.rng.random() < self.stall_rate:
+            await asyncio.sleep(self.stall_seconds)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            raise APIConnectionError(f"injected {label} failure")
+
+    def sample(self, base: float) -> float:
+        if base <= 0:
+            return 0.0
+        return max(0.0, base * (1 + self.rng.uniform(-self.jitter, self.jitter)))
+
+    async def wait(self, base: float):
+        delay = self.sample(base)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class FakeSTT(stt.STT):
+    """Returns the script's caller transcripts in order, one per recognition"""
+
+    def __init__(self, *, script: Optional[dict] = None, latency: Optional[float] = None,
+                 seed: Optional[int] = None):
+        super().__init__(capabilities=stt.STTCapabilities(streaming=False, interim_results=False))
+        self._script = script or load_script()
+        self.latency = FAKE_PROVIDER_CONFIG["stt_latency"] if latency is None else latency
+        self.timing = LatencyModel(seed)
+        self._index = 0
+
+    def next_transcript(self) -> Optional[str]:
+        """Return the next scripted utterance, or None when the script is done"""
+        transcripts = self._script["transcripts"]
+        if self._index >= len(transcripts):
+            return None
+        text = transcripts[self._index]
+        self._index += 1
+        return text
+
+    async def _recognize_impl(self, buffer, *, language=None,
+                              conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> stt.SpeechEvent:
+        await self.timing.inject_faults("stt")
+        await self.timing.wait(self.latency)
+        text = self.next_transcript() or ""
+        return stt.SpeechEvent(
+            type=stt.SpeechEventType.FINAL_TRANSCRIPT,
+            alternatives=[stt.SpeechData(language="en", text=text)],
+        )
+
+
+class FakeLLM(llm.LLM):
+    """
+    Scripted LLM that answers by conversation position
+
+    The reply is chosen from the script's `llm_turns` by the number of
+    distinct user messages this instance has seen (so it stays in step when
+    old turns are compacted away); after a tool result it reads back the
+    ticket ID. Text is streamed word by word with first-token and per-token
+    latency, and usage is reported with estimated token counts.
+    """
+
+    def __init__(self, *, script: Optional[dict] = None, first_token_latency: Optional[float] = None,
+                 token_latency: Optional[float] = None, seed: Optional[int] = None):
+        super().__init__()
+        self._script = script or load_script()
+        self.first_token_latency = (FAKE_PROVIDER_CONFIG["llm_first_token_latency"]
+                                    if first_token_latency is None else first_token_latency)
+        self.token_latency = (FAKE_PROVIDER_CONFIG["llm_token_latency"]
+                              if token_latency is None else token_latency)
+        self.timing = LatencyModel(seed)
+        self._seen_user_messages = set()
+
+    @property
+    def model(self) -> str:
+        return "fake-llm"
+
+    def next_action(self, chat_ctx: llm.ChatContext) -> dict:
+        """Decide the scripted action ({"say": ...} or {"tool": ...}) for a chat context"""
+        items = list(chat_ctx.items)
+        if items and getattr(items[-1], "type", None) == "function_call_output":
+            match = re.search(r"\d+", items[-1].output or "")
+            ticket_id = match.group(0) if match else "unknown"
+            return {"say": self._script["tool_followup"].format(ticket_id=ticket_id)}
+
+        for item in items:
+            if getattr(item, "type", None) == "message" and item.role == "user":
+                self._seen_user_messages.add(item.id)
+        user_turns = len(self._seen_user_messages)
+        turns = self._script["llm_turns"]
+        if user_turns < len(turns):
+            return turns[user_turns]
+        return {"say": self._script["fallback"]}
+
+    def chat(self, *, chat_ctx: llm.ChatContext, tools=None,
+             conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS, **kwargs) -> "FakeLLMStream":
+        return FakeLLMStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class FakeLLMStream(llm.LLMStream):
+    """Streams one scripted action as chat chunks"""
+
+    async def _run(self) -> None:
+        fake_llm: FakeLLM = self._llm
+        action = fake_llm.next_action(self._chat_ctx)
+        request_id = f"fake-{uuid.uuid4().hex[:12]}"
+        prompt_tokens = sum(estimate_tokens(message_text(item)) for item in self._chat_ctx.items
+                            if getattr(item, "type", None) == "message")
+
+        await fake_llm.timing.inject_faults("llm")
+        await fake_llm.timing.wait(fake_llm.first_token_latency)
+
+        completion_tokens = 0
+        if "tool" in action:
+            arguments = json.dumps(action["arguments"])
+            completion_tokens = estimate_tokens(arguments)
+            self._event_ch.send_nowait(llm.ChatChunk(
+                id=request_id,
+                delta=llm.ChoiceDelta(role="assistant", tool_calls=[llm.FunctionToolCall(
+                    name=action["tool"],
+                    arguments=arguments,
+                    call_id=f"call_{uuid.uuid4().hex[:12]}",
+                )]),
+            ))
+        else:
+            for i, word in enumerate(action["say"].split(" ")):
+                if i:
+                    await fake_llm.timing.wait(fake_llm.token_latency)
+                token = word if i == 0 else " " + word
+                completion_tokens += 1
+                self._event_ch.send_nowait(llm.ChatChunk(
+                    id=request_id,
+                    delta=llm.ChoiceDelta(role="assistant", content=token),
+                ))
+
+        self._event_ch.send_nowait(llm.ChatChunk(
+            id=request_id,
+            usage=llm.CompletionUsage(
+                completion_tokens=completion_tokens,
+                prompt_tokens=prompt_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        ))
+
+
+# One second of a quiet 220 Hz tone per sample rate, sliced for synthetic speech
+_tone_cache = {}
+
+
+def synthetic_pcm(duration: float, sample_rate: int) -> bytes:
+    """Return 16-bit mono PCM of a quiet tone lasting `duration` seconds"""
+    if sample_rate not in _tone_cache:
+        samples = array.array("h", (int(3000 * math.sin(2 * math.pi * 220 * n / sample_rate))
+                                    for n in range(sample_rate)))
+        _tone_cache[sample_rate] = samples.tobytes()
+    second = _tone_cache[sample_rate]
+    total = int(duration * sample_rate) * 2
+    return (second * (total // len(second) + 1))[:total]
+
+
+class FakeTTS(tts.TTS):
+    """Synthesizes a tone whose length is proportional to the text length"""
+
+    def __init__(self, *, latency: Optional[float] = None, seed: Optional[int] = None):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=FAKE_PROVIDER_CONFIG["tts_sample_rate"],
+            num_channels=1,
+        )
+        self.latency = FAKE_PROVIDER_CONFIG["tts_latency"] if latency is None else latency
+        self.timing = LatencyModel(seed)
+
+    def audio_duration(self, text: str) -> float:
+        return max(0.2, len(text) / FAKE_PROVIDER_CONFIG["tts_chars_per_second"])
+
+    def synthesize(self, text: str, *,
+                   conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS) -> "FakeChunkedStream":
+        return FakeChunkedStream(tts=self, input_text=text, conn_options=conn_options)
+
+
+class FakeChunkedStream(tts.ChunkedStream):
+    """Emits synthetic PCM in 100 ms frames after the simulated latency"""
+
+    async def _run(self, output_emitter: tts.AudioEmitter) -> None:
+        fake_tts: FakeTTS = self._tts
+        await fake_tts.timing.inject_faults("tts")
+        await fake_tts.timing.wait(fake_tts.latency)
+
+        output_emitter.initialize(
+            request_id=f"fake-{uuid.uuid4().hex[:12]}",
+            sample_rate=fake_tts.sample_rate,
+            num_channels=1,
+            mime_type="audio/pcm",
+        )
+        pcm = synthetic_pcm(fake_tts.audio_duration(self._input_text), fake_tts.sample_rate)
+        frame_bytes = fake_tts.sample_rate // 10 * 2
+        for start in range(0, len(pcm), frame_bytes):
+            output_emitter.push(pcm[start:start + frame_bytes])
+        output_emitter.flush()
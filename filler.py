@@ -0,0 +1,239 @@
+"""
+Filler Audio
+
+This module masks backend latency with short acknowledgements ("Just a
+second.") played on a background audio track when a tool call or LLM
+response takes longer than a configurable threshold. Backend speed is
+unchanged; only dead air is removed.
+
+Phrases are rendered with the configured TTS voice once per host and
+stored as WAV files in FILLER_CONFIG["cache_dir"]. LiveKit job processes
+are single-use, so voice_bot.prewarm loads the files in every process;
+only phrases missing on disk are synthesized (by the first call that
+needs them), and `python filler.py` renders them all ahead of time.
+
+The player is a process-wide global: LiveKit runs one job per process,
+and code without a session (text sessions, load tests) sees an
+unattached player whose masking() is a no-op.
+
+Usage:
+    python filler.py    # pre-render all filler phrases with the configured TTS
+"""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+import wave
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from config import FILLER_CONFIG, PROVIDER_CONFIG
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# phrase -> rendered audio frames, loaded or rendered once per process
+_rendered: Dict[str, list] = {}
+
+# Length of the frames cached audio is split into when loaded
+FRAME_MS = 20
+
+
+def all_phrases() -> List[str]:
+    return [phrase for phrases in FILLER_CONFIG["phrases"].values() for phrase in phrases]
+
+
+def asset_path(phrase: str) -> str:
+    """Cache file for a phrase in the configured TTS voice"""
+    settings = PROVIDER_CONFIG["tts"]
+    key = json.dumps([settings.get("provider"), settings.get("model"), settings.get("voice"), phrase])
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(FILLER_CONFIG["cache_dir"], f"{digest}.wav")
+
+
+def save_frames(path: str, frames: list):
+    """Write 16-bit PCM frames to a WAV file, atomically"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with wave.open(tmp_path, "wb") as wav:
+        wav.setnchannels(frames[0].num_channels)
+        wav.setsampwidth(2)
+        wav.setframerate(frames[0].sample_rate)
+        for frame in frames:
+            wav.writeframes(bytes(frame.data))
+    os.replace(tmp_path, path)
+
+
+def load_frames(path: str) -> list:
+    """Read a WAV file back as FRAME_MS audio frames"""
+    from livekit import rtc
+
+    with wave.open(path, "rb") as wav:
+        channels, sample_rate = wav.getnchannels(), wav.getframerate()
+        pcm = wav.readframes(wav.getnframes())
+    samples = sample_rate * FRAME_MS // 1000
+    step = samples * channels * 2
+    frames = []
+    for start in range(0, len(pcm), step):
+        chunk = pcm[start:start + step]
+        frames.append(rtc.AudioFrame(chunk, sample_rate, channels, len(chunk) // (channels * 2)))
+    return frames
+
+
+def load_rendered() -> int:
+    """Load cached phrases into this process; return how many are available"""
+    for phrase in all_phrases():
+        path = asset_path(phrase)
+        if phrase in _rendered or not os.path.exists(path):
+            continue
+        try:
+            _rendered[phrase] = load_frames(path)
+        except (OSError, EOFError, wave.Error) as e:
+            logger.warning(f"Could not load filler audio {path}: {e}")
+    return len(_rendered)
+
+
+async def render_phrases(tts, phrases: List[str]) -> int:
+    """Synthesize phrases with a TTS, caching them on disk; return how many were rendered"""
+    start = time.perf_counter()
+    rendered = 0
+    for phrase in phrases:
+        try:
+            frames = []
+            async for audio in tts.synthesize(phrase):
+                frames.append(audio.frame)
+            _rendered[phrase] = frames
+            save_frames(asset_path(phrase), frames)
+            rendered += 1
+        except Exception as e:
+            logger.warning(f"Could not pre-render filler '{phrase}': {e}")
+    logger.info(f"🔈 Rendered {rendered} filler phrases in {time.perf_counter() - start:.2f}s")
+    return rendered
+
+
+class FillerPlayer:
+    """Plays pre-rendered filler phrases when masked operations run long"""
+
+    def __init__(self):
+        self.background = None
+        self.render_task: Optional[asyncio.Task] = None
+        self.turn_fillers = 0
+        self._phrases = {kind: itertools.cycle(phrases)
+                         for kind, phrases in FILLER_CONFIG["phrases"].items()}
+
+    @property
+    def active(self) -> bool:
+        return FILLER_CONFIG["enabled"] and self.background is not None
+
+    async def attach(self, room, session):
+        """Start the background audio track; render phrases missing from the cache"""
+        if not FILLER_CONFIG["enabled"]:
+            return
+        from livekit.agents import BackgroundAudioPlayer
+
+        self.background = BackgroundAudioPlayer()
+        await self.background.start(room=room, agent_session=session)
+
+        load_rendered()
+        missing = [phrase for phrase in all_phrases() if phrase not in _rendered]
+        if missing:
+            # Only until the cache is filled; later calls load from disk
+            self.render_task = asyncio.create_task(render_phrases(session.tts, missing))
+            self.render_task.add_done_callback(self._render_done)
+
+    def _render_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Filler rendering failed: {task.exception()}")
+
+    def new_turn(self):
+        self.turn_fillers = 0
+
+    def _next_phrase(self, kind: str) -> Optional[List]:
+        phrases = FILLER_CONFIG["phrases"].get(kind, [])
+        for _ in range(len(phrases)):
+            phrase = next(self._phrases[kind])
+            if phrase in _rendered:
+                return _rendered[phrase]
+        return None
+
+    async def _play_after(self, kind: str, threshold: float, played: dict):
+        await asyncio.sleep(threshold)
+        if self.turn_fillers >= FILLER_CONFIG["max_per_turn"]:
+            return
+        frames = self._next_phrase(kind)
+        if frames is None:
+            metrics.increment(f"filler.{kind}.not_ready")
+            return
+
+        async def frame_source():
+            for frame in frames:
+                yield frame
+
+        from livekit.agents import AudioConfig
+
+        self.turn_fillers += 1
+        played["at"] = time.perf_counter()
+        metrics.increment(f"filler.{kind}.played")
+        self.background.play(AudioConfig(frame_source(), volume=FILLER_CONFIG["volume"]))
+
+    @asynccontextmanager
+    async def masking(self, kind: str):
+        """
+        Mask the latency of the enclosed block
+
+        Yields a callable that ends masking early (e.g. when the first LLM
+        token arrives); otherwise masking ends with the block.
+        """
+        if not self.active:
+            yield lambda: None
+            return
+
+        threshold = FILLER_CONFIG["thresholds"][kind]
+        played: dict = {}
+        start = time.perf_counter()
+        timer = asyncio.create_task(self._play_after(kind, threshold, played))
+        finished = {"at": None}
+
+        def done():
+            if finished["at"] is None:
+                finished["at"] = time.perf_counter()
+                timer.cancel()
+
+        try:
+            yield done
+        finally:
+            done()
+            waited = finished["at"] - start
+            metrics.observe(f"filler.{kind}.wait_seconds", waited)
+            if "at" in played:
+                # Silence the caller would otherwise have heard past the threshold
+                metrics.observe(f"filler.{kind}.masked_seconds", finished["at"] - played["at"])
+
+
+# Process-wide player, attached to the session by voice_bot.entrypoint
+filler_player = FillerPlayer()
+
+
+async def render_assets() -> int:
+    """Render every phrase missing from the cache with the configured TTS"""
+    from providers import build_tts
+
+    load_rendered()
+    missing = [phrase for phrase in all_phrases() if phrase not in _rendered]
+    if not missing:
+        return 0
+    tts = build_tts()
+    try:
+        return await render_phrases(tts, missing)
+    finally:
+        await tts.aclose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    rendered = asyncio.run(render_assets())
+    print(f"{rendered} phrases rendered, {len(_rendered)} cached in {FILLER_CONFIG['cache_dir']}")
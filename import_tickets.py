@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Bulk Ticket Import
+
+Imports tickets from a CSV or JSON Lines file (e.g. an export of the old
+help desk) or applies bulk updates such as re-pricing, using the chunked
+TicketDatabase.bulk_* APIs. Files are streamed, so memory use does not
+grow with the number of rows.
+
+CSV columns / JSON keys: name, email, phone, address, issue, price and
+optionally created_at; updates need id plus the fields to change.
+
+Usage:
+    python import_tickets.py old_tickets.csv
+    python import_tickets.py reprice.jsonl --update
+"""
+
+import argparse
+import csv
+import json
+import sys
+from typing import Iterator
+
+from database import get_db
+
+
+def read_rows(path: str) -> Iterator[dict]:
+    """Stream rows from a .csv or .jsonl file"""
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(f):
+                # Empty CSV cells mean "not given"
+                yield {key: value for key, value in row.items() if value not in ("", None)}
+        else:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield None  # reported as an invalid row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import or update tickets")
+    parser.add_argument("path", help="CSV or JSON Lines file")
+    parser.add_argument("--update", action="store_true", help="Apply updates instead of creating tickets")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per transaction")
+    parser.add_argument("--actor", default="import", help="Actor recorded in the audit log")
+    args = parser.parse_args(argv)
+
+    db = get_db()
+    operation = db.bulk_update_tickets if args.update else db.bulk_create_tickets
+    result = operation(read_rows(args.path), chunk_size=args.chunk_size, actor=args.actor)
+
+    print(json.dumps(result, indent=2))
+    return 1 if result["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
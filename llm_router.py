@@ -0,0 +1,105 @@
+"""
+Stage-aware LLM Routing
+
+This module contains an LLM wrapper that sends each turn to either a
+low-latency model or a more capable one. Routine collection and
+confirmation turns (by VoiceBotState.conversation_stage) use the fast
+model; off-script questions, ambiguous turns and post-ticket corrections
+escalate to the capable model. Latency, tokens and cost are accounted
+per route and logged per call by call_summary.py.
+"""
+
+import logging
+import re
+
+from livekit.agents import DEFAULT_API_CONNECT_OPTIONS, APIConnectOptions, llm
+
+from config import LLM_PRICING, ROUTING_CONFIG
+from conversation import QUESTION_PATTERN
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CONFIRMATION_PATTERN = re.compile(
+    r"^\s*(yes|yeah|yep|sure|correct|right|ok|okay|no|nope|please|go ahead|that's right|that is correct)\b",
+    re.IGNORECASE,
+)
+
+
+def choose_route(state, chat_ctx: llm.ChatContext) -> str:
+    """Return "fast" or "capable" for the next generation"""
+    if ROUTING_CONFIG["force_route"]:
+        return ROUTING_CONFIG["force_route"]
+
+    items = chat_ctx.items
+    if items and getattr(items[-1], "type", None) == "function_call_output":
+        return "fast"  # reading back a tool result
+
+    if state.conversation_stage not in ROUTING_CONFIG["fast_stages"]:
+        return "capable"
+
+    text = state.last_user_text
+    if not text:
+        return "fast"  # greeting
+    if CONFIRMATION_PATTERN.match(text):
+        return "fast"
+    if QUESTION_PATTERN.search(text):
+        return "capable"  # off-script question
+    if not state.last_turn_fields and len(text.split()) >= ROUTING_CONFIG["ambiguous_min_words"]:
+        return "capable"  # long turn we could not make sense of
+    return "fast"
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD cost of one request according to LLM_PRICING (0 for unknown models)"""
+    input_price, output_price = LLM_PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+class RoutingLLM(llm.LLM):
+    """Delegates each chat request to the fast or capable LLM"""
+
+    def __init__(self, fast: llm.LLM, capable: llm.LLM, state=None):
+        super().__init__()
+        self._llms = {"fast": fast, "capable": capable}
+        self._state = state
+        for route, inner in self._llms.items():
+            inner.on("metrics_collected", self._metrics_handler(route, inner))
+
+    @property
+    def model(self) -> str:
+        return f"router({self._llms['fast'].model}|{self._llms['capable'].model})"
+
+    def _metrics_handler(self, route: str, inner: llm.LLM):
+        def on_metrics(llm_metrics):
+            prefix = f"llm.route.{route}"
+            metrics.observe(f"{prefix}.ttft", llm_metrics.ttft)
+            metrics.observe(f"{prefix}.duration", llm_metrics.duration)
+            metrics.increment(f"{prefix}.prompt_tokens", llm_metrics.prompt_tokens)
+            metrics.increment(f"{prefix}.completion_tokens", llm_metrics.completion_tokens)
+            metrics.increment(f"{prefix}.cost_usd", estimate_cost(
+                inner.model, llm_metrics.prompt_tokens, llm_metrics.completion_tokens))
+            # Re-emit so session-level metrics collection still sees every request
+            self.emit("metrics_collected", llm_metrics)
+        return on_metrics
+
+    def chat(self, *, chat_ctx: llm.ChatContext, tools=None,
+             conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS, **kwargs) -> llm.LLMStream:
+        state = self._state
+        # Without a session's state there is nothing to route on; play safe
+        route = choose_route(state, chat_ctx) if state is not None else "capable"
+        metrics.increment(f"llm.route.{route}.requests")
+        logger.info(f"🔀 Routing {getattr(state, 'conversation_stage', 'unknown')} turn to {route} model "
+                    f"({self._llms[route].model})")
+        return self._llms[route].chat(chat_ctx=chat_ctx, tools=tools,
+                                      conn_options=conn_options, **kwargs)
+
+    async def aclose(self) -> None:
+        for inner in self._llms.values():
+            await inner.aclose()
+
+
+def bind_state(llm_instance: llm.LLM, state) -> None:
+    """Route a session's LLM by that session's VoiceBotState (no-op for other LLMs)"""
+    if isinstance(llm_instance, RoutingLLM):
+        llm_instance._state = state
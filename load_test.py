@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Concurrent Conversation Load Test
+
+Drives many simultaneous scripted callers through ITHelpDeskBot and the
+ticket tools using the offline providers from fake_providers.py, so no
+LiveKit server, media or API key is needed. Each caller turn goes through
+the same stages as a real call:
+
+    caller speech -> endpointing delay -> STT -> LLM (+ tool calls) -> TTS
+
+and is timed from the end of caller speech to the first synthesized audio
+frame (voice-to-voice latency).
+
+The harness runs each concurrency level across worker processes and
+reports:
+- voice-to-voice latency percentiles
+- event-loop lag (how saturated a worker is)
+- CPU time and memory per session
+- tool/database call latency and errors
+- database contention (time ticket writes waited for the SQLite write lock)
+- the largest sessions-per-worker level that meets the latency SLO
+
+LiveKit runs each job in its own process; here many sessions share one
+process, but each TextSession owns its VoiceBotState, so simulated
+conversations do not see each other's stage or collected fields.
+
+Usage:
+    python load_test.py --levels 10 50 100 --workers 2 --time-scale 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+from metrics import metrics, summarize
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # ru_maxrss is KiB on Linux, bytes on macOS; a peak rather than current RSS
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class SimulatedCall:
+    """One scripted caller talking to ITHelpDeskBot through fake providers"""
+
+    def __init__(self, options: argparse.Namespace, results: dict):
+        from fake_providers import FakeLLM, FakeSTT, FakeTTS
+        from text_session import TextSession
+
+        self.options = options
+        self.results = results
+        self.stt = FakeSTT(latency=options.stt_latency)
+        self.tts = FakeTTS(latency=options.tts_latency)
+        self.session = TextSession(FakeLLM(first_token_latency=options.llm_latency))
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds * self.options.time_scale)
+
+    async def generate(self, user_text: Optional[str] = None) -> float:
+        """Produce and speak the bot's reply; return the time of the first audio frame"""
+        tool_calls_before = len(self.session.tool_calls)
+        if user_text is None:
+            text = await self.session.greet()
+        else:
+            text = await self.session.send(user_text)
+
+        for call in self.session.tool_calls[tool_calls_before:]:
+            self.results["tool_latency"].append(call["seconds"])
+            if call["output"].startswith(("Sorry", "Cannot", "Error", "Unknown")):
+                self.results["tool_errors"] += 1
+
+        first_audio_at = None
+        audio_seconds = 0.0
+        async for audio in self.tts.synthesize(text):
+            if first_audio_at is None:
+                first_audio_at = time.perf_counter()
+            audio_seconds += audio.frame.duration
+        # The caller listens to the reply before speaking again
+        await self.sleep(audio_seconds)
+        return first_audio_at if first_audio_at is not None else time.perf_counter()
+
+    async def run(self):
+        options = self.options
+        await self.generate()  # greeting
+
+        while True:
+            transcript = self.stt.next_transcript()
+            if transcript is None:
+                break
+            # Caller speaks; endpointing delay and STT run after the speech ends
+            await self.sleep(len(transcript) / options.speech_chars_per_second)
+            end_of_speech = time.perf_counter()
+            await asyncio.sleep(options.endpointing_delay)
+            await self.stt.timing.wait(self.stt.latency)
+
+            first_audio_at = await self.generate(transcript)
+            self.results["voice_to_voice"].append(first_audio_at - end_of_speech)
+
+        self.results["completed"] += 1
+
+
+async def monitor_loop_lag(samples: List[float], stop: asyncio.Event, interval: float = 0.1):
+    """Record how late the event loop wakes up; grows as the worker saturates"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def run_sessions(options: argparse.Namespace, sessions: int) -> dict:
+    results = {
+        "voice_to_voice": [],
+        "tool_latency": [],
+        "loop_lag": [],
+        "tool_errors": 0,
+        "session_errors": 0,
+        "completed": 0,
+    }
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(monitor_loop_lag(results["loop_lag"], stop))
+
+    async def one_call(index: int):
+        # Stagger call arrivals across the ramp period
+        await asyncio.sleep(options.ramp * index / max(1, sessions))
+        try:
+            await SimulatedCall(options, results).run()
+        except Exception as e:
+            results["session_errors"] += 1
+            print(f"Session error: {e!r}", file=sys.stderr)
+
+    await asyncio.gather(*(one_call(i) for i in range(sessions)))
+    stop.set()
+    await lag_task
+    return results
+
+
+def worker_main(args: tuple) -> dict:
+    """Run `sessions` concurrent calls in this process and measure its cost"""
+    options, sessions = args
+    # Import the bot stack before measuring so import cost is not attributed to sessions
+    import fake_providers  # noqa: F401
+    import text_session  # noqa: F401
+
+    metrics.reset()
+    rss_before = rss_bytes()
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+    results = asyncio.run(run_sessions(options, sessions))
+    results["cpu_seconds"] = time.process_time() - cpu_before
+    results["wall_seconds"] = time.perf_counter() - wall_before
+    results["rss_delta"] = rss_bytes() - rss_before
+    # Recorded by TicketDatabase for every write transaction of this worker
+    writer_wait = metrics.histograms.get("database.writer_wait_seconds")
+    results["db_writer_wait"] = list(writer_wait.samples) if writer_wait else []
+    results["sessions"] = sessions
+    return results
+
+
+def run_level(options: argparse.Namespace, sessions_per_worker: int) -> dict:
+    """Run one concurrency level across all worker processes and aggregate"""
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(options.workers) as pool:
+        worker_results = pool.map(worker_main, [(options, sessions_per_worker)] * options.workers)
+
+    def merged(key):
+        return [value for result in worker_results for value in result[key]]
+
+    total_sessions = sessions_per_worker * options.workers
+    v2v = summarize(merged("voice_to_voice"))
+    return {
+        "sessions_per_worker": sessions_per_worker,
+        "total_sessions": total_sessions,
+        "completed": sum(r["completed"] for r in worker_results),
+        "session_errors": sum(r["session_errors"] for r in worker_results),
+        "voice_to_voice_ms": {k: (v * 1000 if k != "count" else v) for k, v in v2v.items()},
+        "loop_lag_ms": {k: (v * 1000 if k != "count" else v)
+                        for k, v in summarize(merged("loop_lag")).items()},
+        "tool_latency_ms": {k: (v * 1000 if k != "count" else v)
+                            for k, v in summarize(merged("tool_latency")).items()},
+        "tool_errors": sum(r["tool_errors"] for r in worker_results),
+        "db_writer_wait_ms": {k: (v * 1000 if k != "count" else v)
+                              for k, v in summarize(merged("db_writer_wait")).items()},
+        "cpu_ms_per_session": 1000 * sum(r["cpu_seconds"] for r in worker_results) / total_sessions,
+        "rss_kb_per_session": sum(r["rss_delta"] for r in worker_results) / 1024 / total_sessions,
+        "wall_seconds": max(r["wall_seconds"] for r in worker_results),
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Concurrent voice session load test")
+    parser.add_argument("--levels", type=int, nargs="+", default=[10, 50, 100],
+                        help="Concurrent sessions per worker process to test")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    parser.add_argument("--ramp", type=float, default=2.0,
+                        help="Seconds over which calls arrive at each level")
+    parser.add_argument("--time-scale", type=float, default=0.1,
+                        help="Scale for caller speech/listen time (1.0 = real time)")
+    parser.add_argument("--speech-chars-per-second", type=float, default=15.0)
+    parser.add_argument("--endpointing-delay", type=float, default=0.5)
+    parser.add_argument("--stt-latency", type=float, default=0.2)
+    parser.add_argument("--llm-latency", type=float, default=0.4, help="LLM time to first token")
+    parser.add_argument("--tts-latency", type=float, default=0.15)
+    parser.add_argument("--slo-ms", type=float, default=1500.0,
+                        help="p95 voice-to-voice latency budget used for capacity")
+    parser.add_argument("--database", help="SQLite file for tickets (default: temporary)")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable output")
+    return parser.parse_args(argv)
+
+
+def print_report(report: dict):
+    print("📞 Voice session load test")
+    print("=" * 72)
+    print(f"{'sess/worker':>11} {'done':>6} {'v2v p50':>9} {'v2v p95':>9} {'v2v p99':>9} "
+          f"{'lag p95':>8} {'tool p95':>9} {'db wait p95':>11} {'cpu/sess':>9} {'kb/sess':>8}")
+    for level in report["levels"]:
+        v2v = level["voice_to_voice_ms"]
+        print(f"{level['sessions_per_worker']:>11} {level['completed']:>6} "
+              f"{v2v.get('p50', 0):>7.0f}ms {v2v.get('p95', 0):>7.0f}ms {v2v.get('p99', 0):>7.0f}ms "
+              f"{level['loop_lag_ms'].get('p95', 0):>6.1f}ms {level['tool_latency_ms'].get('p95', 0):>7.1f}ms "
+              f"{level['db_writer_wait_ms'].get('p95', 0):>9.1f}ms "
+              f"{level['cpu_ms_per_session']:>7.1f}ms {level['rss_kb_per_session']:>8.0f}")
+        if level["session_errors"] or level["tool_errors"]:
+            print(f"{'':>11} ⚠️  {level['session_errors']} session errors, {level['tool_errors']} tool errors")
+    capacity = report["capacity_sessions_per_worker"]
+    print(f"\nCapacity at p95 <= {report['slo_ms']:.0f}ms: "
+          f"{capacity if capacity else 'below lowest level'} sessions per worker")
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    # Point the ticket tools at a scratch database before any worker imports them
+    if options.database:
+        os.environ["DATABASE_PATH"] = options.database
+    else:
+        os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "load_test.db")
+
+    levels = [run_level(options, sessions) for sessions in options.levels]
+    capacity = 0
+    for level in levels:
+        if (level["completed"] == level["total_sessions"]
+                and level["voice_to_voice_ms"].get("p95", 0) <= options.slo_ms):
+            capacity = max(capacity, level["sessions_per_worker"])
+
+    report = {
+        "workers": options.workers,
+        "slo_ms": options.slo_ms,
+        "levels": levels,
+        "capacity_sessions_per_worker": capacity,
+    }
+    if options.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,19 +3,21 @@
 IT Help Desk Voice Bot - Main Application
 
 This is the main entry point for the IT Help Desk Voice Bot application.
-It provides both a web interface for testing and the LiveKit voice bot functionality.
+It launches the web interface and/or the LiveKit voice bot as supervised
+worker processes sized to the host's CPU count.
+
+Usage:
+    python main.py [all|web|voice] [--web-workers N] [--voice-workers M]
 """
 
-import asyncio
+import argparse
 import logging
 import os
 import sys
-from multiprocessing import Process
-import uvicorn
 
-from web_interface import app
-from livekit.agents import cli, WorkerOptions
-from voice_bot import entrypoint
+from config import (BACKUP_CONFIG, DATABASE_CONFIG, LAUNCHER_CONFIG, NOTIFICATION_CONFIG, PROVIDER_CONFIG,
+                    RESILIENCE_CONFIG, ROUTING_CONFIG)
+from supervisor import Supervisor, default_worker_counts
 
 # Configure logging
 logging.basicConfig(
@@ -24,9 +26,28 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Environment variables each provider needs
+PROVIDER_CREDENTIALS = {
+    "openai": ["OPENAI_API_KEY"],
+}
+
+def configured_providers():
+    """Names of every provider the voice bot may build, including routes and fallbacks"""
+    providers = {settings["provider"] for settings in PROVIDER_CONFIG.values()}
+    if PROVIDER_CONFIG["llm"]["provider"] == "router":
+        providers.update(ROUTING_CONFIG[route]["provider"] for route in ("fast", "capable"))
+    if RESILIENCE_CONFIG["enabled"]:
+        providers.update(fallback["provider"] for kind in ("stt", "llm", "tts")
+                         for fallback in RESILIENCE_CONFIG[kind]["fallbacks"])
+    return providers
+
 def check_environment():
     """Check if required environment variables are set"""
-    required_vars = ["OPENAI_API_KEY"]
+    required_vars = []
+    for provider in sorted(configured_providers()):
+        for var in PROVIDER_CREDENTIALS.get(provider, []):
+            if var not in required_vars:
+                required_vars.append(var)
     missing_vars = []
     
     for var in required_vars:
@@ -40,77 +61,82 @@ def check_environment():
     
     return True
 
-def run_web_interface():
-    """Run the web interface server"""
-    logger.info("Starting web interface on http://localhost:8000")
-    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="info")
+def prepare_database():
+    """Apply pending schema migrations once, before any worker opens the database"""
+    from database import open_db
+    from migrations import apply_migrations, pending_migrations
+    
+    db = open_db(migrate=False)
+    try:
+        if DATABASE_CONFIG["auto_migrate"]:
+            for result in apply_migrations(db):
+                if result.get("deferred"):
+                    print(f"Migration {result['version']}: {result['name']} deferred; run python migrations.py")
+                else:
+                    print(f"Migration {result['version']}: {result['name']} ({result['seconds'] * 1000:.1f}ms)")
+        else:
+            pending = pending_migrations(db)
+            if pending:
+                logger.warning(f"{len(pending)} schema migrations pending; run python migrations.py")
+    finally:
+        db.close()
 
-def run_voice_bot():
-    """Run the LiveKit voice bot"""
-    logger.info("Starting LiveKit voice bot...")
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
+def parse_args(argv=None):
+    """Parse launcher command line arguments"""
+    parser = argparse.ArgumentParser(description="IT Help Desk Voice Bot launcher")
+    parser.add_argument("mode", nargs="?", default="all", choices=["all", "web", "voice"],
+                        help="Which services to run (default: all)")
+    parser.add_argument("--web-workers", type=int, default=LAUNCHER_CONFIG["web_workers"],
+                        help="Number of web interface processes (0 = size to CPU count)")
+    parser.add_argument("--voice-workers", type=int, default=LAUNCHER_CONFIG["voice_workers"],
+                        help="Number of voice worker processes (0 = size to CPU count)")
+    parser.add_argument("--port", type=int, default=LAUNCHER_CONFIG["port"],
+                        help="Web interface port")
+    return parser.parse_args(argv)
 
-def main():
+def main(argv=None):
     """Main application entry point"""
-    print("🎤 IT Help Desk Voice Bot")
-    print("=" * 40)
+    args = parse_args(argv)
     
-    if not check_environment():
+    # Load environment variables from .env before checking them
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    
+    if args.mode in ("all", "voice") and not check_environment():
         sys.exit(1)
     
-    print("\nChoose how to run the application:")
-    print("1. Web Interface Only (for testing)")
-    print("2. Voice Bot Only (LiveKit)")
-    print("3. Both (Web Interface + Voice Bot)")
-    print("4. Exit")
+    default_web, default_voice = default_worker_counts()
+    web_workers = args.web_workers or default_web
+    voice_workers = args.voice_workers or default_voice
+    if args.mode == "web":
+        voice_workers = 0
+    elif args.mode == "voice":
+        web_workers = 0
+    
+    print("🎤 IT Help Desk Voice Bot")
+    print("=" * 40)
+    if web_workers:
+        print(f"Web interface: http://localhost:{args.port} ({web_workers} workers)")
+    if voice_workers:
+        print(f"Voice bot: {voice_workers} LiveKit workers")
+    # Tickets are created by voice workers; deliver their confirmations and
+    # back up the database alongside
+    background = []
+    if voice_workers and NOTIFICATION_CONFIG["enabled"]:
+        background.append("notifier")
+        print(f"Notifications: SMTP {NOTIFICATION_CONFIG['smtp_host']}:{NOTIFICATION_CONFIG['smtp_port']}")
+    # A PostgreSQL server is backed up by its own tooling
+    if voice_workers and BACKUP_CONFIG["interval_seconds"] > 0 and DATABASE_CONFIG["backend"] == "sqlite":
+        background.append("backup")
+        print(f"Backups: every {BACKUP_CONFIG['interval_seconds']:.0f}s to {BACKUP_CONFIG['directory']}/")
+    
+    prepare_database()
     
-    while True:
-        try:
-            choice = input("\nEnter your choice (1-4): ").strip()
-            
-            if choice == "1":
-                print("\nStarting web interface...")
-                print("Open http://localhost:8000 in your browser to test the voice bot")
-                run_web_interface()
-                break
-                
-            elif choice == "2":
-                print("\nStarting voice bot...")
-                print("Make sure LiveKit server is running")
-                run_voice_bot()
-                break
-                
-            elif choice == "3":
-                print("\nStarting both web interface and voice bot...")
-                print("Web interface: http://localhost:8000")
-                print("Voice bot: Running on LiveKit")
-                
-                # Start web interface in a separate process
-                web_process = Process(target=run_web_interface)
-                web_process.start()
-                
-                # Start voice bot in the main process
-                try:
-                    run_voice_bot()
-                except KeyboardInterrupt:
-                    print("\nShutting down...")
-                    web_process.terminate()
-                    web_process.join()
-                break
-                
-            elif choice == "4":
-                print("Goodbye!")
-                sys.exit(0)
-                
-            else:
-                print("Invalid choice. Please enter 1, 2, 3, or 4.")
-                
-        except KeyboardInterrupt:
-            print("\nGoodbye!")
-            sys.exit(0)
-        except Exception as e:
-            logger.error(f"Error: {e}")
-            print(f"Error: {e}")
+    config = dict(LAUNCHER_CONFIG, port=args.port)
+    Supervisor(config, web_workers, voice_workers, background).run()
 
 if __name__ == "__main__":
     main()
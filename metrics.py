@@ -0,0 +1,104 @@
+"""
+Metrics
+
+This module contains lightweight in-process counters and latency
+histograms shared by the voice pipeline and the benchmark scripts.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Return the pct-th percentile (0-100) of values using linear interpolation"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: Iterable[float], percentiles=(50, 90, 95, 99)) -> Dict[str, float]:
+    """Return count, mean, min, max and percentiles for a list of samples"""
+    values = list(values)
+    if not values:
+        return {"count": 0}
+    summary = {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "min": min(values),
+        "max": max(values),
+    }
+    for pct in percentiles:
+        summary[f"p{pct}"] = percentile(values, pct)
+    return summary
+
+
+class Histogram:
+    """Keeps the most recent samples (bounded) for percentile reporting"""
+
+    def __init__(self, max_samples: int = 10000):
+        self.max_samples = max_samples
+        self.samples: List[float] = []
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+        if len(self.samples) > self.max_samples:
+            # Drop the oldest half at once to keep observe() cheap
+            del self.samples[:self.max_samples // 2]
+
+    def summary(self) -> Dict[str, float]:
+        summary = summarize(self.samples)
+        summary["count"] = self.count
+        summary["total"] = self.total
+        return summary
+
+
+class MetricsRegistry:
+    """Named counters and histograms, safe to update from several threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.histograms: Dict[str, Histogram] = {}
+
+    def increment(self, name: str, amount: float = 1.0):
+        with self._lock:
+            self.counters[name] += amount
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def counter(self, name: str) -> float:
+        return self.counters.get(name, 0.0)
+
+    def snapshot(self, prefix: Optional[str] = None) -> Dict[str, dict]:
+        """Return a JSON-serializable copy of all (or prefixed) metrics"""
+        with self._lock:
+            counters = {k: v for k, v in self.counters.items()
+                        if prefix is None or k.startswith(prefix)}
+            histograms = {k: h.summary() for k, h in self.histograms.items()
+                          if prefix is None or k.startswith(prefix)}
+        return {"counters": counters, "histograms": histograms}
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Schema Migrations
+
+init_database() creates the baseline schema; every later schema change
+(indexes, columns, tables) is a numbered migration in MIGRATIONS, so
+existing databases pick it up instead of being edited by hand. Pending
+migrations are applied in order when the store is opened (main.py
+applies them once before starting workers) and recorded with their
+duration in `schema_migrations`. Set DATABASE_AUTO_MIGRATE=0 to only
+apply them with this script, e.g. as a deploy step.
+
+Index migrations are built online where the backend allows it:
+PostgreSQL uses CREATE INDEX CONCURRENTLY, so ticket writes continue
+during the build. SQLite has no online index build: CREATE INDEX holds
+the database write lock until it finishes, so every writer waits. SQLite
+index migrations are therefore only applied by this script (run it in a
+quiet period) or, opted in with DATABASE_MIGRATE_BLOCKING=1, when the
+store is opened; otherwise automatic migration defers them, and the
+migrations after them, with a warning.
+
+Usage:
+    python migrations.py             # apply pending migrations
+    python migrations.py --dry-run   # show pending migrations and their SQL
+    python migrations.py --status    # list applied migrations and their durations
+"""
+
+import argparse
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Serializes migrations when several PostgreSQL hosts start at once
+MIGRATION_LOCK_ID = 720_042
+
+
+class Migration:
+    """
+    One schema change
+
+    `sql` is a list of statements for every backend, or a dict of
+    backend ("sqlite", "postgres") -> statements. Index migrations set
+    `index` to (name, table, columns) instead, so they can be built online.
+    """
+
+    def __init__(self, version: int, name: str, sql: Union[List[str], Dict[str, List[str]], None] = None,
+                 index: Optional[tuple] = None):
+        self.version = version
+        self.name = name
+        self.sql = sql or []
+        self.index = index
+
+    def blocks_writes(self, backend: str) -> bool:
+        """Whether applying this migration stops ticket writes until it finishes"""
+        return self.index is not None and backend == "sqlite"
+
+    def statements(self, backend: str) -> List[str]:
+        """The SQL this migration runs on a backend"""
+        if self.index:
+            name, table, columns = self.index
+            concurrently = "CONCURRENTLY " if backend == "postgres" else ""
+            return [f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({columns})"]
+        if isinstance(self.sql, dict):
+            return self.sql.get(backend, [])
+        return self.sql
+
+
+# Append new migrations with the next version number; never edit applied ones
+MIGRATIONS: List[Migration] = [
+    # Ticket listings sort by created_at and archiving scans by it
+    Migration(1, "index tickets by created_at", index=("idx_tickets_created_at", "tickets", "created_at")),
+]
+
+# Part of the baseline schema created by init_database()
+SCHEMA_MIGRATIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT NOT NULL,
+        seconds REAL NOT NULL
+    )
+'''
+
+
+def applied_migrations(db) -> List[dict]:
+    """Migrations recorded in the database, oldest first"""
+    query = "SELECT version, name, applied_at, seconds FROM schema_migrations ORDER BY version"
+    if db.backend == "postgres":
+        with db.pool.connection() as conn:
+            rows = conn.execute(query).fetchall()
+    else:
+        conn = sqlite3.connect(db.db_path)
+        rows = conn.execute(query).fetchall()
+        conn.close()
+    return [{"version": row[0], "name": row[1], "applied_at": row[2], "seconds": row[3]} for row in rows]
+
+
+def pending_migrations(db) -> List[Migration]:
+    applied = {row["version"] for row in applied_migrations(db)}
+    return [migration for migration in MIGRATIONS if migration.version not in applied]
+
+
+def _apply_sqlite(db, migration: Migration) -> bool:
+    """Apply one migration in a transaction; False if another process already applied it"""
+    conn = sqlite3.connect(db.db_path, timeout=60)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT 1 FROM schema_migrations WHERE version = ?", (migration.version,))
+        if cursor.fetchone():
+            conn.rollback()
+            return False
+        start = time.perf_counter()
+        for statement in migration.statements("sqlite"):
+            cursor.execute(statement)
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, name, applied_at, seconds) VALUES (?, ?, ?, ?)",
+            (migration.version, migration.name, datetime.now().isoformat(), time.perf_counter() - start))
+        conn.commit()
+        return True
+    finally:
+        conn.close()
+
+
+def _apply_postgres(conn, migration: Migration) -> bool:
+    """Apply one migration on an autocommit connection holding the migration lock"""
+    if conn.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (migration.version,)).fetchone():
+        return False
+    start = time.perf_counter()
+    if migration.index:
+        # CONCURRENTLY cannot run in a transaction. A build that was
+        # interrupted leaves an invalid index behind; drop it and rebuild.
+        valid = conn.execute('''
+            SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = %s
+        ''', (migration.index[0],)).fetchone()
+        if valid is not None and not valid[0]:
+            conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {migration.index[0]}")
+        for statement in migration.statements("postgres"):
+            conn.execute(statement)
+        conn.execute(
+            "INSERT INTO schema_migrations (version, name, applied_at, seconds) VALUES (%s, %s, %s, %s)",
+            (migration.version, migration.name, datetime.now().isoformat(), time.perf_counter() - start))
+    else:
+        with conn.transaction():
+            for statement in migration.statements("postgres"):
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, name, applied_at, seconds) VALUES (%s, %s, %s, %s)",
+                (migration.version, migration.name, datetime.now().isoformat(), time.perf_counter() - start))
+    return True
+
+
+def apply_migrations(db, dry_run: bool = False, allow_blocking: Optional[bool] = None) -> List[dict]:
+    """
+    Apply pending migrations in version order; return what was (or, with dry_run, would be) run
+
+    Each result has version, name, statements, blocks_writes and,
+    unless dry_run, seconds. Migrations that block writers (SQLite index builds) run
+    only with allow_blocking (default DATABASE_CONFIG["migrate_blocking"]);
+    otherwise they and every later migration are returned with
+    "deferred" set. Safe to call from several processes at once.
+    """
+    if allow_blocking is None:
+        from config import DATABASE_CONFIG
+        allow_blocking = DATABASE_CONFIG["migrate_blocking"]
+
+    backend = db.backend
+    pending = pending_migrations(db)
+    results = [{"version": migration.version, "name": migration.name,
+                "statements": migration.statements(backend),
+                "blocks_writes": migration.blocks_writes(backend)} for migration in pending]
+    if dry_run or not pending:
+        return results
+
+    if not allow_blocking:
+        for position, migration in enumerate(pending):
+            if migration.blocks_writes(backend):
+                for result in results[position:]:
+                    result["deferred"] = True
+                logger.warning(f"⚠️  Deferred {len(pending) - position} migrations: migration "
+                               f"{migration.version} ({migration.name}) blocks writers on {backend}; "
+                               f"run python migrations.py in a quiet period")
+                pending = pending[:position]
+                break
+        if not pending:
+            return results
+
+    conn = None
+    if backend == "postgres":
+        import psycopg
+        conn = psycopg.connect(db.url, autocommit=True)
+        conn.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    try:
+        for migration, result in zip(pending, results):
+            start = time.perf_counter()
+            if backend == "postgres":
+                applied = _apply_postgres(conn, migration)
+            else:
+                applied = _apply_sqlite(db, migration)
+            result["seconds"] = time.perf_counter() - start
+            if applied:
+                logger.info(f"🗄️  Applied migration {migration.version} ({migration.name}) "
+                            f"in {result['seconds'] * 1000:.1f}ms")
+            else:
+                result["skipped"] = True
+    finally:
+        if conn is not None:
+            conn.close()  # also releases the advisory lock
+    return results
+
+
+def main(argv=None):
+    from database import open_db
+
+    parser = argparse.ArgumentParser(description="Apply ticket database schema migrations")
+    parser.add_argument("--dry-run", action="store_true", help="Show pending migrations without applying them")
+    parser.add_argument("--status", action="store_true", help="List applied migrations")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    db = open_db(migrate=False)
+    try:
+        if args.status:
+            for row in applied_migrations(db):
+                print(f"{row['version']:>4}  {row['applied_at']}  {row['seconds'] * 1000:>9.1f}ms  {row['name']}")
+            print(f"{len(pending_migrations(db))} pending")
+            return
+
+        # Run by an operator, so migrations that block writers are applied too
+        results = apply_migrations(db, dry_run=args.dry_run, allow_blocking=True)
+        if not results:
+            print("Schema is up to date")
+        for result in results:
+            if args.dry_run:
+                blocking = ", blocks writers while it runs" if result["blocks_writes"] else ""
+                print(f"{result['version']:>4}  {result['name']} (pending{blocking})")
+            else:
+                status = "already applied" if result.get("skipped") else "applied"
+                print(f"{result['version']:>4}  {result['name']}: {status} in {result['seconds'] * 1000:.1f}ms")
+            for statement in result["statements"]:
+                print(f"        {' '.join(statement.split())}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
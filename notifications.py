@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Confirmation Notifications
+
+This module delivers the messages that TicketDatabase.create_ticket
+queues in the `outbox` table (in the same transaction as the ticket), so
+confirmation emails never run inside a voice turn.
+
+A worker claims due messages in batches (with a lease, so several
+workers can share the outbox), sends each batch over a small pool of
+SMTP connections, retries failures with exponential backoff and
+dead-letters messages after `max_attempts`. Delivery counts are recorded
+under `outbox.*` in metrics.
+
+Usage:
+    python notifications.py               # run the outbox worker
+    python notifications.py --once        # deliver everything due, then exit
+    python notifications.py --smtp-sink   # local SMTP stand-in for development
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import signal
+import smtplib
+import time
+from email.message import EmailMessage
+from typing import Callable, Dict, List, Optional
+
+from config import NOTIFICATION_CONFIG
+from database import get_db
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def build_confirmation(payload: dict) -> EmailMessage:
+    """Build the ticket confirmation email for an outbox payload"""
+    message = EmailMessage()
+    message["From"] = NOTIFICATION_CONFIG["sender"]
+    message["To"] = payload["email"]
+    message["Subject"] = f"IT Help Desk ticket #{payload['ticket_id']}"
+    message.set_content(
+        f"Hello {payload['name']},\n\n"
+        f"Your support ticket has been created.\n\n"
+        f"Confirmation number: {payload['ticket_id']}\n"
+        f"Issue: {payload['issue']}\n"
+        f"Service fee: ${payload['price']:.2f}\n\n"
+        f"We'll be in touch at {payload['phone']} if we need anything else.\n\n"
+        f"IT Help Desk\n"
+    )
+    return message
+
+
+# topic -> builder(payload) -> email
+MESSAGE_BUILDERS: Dict[str, Callable[[dict], EmailMessage]] = {
+    "ticket_confirmation": build_confirmation,
+}
+
+
+def send_batch(messages: List[dict]) -> Dict[int, Optional[str]]:
+    """Send messages over one SMTP connection; return message id -> error (None if sent)"""
+    results: Dict[int, Optional[str]] = {}
+    try:
+        smtp = smtplib.SMTP(NOTIFICATION_CONFIG["smtp_host"], NOTIFICATION_CONFIG["smtp_port"],
+                            timeout=NOTIFICATION_CONFIG["smtp_timeout"])
+    except OSError as e:
+        return {message["id"]: f"connect failed: {e}" for message in messages}
+
+    with smtp:
+        if NOTIFICATION_CONFIG["smtp_username"]:
+            try:
+                smtp.starttls()
+                smtp.login(NOTIFICATION_CONFIG["smtp_username"], NOTIFICATION_CONFIG["smtp_password"])
+            except (smtplib.SMTPException, OSError) as e:
+                return {message["id"]: f"login failed: {e!r}" for message in messages}
+        for message in messages:
+            try:
+                builder = MESSAGE_BUILDERS[message["topic"]]
+                smtp.send_message(builder(message["payload"]))
+                results[message["id"]] = None
+            except (KeyError, ValueError) as e:
+                # Malformed messages will never succeed
+                results[message["id"]] = f"permanent: {e!r}"
+            except (smtplib.SMTPException, OSError) as e:
+                results[message["id"]] = repr(e)
+    return results
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter for a message that failed `attempts` times"""
+    delay = min(NOTIFICATION_CONFIG["backoff_max"], NOTIFICATION_CONFIG["backoff_base"] ** attempts)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class OutboxWorker:
+    """Polls the outbox and delivers due messages"""
+
+    def __init__(self, db=None, sender: Callable[[List[dict]], Dict[int, Optional[str]]] = send_batch):
+        self.db = db or get_db()
+        self.sender = sender
+        self.batch_size = NOTIFICATION_CONFIG["batch_size"]
+        self.concurrency = max(1, NOTIFICATION_CONFIG["concurrency"])
+
+    async def deliver_due(self) -> int:
+        """Claim and deliver one batch of due messages; return how many were claimed"""
+        messages = await asyncio.to_thread(
+            self.db.claim_outbox, self.batch_size, NOTIFICATION_CONFIG["lease_seconds"])
+        if not messages:
+            return 0
+
+        start = time.perf_counter()
+        groups = [messages[i::self.concurrency] for i in range(self.concurrency)]
+        results: Dict[int, Optional[str]] = {}
+        for group_results in await asyncio.gather(
+                *(asyncio.to_thread(self.sender, group) for group in groups if group)):
+            results.update(group_results)
+
+        sent = [message["id"] for message in messages if results.get(message["id"], "missing") is None]
+        if sent:
+            await asyncio.to_thread(self.db.complete_outbox, sent)
+            metrics.increment("outbox.sent", len(sent))
+
+        for message in messages:
+            error = results.get(message["id"], "no result")
+            if error is None:
+                continue
+            if error.startswith("permanent") or message["attempts"] >= NOTIFICATION_CONFIG["max_attempts"]:
+                logger.error(f"📭 Dead-lettering outbox message {message['id']}: {error}")
+                await asyncio.to_thread(self.db.fail_outbox, message["id"], error, None)
+                metrics.increment("outbox.dead_lettered")
+            else:
+                retry_at = time.time() + retry_delay(message["attempts"])
+                await asyncio.to_thread(self.db.fail_outbox, message["id"], error, retry_at)
+                metrics.increment("outbox.retried")
+
+        metrics.observe("outbox.batch_seconds", time.perf_counter() - start)
+        logger.info(f"📬 Outbox batch: {len(sent)}/{len(messages)} sent")
+        return len(messages)
+
+    async def run(self, stop: asyncio.Event):
+        """Deliver messages until `stop` is set"""
+        logger.info("📬 Outbox worker started")
+        while not stop.is_set():
+            try:
+                claimed = await self.deliver_due()
+            except Exception as e:
+                logger.error(f"Error delivering outbox messages: {e}")
+                claimed = 0
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(stop.wait(), NOTIFICATION_CONFIG["poll_interval"])
+                except asyncio.TimeoutError:
+                    pass
+        logger.info("📬 Outbox worker stopped")
+
+
+def run_outbox_worker(heartbeat=None, interval: float = 1.0):
+    """Run an outbox worker until SIGTERM/SIGINT, reporting liveness to `heartbeat`"""
+    async def main():
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stop.set)
+
+        async def beat():
+            while heartbeat is not None and not stop.is_set():
+                heartbeat.value = time.time()
+                await asyncio.sleep(interval)
+
+        beat_task = asyncio.create_task(beat())
+        try:
+            await OutboxWorker().run(stop)
+        finally:
+            beat_task.cancel()
+
+    asyncio.run(main())
+
+
+class SMTPSink:
+    """
+    Minimal SMTP server for local development
+
+    Accepts every message and appends it to an mbox file, so confirmation
+    emails can be inspected without a real mail server.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or NOTIFICATION_CONFIG["sink_path"]
+        self.received = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 localhost SMTP sink ready")
+        sender, recipients = None, []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip()
+                verb = command[:4].upper()
+                if verb in ("HELO", "EHLO"):
+                    await reply("250 localhost")
+                elif verb == "MAIL":
+                    sender, recipients = command.split(":", 1)[1].strip(), []
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    recipients.append(command.split(":", 1)[1].strip())
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while True:
+                        data = await reader.readline()
+                        if not data or data in (b".\r\n", b".\n"):
+                            break
+                        lines.append(data[1:] if data.startswith(b"..") else data)
+                    self._store(sender, recipients, b"".join(lines))
+                    await reply("250 OK queued")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                elif verb in ("RSET", "NOOP"):
+                    sender, recipients = (None, []) if verb == "RSET" else (sender, recipients)
+                    await reply("250 OK")
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+    def _store(self, sender: Optional[str], recipients: List[str], body: bytes):
+        self.received += 1
+        with open(self.path, "ab") as f:
+            f.write(f"From {sender or 'unknown'} {time.asctime()}\n".encode())
+            f.write(body.replace(b"\r\n", b"\n"))
+            f.write(b"\n")
+        logger.info(f"📨 SMTP sink received message for {', '.join(recipients)}")
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port)
+        logger.info(f"📨 SMTP sink listening on {host}:{port}, writing to {self.path}")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Outbox worker for confirmation emails")
+    parser.add_argument("--once", action="store_true", help="Deliver all due messages, then exit")
+    parser.add_argument("--smtp-sink", action="store_true", help="Run the local SMTP stand-in")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.smtp_sink:
+        asyncio.run(SMTPSink().serve(NOTIFICATION_CONFIG["smtp_host"], NOTIFICATION_CONFIG["smtp_port"]))
+    elif args.once:
+        async def drain():
+            worker = OutboxWorker()
+            while await worker.deliver_due():
+                pass
+        asyncio.run(drain())
+        print(get_db().get_outbox_stats())
+    else:
+        run_outbox_worker()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,506 @@
+"""
+PostgreSQL Ticket Storage
+
+TicketStore backed by a PostgreSQL server (14 or newer), so several web
+and voice worker hosts can share tickets. Select it with
+DATABASE_BACKEND=postgres and DATABASE_URL.
+
+Each process keeps a small connection pool (DATABASE_POOL_MIN/MAX);
+time spent waiting for a pooled connection is recorded under
+`database.pool_wait_seconds` in metrics. The schema mirrors the SQLite
+one, with the change counter and daily rollups maintained by triggers.
+Outbox messages are claimed with FOR UPDATE SKIP LOCKED, so notifier
+workers on different hosts never claim the same message. The archive
+directory (ARCHIVE_DIR) must be storage shared by all hosts.
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import DATABASE_CONFIG
+from database import AUDITED_FIELDS, ROLLUP_VERSION, Ticket, TicketStore, ticket_from_row
+from metrics import metrics
+from migrations import SCHEMA_MIGRATIONS_TABLE, apply_migrations
+from ticket_archive import TicketArchive
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    ConnectionPool = None
+
+logger = logging.getLogger(__name__)
+
+# Serializes schema creation when several hosts start at once
+SCHEMA_LOCK_ID = 720_041
+
+SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS tickets (
+        id BIGSERIAL PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        address TEXT NOT NULL,
+        issue TEXT NOT NULL,
+        price DOUBLE PRECISION NOT NULL,
+        created_at TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS table_changes (
+        table_name TEXT PRIMARY KEY,
+        version BIGINT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+    ''',
+    # Bumped once per statement, so a bulk import counts as one change
+    '''
+    CREATE OR REPLACE FUNCTION tickets_bump_version() RETURNS trigger AS $$
+    BEGIN
+        UPDATE table_changes
+        SET version = version + 1,
+            updated_at = to_char(clock_timestamp() AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.MS')
+        WHERE table_name = 'tickets';
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    ''',
+    '''
+    CREATE OR REPLACE TRIGGER tickets_version
+    AFTER INSERT OR UPDATE OR DELETE ON tickets
+    FOR EACH STATEMENT EXECUTE FUNCTION tickets_bump_version()
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS ticket_audit (
+        id BIGSERIAL PRIMARY KEY,
+        ticket_id BIGINT NOT NULL,
+        field TEXT NOT NULL,
+        old_value TEXT,
+        new_value TEXT,
+        actor TEXT NOT NULL,
+        session_id TEXT,
+        changed_at TEXT NOT NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_ticket_audit_ticket ON ticket_audit(ticket_id, id)',
+    '''
+    CREATE TABLE IF NOT EXISTS outbox (
+        id BIGSERIAL PRIMARY KEY,
+        topic TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at DOUBLE PRECISION NOT NULL,
+        last_error TEXT,
+        created_at TEXT NOT NULL,
+        sent_at TEXT
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at)',
+    '''
+    CREATE TABLE IF NOT EXISTS archive_index (
+        ticket_id BIGINT PRIMARY KEY,
+        month TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS ticket_rollups (
+        day TEXT NOT NULL,
+        issue TEXT NOT NULL,
+        tickets INTEGER NOT NULL,
+        revenue DOUBLE PRECISION NOT NULL,
+        PRIMARY KEY (day, issue)
+    )
+    ''',
+    '''
+    CREATE OR REPLACE FUNCTION tickets_rollup() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' THEN
+            IF OLD.issue IS NOT DISTINCT FROM NEW.issue AND OLD.price IS NOT DISTINCT FROM NEW.price THEN
+                RETURN NULL;
+            END IF;
+            UPDATE ticket_rollups SET tickets = tickets - 1, revenue = revenue - OLD.price
+            WHERE day = substr(OLD.created_at, 1, 10) AND issue = OLD.issue;
+        END IF;
+        INSERT INTO ticket_rollups (day, issue, tickets, revenue)
+        VALUES (substr(NEW.created_at, 1, 10), NEW.issue, 1, NEW.price)
+        ON CONFLICT (day, issue) DO UPDATE SET
+            tickets = ticket_rollups.tickets + 1,
+            revenue = ticket_rollups.revenue + EXCLUDED.revenue;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    ''',
+    '''
+    CREATE OR REPLACE TRIGGER tickets_rollup
+    AFTER INSERT OR UPDATE OF issue, price ON tickets
+    FOR EACH ROW EXECUTE FUNCTION tickets_rollup()
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_state (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        built_at TEXT NOT NULL
+    )
+    ''',
+    # Schema changes after this baseline are migrations (migrations.py)
+    SCHEMA_MIGRATIONS_TABLE,
+]
+
+TICKET_COLUMNS = "id, name, email, phone, address, issue, price, created_at"
+
+
+def id_ranges(ids: List[int]) -> List[List[int]]:
+    """Collapse sorted IDs into [first, last] runs of consecutive values"""
+    ranges: List[List[int]] = []
+    for ticket_id in ids:
+        if ranges and ticket_id == ranges[-1][1] + 1:
+            ranges[-1][1] = ticket_id
+        else:
+            ranges.append([ticket_id, ticket_id])
+    return ranges
+
+
+class PostgresTicketDatabase(TicketStore):
+    """PostgreSQL ticket storage shared by several hosts, through a per-process connection pool"""
+    backend = "postgres"
+
+    def __init__(self, url: str, archive_dir: Optional[str] = None, migrate: bool = True,
+                 min_size: Optional[int] = None, max_size: Optional[int] = None, timeout: Optional[float] = None):
+        if ConnectionPool is None:
+            raise RuntimeError("The postgres backend needs psycopg: pip install 'psycopg[binary,pool]'")
+        self.url = url
+        self.pool = ConnectionPool(
+            url,
+            min_size=min_size or DATABASE_CONFIG["pool_min_size"],
+            max_size=max_size or DATABASE_CONFIG["pool_max_size"],
+            timeout=timeout or DATABASE_CONFIG["pool_timeout"],
+            open=True,
+        )
+        self.archive = TicketArchive(archive_dir or "archive")
+        self.init_database()
+        if migrate:
+            apply_migrations(self)
+
+    def close(self):
+        self.pool.close()
+
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection; the block runs in one transaction, committed on exit"""
+        start = time.perf_counter()
+        with self.pool.connection() as conn:
+            metrics.observe("database.pool_wait_seconds", time.perf_counter() - start)
+            yield conn
+
+    def init_database(self):
+        """Create the schema (idempotent; safe when several hosts start at once)"""
+        with self._connection() as conn:
+            conn.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_LOCK_ID,))
+            for statement in SCHEMA:
+                conn.execute(statement)
+            conn.execute('''
+                INSERT INTO table_changes (table_name, version, updated_at)
+                VALUES ('tickets', 0, %s) ON CONFLICT DO NOTHING
+            ''', (datetime.now(timezone.utc).isoformat(),))
+            row = conn.execute(
+                "SELECT version FROM rollup_state WHERE table_name = 'ticket_rollups'").fetchone()
+            if row is None or row[0] < ROLLUP_VERSION:
+                self._backfill_rollups(conn)
+        logger.info("🗄️  PostgreSQL ticket storage ready")
+
+    def _backfill_rollups(self, conn):
+        """Rebuild ticket_rollups from the hot and archived tickets and record ROLLUP_VERSION"""
+        # Hold off ticket writers (their triggers update the rollups) until the rebuild commits
+        conn.execute("LOCK TABLE tickets IN SHARE MODE")
+        conn.execute("DELETE FROM ticket_rollups")
+        conn.execute('''
+            INSERT INTO ticket_rollups (day, issue, tickets, revenue)
+            SELECT substr(created_at, 1, 10), issue, COUNT(*), SUM(price) FROM tickets
+            WHERE NOT EXISTS (SELECT 1 FROM archive_index WHERE ticket_id = tickets.id)
+            GROUP BY 1, 2
+        ''')
+        archived = dict(conn.execute("SELECT ticket_id, month FROM archive_index").fetchall())
+        with conn.cursor() as cursor:
+            cursor.executemany('''
+                INSERT INTO ticket_rollups (day, issue, tickets, revenue) VALUES (%s, %s, %s, %s)
+                ON CONFLICT (day, issue) DO UPDATE SET
+                    tickets = ticket_rollups.tickets + EXCLUDED.tickets,
+                    revenue = ticket_rollups.revenue + EXCLUDED.revenue
+            ''', [(day, issue, count, revenue)
+                  for (day, issue), (count, revenue) in self._archived_rollups(archived).items()])
+        conn.execute('''
+            INSERT INTO rollup_state (table_name, version, built_at) VALUES ('ticket_rollups', %s, %s)
+            ON CONFLICT (table_name) DO UPDATE SET version = EXCLUDED.version, built_at = EXCLUDED.built_at
+        ''', (ROLLUP_VERSION, datetime.now(timezone.utc).isoformat()))
+
+    def get_change_stamp(self) -> Tuple[int, str]:
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT version, updated_at FROM table_changes WHERE table_name = 'tickets'").fetchone()
+        if row:
+            return row[0], row[1]
+        return 0, ""
+
+    def create_ticket(self, ticket: Ticket, actor: str = "system", session_id: Optional[str] = None) -> int:
+        created_at = datetime.now().isoformat()
+        snapshot = {field: getattr(ticket, field) for field in AUDITED_FIELDS}
+        with self._connection() as conn:
+            ticket_id = conn.execute('''
+                INSERT INTO tickets (name, email, phone, address, issue, price, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id
+            ''', (ticket.name, ticket.email, ticket.phone, ticket.address,
+                  ticket.issue, ticket.price, created_at)).fetchone()[0]
+            conn.execute('''
+                INSERT INTO ticket_audit (ticket_id, field, old_value, new_value, actor, session_id, changed_at)
+                VALUES (%s, 'created', NULL, %s, %s, %s, %s)
+            ''', (ticket_id, json.dumps(snapshot), actor, session_id, created_at))
+            conn.execute('''
+                INSERT INTO outbox (topic, payload, next_attempt_at, created_at)
+                VALUES ('ticket_confirmation', %s, %s, %s)
+            ''', (json.dumps({"ticket_id": ticket_id, **snapshot}), time.time(), created_at))
+        return ticket_id
+
+    def get_ticket(self, ticket_id: int) -> Optional[Ticket]:
+        with self._connection() as conn:
+            row = conn.execute(f"SELECT {TICKET_COLUMNS} FROM tickets WHERE id = %s", (ticket_id,)).fetchone()
+            if row is None:
+                archived = conn.execute(
+                    "SELECT month FROM archive_index WHERE ticket_id = %s", (ticket_id,)).fetchone()
+                if archived:
+                    row = self.archive.get(archived[0], ticket_id)
+        if row:
+            return ticket_from_row(row)
+        return None
+
+    def update_ticket(self, ticket_id: int, updates: Dict[str, Any], actor: str = "system",
+                      session_id: Optional[str] = None) -> bool:
+        fields = [field for field in updates if field in AUDITED_FIELDS]
+        if not fields:
+            return False
+
+        with self._connection() as conn:
+            # Row lock: concurrent updates of the same ticket are audited in order
+            row = conn.execute(f"SELECT {', '.join(fields)} FROM tickets WHERE id = %s FOR UPDATE",
+                               (ticket_id,)).fetchone()
+            if row is None:
+                return False
+            conn.execute(f"UPDATE tickets SET {', '.join(f'{field} = %s' for field in fields)} WHERE id = %s",
+                         [updates[field] for field in fields] + [ticket_id])
+            changed_at = datetime.now().isoformat()
+            with conn.cursor() as cursor:
+                cursor.executemany('''
+                    INSERT INTO ticket_audit (ticket_id, field, old_value, new_value, actor, session_id, changed_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ''', [
+                    (ticket_id, field, json.dumps(old), json.dumps(updates[field]), actor, session_id, changed_at)
+                    for field, old in zip(fields, row) if old != updates[field]
+                ])
+        return True
+
+    def bulk_create_tickets(self, rows: Iterable[Dict[str, Any]], chunk_size: int = 1000,
+                            actor: str = "import", first_row: int = 0,
+                            max_errors: int = 1000) -> Dict[str, Any]:
+        """
+        Insert many tickets, `chunk_size` rows per transaction
+
+        Same contract as TicketDatabase.bulk_create_tickets; IDs can
+        interleave with other hosts' inserts, so a chunk may report
+        several ranges.
+        """
+        result: Dict[str, Any] = {"created": 0, "failed": 0, "errors": [], "id_ranges": []}
+        iterator = iter(rows)
+        index = first_row
+
+        def fail(row_index: int, error: str):
+            result["failed"] += 1
+            if len(result["errors"]) < max_errors:
+                result["errors"].append({"row": row_index, "error": error})
+
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            values = self._validate_creates(chunk, index, fail)
+            index += len(chunk)
+            if not values:
+                continue
+
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.executemany('''
+                    INSERT INTO tickets (name, email, phone, address, issue, price, created_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id
+                ''', values, returning=True)
+                ids = []
+                while True:
+                    ids.append(cursor.fetchone()[0])
+                    if not cursor.nextset():
+                        break
+                cursor.executemany('''
+                    INSERT INTO ticket_audit (ticket_id, field, old_value, new_value, actor, session_id, changed_at)
+                    VALUES (%s, 'created', NULL, %s, %s, NULL, %s)
+                ''', [
+                    (ticket_id, json.dumps(dict(zip(AUDITED_FIELDS, row[:6]))), actor, row[6])
+                    for ticket_id, row in zip(ids, values)
+                ])
+
+            result["created"] += len(values)
+            result["id_ranges"].extend(id_ranges(sorted(ids)))
+
+        return result
+
+    def bulk_update_tickets(self, updates: Iterable[Dict[str, Any]], chunk_size: int = 1000,
+                            actor: str = "import", first_row: int = 0,
+                            max_errors: int = 1000) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"updated": 0, "failed": 0, "errors": []}
+        iterator = iter(updates)
+        index = first_row
+
+        def fail(row_index: int, error: str):
+            result["failed"] += 1
+            if len(result["errors"]) < max_errors:
+                result["errors"].append({"row": row_index, "error": error})
+
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            valid = self._validate_updates(chunk, index, fail)
+            index += len(chunk)
+            if not valid:
+                continue
+
+            with self._connection() as conn, conn.cursor() as cursor:
+                ids = sorted({ticket_id for _, ticket_id, _ in valid})
+                # Locked in ID order, so concurrent bulk updates cannot deadlock
+                cursor.execute(f'''
+                    SELECT id, {', '.join(AUDITED_FIELDS)} FROM tickets
+                    WHERE id = ANY(%s) ORDER BY id FOR UPDATE
+                ''', (ids,))
+                current = {row[0]: dict(zip(AUDITED_FIELDS, row[1:])) for row in cursor.fetchall()}
+
+                groups, audit, updated = self._plan_updates(valid, current, actor, fail)
+                result["updated"] += updated
+                for names, params in groups.items():
+                    cursor.executemany(
+                        f"UPDATE tickets SET {', '.join(f'{name} = %s' for name in names)} WHERE id = %s", params)
+                cursor.executemany('''
+                    INSERT INTO ticket_audit (ticket_id, field, old_value, new_value, actor, session_id, changed_at)
+                    VALUES (%s, %s, %s, %s, %s, NULL, %s)
+                ''', audit)
+
+        result["errors"].sort(key=lambda error: error["row"])
+        return result
+
+    def get_ticket_history(self, ticket_id: int) -> List[Dict[str, Any]]:
+        with self._connection() as conn:
+            rows = conn.execute('''
+                SELECT id, field, old_value, new_value, actor, session_id, changed_at
+                FROM ticket_audit WHERE ticket_id = %s ORDER BY id
+            ''', (ticket_id,)).fetchall()
+
+        return [
+            {
+                "id": row[0],
+                "field": row[1],
+                "old_value": json.loads(row[2]) if row[2] is not None else None,
+                "new_value": json.loads(row[3]) if row[3] is not None else None,
+                "actor": row[4],
+                "session_id": row[5],
+                "changed_at": row[6],
+            } for row in rows
+        ]
+
+    def claim_outbox(self, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._connection() as conn:
+            # Rows locked by another host's claim are skipped, not waited for
+            rows = conn.execute('''
+                UPDATE outbox SET attempts = attempts + 1, next_attempt_at = %s
+                WHERE id IN (
+                    SELECT id FROM outbox
+                    WHERE status = 'pending' AND next_attempt_at <= %s
+                    ORDER BY id LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, topic, payload, attempts
+            ''', (now + lease_seconds, now, limit)).fetchall()
+
+        return [
+            {"id": row[0], "topic": row[1], "payload": json.loads(row[2]), "attempts": row[3]}
+            for row in sorted(rows)
+        ]
+
+    def complete_outbox(self, message_ids: List[int]):
+        with self._connection() as conn:
+            conn.execute("UPDATE outbox SET status = 'sent', sent_at = %s, last_error = NULL WHERE id = ANY(%s)",
+                         (datetime.now().isoformat(), list(message_ids)))
+
+    def fail_outbox(self, message_id: int, error: str, retry_at: Optional[float]):
+        with self._connection() as conn:
+            if retry_at is None:
+                conn.execute("UPDATE outbox SET status = 'dead', last_error = %s WHERE id = %s",
+                             (error, message_id))
+            else:
+                conn.execute("UPDATE outbox SET next_attempt_at = %s, last_error = %s WHERE id = %s",
+                             (retry_at, error, message_id))
+
+    def get_outbox_stats(self) -> Dict[str, int]:
+        with self._connection() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def get_all_tickets(self, include_archived: bool = False) -> list[Ticket]:
+        with self._connection() as conn:
+            rows = conn.execute(f"SELECT {TICKET_COLUMNS} FROM tickets ORDER BY created_at DESC").fetchall()
+        if include_archived:
+            rows = self._with_archived(rows)
+        return [ticket_from_row(row) for row in rows]
+
+    def get_analytics(self, start_day: Optional[str] = None, end_day: Optional[str] = None) -> Dict[str, Any]:
+        with self._connection() as conn:
+            rows = conn.execute('''
+                SELECT day, issue, tickets, revenue FROM ticket_rollups
+                WHERE day >= %s AND day <= %s AND tickets > 0
+                ORDER BY day, issue
+            ''', (start_day or "", end_day or "9999-12-31")).fetchall()
+        return self._analytics_result(rows)
+
+    def archive_tickets(self, older_than_days: int) -> Dict[str, int]:
+        """Like TicketDatabase.archive_tickets; the archive directory must be shared by all hosts"""
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat()
+        with self._connection() as conn:
+            months = [row[0] for row in conn.execute(
+                "SELECT DISTINCT substr(created_at, 1, 7) FROM tickets WHERE created_at < %s", (cutoff,))]
+
+        archived: Dict[str, int] = {}
+        for month in months:
+            with self._connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT {TICKET_COLUMNS} FROM tickets
+                    WHERE created_at < %s AND substr(created_at, 1, 7) = %s
+                ''', (cutoff, month)).fetchall()
+            self.archive.write(month, rows)
+
+            # Only remove rows that were not changed while the partition was written
+            removed = 0
+            with self._connection() as conn:
+                for row in rows:
+                    deleted = conn.execute('''
+                        DELETE FROM tickets WHERE id = %s AND name = %s AND email = %s AND phone = %s
+                        AND address = %s AND issue = %s AND price = %s AND created_at = %s
+                    ''', row).rowcount
+                    if deleted:
+                        removed += 1
+                        conn.execute('''
+                            INSERT INTO archive_index (ticket_id, month) VALUES (%s, %s)
+                            ON CONFLICT (ticket_id) DO UPDATE SET month = EXCLUDED.month
+                        ''', (row[0], month))
+            archived[month] = removed
+
+        return archived
@@ -0,0 +1,112 @@
+"""
+Voice Pipeline Provider Registry
+
+This module maps provider names to factories for the STT, LLM and TTS
+components used by the voice bot session, so the stack can be selected
+from configuration (e.g. OpenAI in production, offline stand-ins for
+load testing) instead of being hardwired in the entrypoint.
+"""
+
+import logging
+from typing import Any, Callable, Dict, Optional
+
+from config import PROVIDER_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# kind ("stt", "llm", "tts") -> provider name -> factory(settings) -> component
+PROVIDERS: Dict[str, Dict[str, Callable[[dict], Any]]] = {
+    "stt": {},
+    "llm": {},
+    "tts": {},
+}
+
+
+def register_provider(kind: str, name: str):
+    """Decorator registering a factory for a provider kind under a name"""
+    if kind not in PROVIDERS:
+        raise ValueError(f"Unknown provider kind: {kind}")
+
+    def decorator(factory: Callable[[dict], Any]):
+        PROVIDERS[kind][name] = factory
+        return factory
+
+    return decorator
+
+
+def build_provider(kind: str, settings: Optional[dict] = None):
+    """Create a component of the given kind from its configuration settings"""
+    settings = dict(settings if settings is not None else PROVIDER_CONFIG[kind])
+    name = settings.pop("provider", "openai")
+    try:
+        factory = PROVIDERS[kind][name]
+    except KeyError:
+        available = ", ".join(sorted(PROVIDERS[kind]))
+        raise ValueError(f"Unknown {kind} provider '{name}' (available: {available})")
+    logger.info(f"Using {kind.upper()} provider: {name}")
+    return factory(settings)
+
+
+def build_stt(settings: Optional[dict] = None):
+    return build_provider("stt", settings)
+
+
+def build_llm(settings: Optional[dict] = None):
+    return build_provider("llm", settings)
+
+
+def build_tts(settings: Optional[dict] = None):
+    return build_provider("tts", settings)
+
+
+# OpenAI providers (production). Plugins are imported inside the factories
+# so offline runs never need the OpenAI plugin or an API key.
+
+@register_provider("stt", "openai")
+def _openai_stt(settings: dict):
+    from livekit.plugins import openai
+    return openai.STT(model=settings["model"], language=settings["language"])
+
+
+@register_provider("llm", "openai")
+def _openai_llm(settings: dict):
+    from livekit.plugins import openai
+    return openai.LLM(model=settings["model"], temperature=settings["temperature"])
+
+
+@register_provider("tts", "openai")
+def _openai_tts(settings: dict):
+    from livekit.plugins import openai
+    return openai.TTS(model=settings["model"], voice=settings["voice"])
+
+
+# Offline stand-ins (load testing)
+
+@register_provider("stt", "fake")
+def _fake_stt(settings: dict):
+    from fake_providers import FakeSTT
+    return FakeSTT()
+
+
+@register_provider("llm", "fake")
+def _fake_llm(settings: dict):
+    from fake_providers import FakeLLM
+    return FakeLLM()
+
+
+@register_provider("tts", "fake")
+def _fake_tts(settings: dict):
+    from fake_providers import FakeTTS
+    return FakeTTS()
+
+
+# Stage-aware routing between a fast and a capable LLM
+
+@register_provider("llm", "router")
+def _router_llm(settings: dict):
+    from config import ROUTING_CONFIG
+    from llm_router import RoutingLLM
+    return RoutingLLM(
+        fast=build_llm(ROUTING_CONFIG["fast"]),
+        capable=build_llm(ROUTING_CONFIG["capable"]),
+    )
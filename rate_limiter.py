@@ -0,0 +1,64 @@
+"""
+Rate Limiting
+
+This module contains a keyed token-bucket rate limiter used to protect
+the web endpoints (e.g. /get-token) from retry storms.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+
+class TokenBucket:
+    """Single token bucket refilled continuously at `rate` tokens per second"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+    
+    def consume(self, amount: float = 1.0) -> Tuple[bool, float]:
+        """Try to take `amount` tokens; return (allowed, seconds until allowed)"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True, 0.0
+        
+        if self.rate <= 0:
+            return False, float("inf")
+        return False, (amount - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter keyed by an arbitrary string (client IP, room name, ...)
+    
+    Buckets are kept in an LRU map bounded by `max_keys` so a flood of
+    distinct keys cannot grow memory without limit.
+    """
+    
+    def __init__(self, rate: float, burst: int, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def check(self, key: str) -> Tuple[bool, float]:
+        """Consume one token for `key`; return (allowed, retry_after_seconds)"""
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.consume()
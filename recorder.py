@@ -0,0 +1,210 @@
+"""
+Call Audio Recorder
+
+This module records the caller and bot audio of a call for QA without
+holding the call in memory. Each track (the agent, and one per remote
+participant) is cut into fixed-size PCM chunks that a background task
+per track compresses and appends to disk
+(`<room>-<session>/<track>.wav.gz`, one gzip member per chunk;
+`zcat agent.wav.gz > agent.wav` gives a playable file).
+
+Memory stays bounded: each track queues at most `max_buffered_chunks`
+chunks. Recording never waits: agent audio is forwarded to the room
+before it is recorded, and when the queue is full the chunk is dropped,
+so a slow disk never stalls the live audio. Bytes recorded, written and
+dropped are accounted per session and under `recording.*` in metrics.
+"""
+
+import asyncio
+import gzip
+import logging
+import os
+import re
+import struct
+import time
+import uuid
+from typing import Dict, Optional
+
+from config import RECORDING_CONFIG
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def wav_header(sample_rate: int, num_channels: int) -> bytes:
+    """16-bit PCM WAV header with open-ended (maximum) data sizes"""
+    byte_rate = sample_rate * num_channels * 2
+    return (b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, num_channels, sample_rate, byte_rate,
+                                    num_channels * 2, 16)
+            + b"data" + struct.pack("<I", 0xFFFFFFFF))
+
+
+def caller_track(identity: str) -> str:
+    """Track name for a remote participant, safe to use as a file name"""
+    return "caller-" + (re.sub(r"[^\w.-]", "_", identity) or "unknown")
+
+
+class TrackWriter:
+    """Chunks, queues and writes one audio track"""
+
+    def __init__(self, recorder: "CallRecorder", name: str):
+        self.recorder = recorder
+        self.name = name
+        self.path = os.path.join(recorder.directory, f"{name}.wav.gz")
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=RECORDING_CONFIG["max_buffered_chunks"])
+        self.pending = bytearray()
+        self.header: Optional[bytes] = None
+        self.bytes_in = 0
+        self.bytes_written = 0
+        self.bytes_dropped = 0
+        self.task = asyncio.create_task(self._drain())
+
+    def write(self, pcm: bytes, sample_rate: int, num_channels: int):
+        if self.header is None:
+            self.header = wav_header(sample_rate, num_channels)
+            self.pending += self.header
+        self.bytes_in += len(pcm)
+        self.pending += pcm
+        if len(self.pending) >= RECORDING_CONFIG["chunk_bytes"]:
+            chunk, self.pending = bytes(self.pending), bytearray()
+            self._enqueue(chunk)
+
+    def _enqueue(self, chunk: bytes):
+        try:
+            self.queue.put_nowait(chunk)
+        except asyncio.QueueFull:
+            # The disk is behind; drop rather than hold up live audio
+            self.bytes_dropped += len(chunk)
+            metrics.increment("recording.chunks_dropped")
+            metrics.increment("recording.bytes_dropped", len(chunk))
+
+    def _append(self, chunk: bytes) -> int:
+        data = gzip.compress(chunk, compresslevel=RECORDING_CONFIG["compression_level"])
+        with open(self.path, "ab") as f:
+            f.write(data)
+        return len(data)
+
+    async def _drain(self):
+        while True:
+            chunk = await self.queue.get()
+            if chunk is None:
+                return
+            try:
+                written = await asyncio.to_thread(self._append, chunk)
+                self.bytes_written += written
+                metrics.increment("recording.bytes_written", written)
+            except Exception as e:
+                self.bytes_dropped += len(chunk)
+                logger.error(f"Error writing {self.name} recording: {e}")
+
+    async def close(self):
+        if self.pending:
+            chunk, self.pending = bytes(self.pending), bytearray()
+            await self.queue.put(chunk)
+        await self.queue.put(None)
+        await self.task
+
+
+class CallRecorder:
+    """Records the audio tracks of one call"""
+
+    def __init__(self, room: str, directory: Optional[str] = None):
+        self.session_id = uuid.uuid4().hex[:12]
+        self.directory = os.path.join(directory or RECORDING_CONFIG["directory"],
+                                      f"{room}-{self.session_id}")
+        os.makedirs(self.directory, exist_ok=True)
+        self.tracks: Dict[str, TrackWriter] = {}
+        self.started_at = time.monotonic()
+        self.closed = False
+        self._limit_logged = False
+
+    @property
+    def bytes_in(self) -> int:
+        return sum(track.bytes_in for track in self.tracks.values())
+
+    def write(self, track: str, pcm: bytes, sample_rate: int, num_channels: int = 1):
+        """Record PCM16 audio for a track ("agent", "caller-<identity>"); never blocks"""
+        if self.closed:
+            return
+        if self.bytes_in + len(pcm) > RECORDING_CONFIG["max_session_bytes"]:
+            if not self._limit_logged:
+                self._limit_logged = True
+                logger.warning(f"🎙️ Recording size limit reached for {self.directory}")
+            metrics.increment("recording.bytes_dropped", len(pcm))
+            return
+        if track not in self.tracks:
+            self.tracks[track] = TrackWriter(self, track)
+        self.tracks[track].write(pcm, sample_rate, num_channels)
+        metrics.increment("recording.bytes_in", len(pcm))
+
+    def write_frame(self, track: str, frame):
+        """Record an rtc.AudioFrame"""
+        self.write(track, bytes(frame.data), frame.sample_rate, frame.num_channels)
+
+    def record_stream(self, track: str, audio_stream) -> asyncio.Task:
+        """Record every frame of an rtc.AudioStream in the background"""
+        async def pump():
+            async for event in audio_stream:
+                if self.closed:
+                    break
+                self.write_frame(track, event.frame)
+
+        return asyncio.create_task(pump())
+
+    def stats(self) -> dict:
+        return {
+            name: {"bytes_in": t.bytes_in, "bytes_written": t.bytes_written, "bytes_dropped": t.bytes_dropped}
+            for name, t in self.tracks.items()
+        }
+
+    async def close(self):
+        """Flush and close every track"""
+        if self.closed:
+            return
+        self.closed = True
+        await asyncio.gather(*(track.close() for track in self.tracks.values()))
+        stats = self.stats()
+        written = sum(s["bytes_written"] for s in stats.values())
+        dropped = sum(s["bytes_dropped"] for s in stats.values())
+        metrics.increment("recording.sessions")
+        logger.info(f"🎙️ Recording saved to {self.directory}: {self.bytes_in} bytes in, "
+                    f"{written} written, {dropped} dropped")
+
+
+def attach_recorder(room, session, recorder: CallRecorder):
+    """Record the caller's audio tracks and the agent's audio output"""
+    from livekit import rtc
+    from livekit.agents.voice import io
+
+    class RecordingAudioOutput(io.AudioOutput):
+        """Passes agent audio through to the room while recording it"""
+
+        def __init__(self, next_in_chain: io.AudioOutput):
+            super().__init__(label="CallRecorder", capabilities=io.AudioOutputCapabilities(pause=True),
+                             next_in_chain=next_in_chain, sample_rate=next_in_chain.sample_rate)
+
+        async def capture_frame(self, frame: rtc.AudioFrame) -> None:
+            await super().capture_frame(frame)
+            await self.next_in_chain.capture_frame(frame)
+            recorder.write_frame("agent", frame)
+
+        def flush(self) -> None:
+            super().flush()
+            self.next_in_chain.flush()
+
+        def clear_buffer(self) -> None:
+            self.next_in_chain.clear_buffer()
+
+    if session.output.audio is not None:
+        session.output.audio = RecordingAudioOutput(session.output.audio)
+
+    def on_track_subscribed(track, publication, participant):
+        if track.kind == rtc.TrackKind.KIND_AUDIO:
+            recorder.record_stream(caller_track(participant.identity), rtc.AudioStream(track))
+
+    room.on("track_subscribed", on_track_subscribed)
+    for participant in room.remote_participants.values():
+        for publication in participant.track_publications.values():
+            if publication.track is not None:
+                on_track_subscribed(publication.track, publication, participant)
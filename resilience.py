@@ -0,0 +1,264 @@
+"""
+Provider Resilience
+
+This module keeps a slow or failing model provider from leaving the
+caller in silence:
+
+- every LLM request has a first-token and a total deadline
+- each provider/model in a call's chain has a circuit breaker that fails
+  requests fast after repeated errors and lets a probe through after a
+  cool-down, even while FallbackAdapter's background recovery check
+  marks the provider available again
+- requests fall back through an ordered chain of alternates (configured
+  in RESILIENCE_CONFIG), ending with a canned spoken phrase for the LLM
+
+Breaker trips, rejections and fallbacks are recorded in metrics under
+`resilience.*`.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import List, Optional
+
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    APIConnectionError,
+    APIConnectOptions,
+    APITimeoutError,
+    llm,
+    stt,
+    tts,
+)
+
+from config import PROVIDER_CONFIG, RESILIENCE_CONFIG
+from metrics import metrics
+from providers import build_provider
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker for one provider or model
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    rejects requests for `reset_timeout` seconds, then lets a single probe
+    through (half-open); a success closes it again, a failure re-opens it.
+    """
+
+    def __init__(self, label: str, failure_threshold: Optional[int] = None,
+                 reset_timeout: Optional[float] = None):
+        self.label = label
+        self.failure_threshold = failure_threshold or RESILIENCE_CONFIG["breaker"]["failure_threshold"]
+        self.reset_timeout = reset_timeout or RESILIENCE_CONFIG["breaker"]["reset_timeout"]
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+            logger.info(f"🔌 Circuit half-open for {self.label}, probing")
+            return True
+        if self.state == "half_open":
+            return False  # one probe at a time
+        return True
+
+    def record_success(self):
+        if self.state != "closed":
+            logger.info(f"🔌 Circuit closed for {self.label}")
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                metrics.increment(f"resilience.breaker.{self.label}.trips")
+                logger.warning(f"🔌 Circuit opened for {self.label} after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def record_abandoned(self):
+        """A request ended without an outcome (e.g. cancelled by a barge-in)"""
+        if self.state == "half_open":
+            # The probe never finished; stay open so the next request probes
+            self.state = "open"
+
+
+def provider_label(kind: str, settings: dict) -> str:
+    return f"{kind}.{settings.get('provider', 'openai')}.{settings.get('model', 'default')}"
+
+
+class GuardedLLM(llm.LLM):
+    """Applies deadlines and a circuit breaker to one LLM in a fallback chain"""
+
+    def __init__(self, wrapped: llm.LLM, label: str, position: int):
+        super().__init__()
+        self.wrapped = wrapped
+        self._label = label
+        self.position = position
+        # One breaker per link: job processes are single-use, so this is per call
+        self.breaker = CircuitBreaker(label)
+        self.first_token_timeout = RESILIENCE_CONFIG["llm"]["first_token_timeout"]
+        self.timeout = RESILIENCE_CONFIG["llm"]["timeout"]
+        wrapped.on("metrics_collected", lambda m: self.emit("metrics_collected", m))
+
+    @property
+    def label(self) -> str:
+        return self._label
+
+    @property
+    def model(self) -> str:
+        return self.wrapped.model
+
+    def chat(self, *, chat_ctx: llm.ChatContext, tools=None,
+             conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS, **kwargs) -> "GuardedLLMStream":
+        return GuardedLLMStream(self, chat_ctx=chat_ctx, tools=tools or [],
+                                conn_options=conn_options, extra_kwargs=kwargs)
+
+    async def aclose(self) -> None:
+        await self.wrapped.aclose()
+
+
+class GuardedLLMStream(llm.LLMStream):
+    """Forwards the wrapped LLM's chunks, enforcing deadlines and the breaker"""
+
+    def __init__(self, guarded: GuardedLLM, *, chat_ctx, tools, conn_options, extra_kwargs):
+        super().__init__(guarded, chat_ctx=chat_ctx, tools=tools, conn_options=conn_options)
+        self._extra_kwargs = extra_kwargs
+
+    async def _run(self) -> None:
+        guarded: GuardedLLM = self._llm
+        if not guarded.breaker.allow():
+            metrics.increment(f"resilience.{guarded.label}.rejected")
+            raise APIConnectionError(f"circuit open for {guarded.label}", retryable=False)
+
+        inner = guarded.wrapped.chat(
+            chat_ctx=self._chat_ctx,
+            tools=self._tools,
+            conn_options=APIConnectOptions(max_retry=0, timeout=guarded.timeout),
+            **self._extra_kwargs,
+        )
+        deadline = time.monotonic() + guarded.timeout
+        first = True
+        recorded = False
+        try:
+            iterator = inner.__aiter__()
+            while True:
+                remaining = deadline - time.monotonic()
+                wait = min(remaining, guarded.first_token_timeout) if first else remaining
+                if wait <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    chunk = await asyncio.wait_for(iterator.__anext__(), wait)
+                except StopAsyncIteration:
+                    break
+                first = False
+                self._event_ch.send_nowait(chunk)
+            recorded = True
+            guarded.breaker.record_success()
+        except asyncio.TimeoutError:
+            recorded = True
+            guarded.breaker.record_failure()
+            metrics.increment(f"resilience.{guarded.label}.timeouts")
+            raise APITimeoutError(f"{guarded.label} missed its deadline")
+        except Exception as e:
+            recorded = True
+            guarded.breaker.record_failure()
+            metrics.increment(f"resilience.{guarded.label}.errors")
+            raise APIConnectionError(f"{guarded.label} failed: {e}")
+        finally:
+            # Cancellation is a BaseException and skips the handlers above
+            if not recorded:
+                guarded.breaker.record_abandoned()
+            await inner.aclose()
+
+        metrics.increment(f"resilience.{guarded.label}.served")
+        if guarded.position > 0:
+            metrics.increment("resilience.llm.fallbacks")
+
+
+class CannedPhraseLLM(llm.LLM):
+    """Last link of the LLM chain: always answers with a fixed phrase"""
+
+    def __init__(self, phrase: str):
+        super().__init__()
+        self.phrase = phrase
+
+    @property
+    def model(self) -> str:
+        return "canned-phrase"
+
+    def chat(self, *, chat_ctx: llm.ChatContext, tools=None,
+             conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS, **kwargs) -> "CannedPhraseStream":
+        return CannedPhraseStream(self, chat_ctx=chat_ctx, tools=tools or [], conn_options=conn_options)
+
+
+class CannedPhraseStream(llm.LLMStream):
+    async def _run(self) -> None:
+        metrics.increment("resilience.llm.canned_replies")
+        logger.warning("All LLM providers failed, speaking canned phrase")
+        self._event_ch.send_nowait(llm.ChatChunk(
+            id=f"canned-{uuid.uuid4().hex[:12]}",
+            delta=llm.ChoiceDelta(role="assistant", content=self._llm.phrase),
+        ))
+
+
+def _record_availability(kind: str):
+    def on_availability_changed(event):
+        provider = getattr(event, kind)
+        label = f"{kind}.{getattr(provider, 'model', type(provider).__name__)}"
+        if event.available:
+            logger.info(f"✅ {label} available again")
+            metrics.increment(f"resilience.{label}.recoveries")
+        else:
+            logger.warning(f"⚠️  {label} marked unavailable, falling back")
+            metrics.increment(f"resilience.{label}.trips")
+    return on_availability_changed
+
+
+def resilient_llm(primary: llm.LLM, settings: Optional[dict] = None) -> llm.LLM:
+    """Wrap the primary LLM in a guarded fallback chain ending in a canned phrase"""
+    settings = settings or PROVIDER_CONFIG["llm"]
+    config = RESILIENCE_CONFIG["llm"]
+    chain: List[llm.LLM] = [GuardedLLM(primary, provider_label("llm", settings), 0)]
+    for position, fallback in enumerate(config["fallbacks"], start=1):
+        chain.append(GuardedLLM(build_provider("llm", fallback), provider_label("llm", fallback), position))
+    chain.append(CannedPhraseLLM(config["canned_phrase"]))
+
+    adapter = llm.FallbackAdapter(
+        chain,
+        attempt_timeout=config["timeout"],
+        max_retry_per_llm=0,
+        retry_interval=0.1,
+    )
+    adapter.on("llm_availability_changed", _record_availability("llm"))
+    return adapter
+
+
+def resilient_stt(primary: stt.STT, vad=None) -> stt.STT:
+    """Put the primary STT in front of its configured fallbacks"""
+    config = RESILIENCE_CONFIG["stt"]
+    chain = [primary] + [build_provider("stt", fallback) for fallback in config["fallbacks"]]
+    if len(chain) == 1:
+        return primary
+    # Non-streaming STTs (e.g. Whisper) need the VAD to segment audio
+    adapter = stt.FallbackAdapter(chain, vad=vad, attempt_timeout=config["timeout"], max_retry_per_stt=0)
+    adapter.on("stt_availability_changed", _record_availability("stt"))
+    return adapter
+
+
+def resilient_tts(primary: tts.TTS) -> tts.TTS:
+    """Put the primary TTS in front of its configured fallbacks"""
+    config = RESILIENCE_CONFIG["tts"]
+    chain = [primary] + [build_provider("tts", fallback) for fallback in config["fallbacks"]]
+    if len(chain) == 1:
+        return primary
+    adapter = tts.FallbackAdapter(chain, max_retry_per_tts=0)
+    adapter.on("tts_availability_changed", _record_availability("tts"))
+    return adapter
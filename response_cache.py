@@ -0,0 +1,200 @@
+"""
+Response Cache
+
+This module answers repeated off-flow questions ("what do you support?",
+"how much is the printer fix?") without an LLM call:
+
+- catalog and price questions are answered directly from
+  config.SUPPORTED_ISSUES
+- the model's answers to general policy questions (GENERIC_INTENTS:
+  opening hours, remote support, typical turnaround, payment, warranty)
+  are cached per conversation stage and intent and reused for the same
+  or a similarly worded question (cosine similarity of local
+  word/character-trigram vectors)
+
+Learned entries expire after a TTL and are evicted LRU. Only
+context-free answers are learned: utterances outside GENERIC_INTENTS
+("could you repeat that?", "yes", "what was the ticket number?") never
+are, and neither is anything from the confirming/completed stages,
+anything containing digits (ticket IDs, quoted prices, phone numbers,
+house numbers) or anything mentioning the caller's collected details.
+
+LiveKit job processes are single-use, so the cache lives for one call:
+learned answers help when a caller repeats a question, while the
+catalog and price answers are computed from configuration every time.
+"""
+
+import logging
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Optional, Tuple
+
+from config import RESPONSE_CACHE_CONFIG, SUPPORTED_ISSUES
+from conversation import QUESTION_PATTERN, detect_issue
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PRICE_PATTERN = re.compile(r"\b(how much|cost|costs|price|prices|fee|fees|charge|pay)\b", re.IGNORECASE)
+# Stages whose answers are about this caller's ticket, never reusable
+UNCACHEABLE_STAGES = {"confirming", "completed"}
+DIGITS_PATTERN = re.compile(r"\d")
+# Questions whose answer does not depend on the caller or the conversation
+GENERIC_INTENTS = {
+    "hours": re.compile(r"\b(opening hours|business hours|open on|weekends?|saturdays?|sundays?|holidays?)\b",
+                        re.IGNORECASE),
+    "remote": re.compile(r"\b(remote(ly)?|remote sessions?|on-?site|house calls?)\b", re.IGNORECASE),
+    "turnaround": re.compile(r"\bhow long\b.*\b(usually|normally|typically|generally|on average)\b",
+                             re.IGNORECASE),
+    "payment": re.compile(r"\b(credit cards?|debit cards?|cash|invoices?|payment methods?)\b", re.IGNORECASE),
+    "warranty": re.compile(r"\b(warranty|guarantee)\b", re.IGNORECASE),
+}
+# References to earlier turns make any question context-dependent
+CONTEXT_PATTERN = re.compile(r"\b(repeat|again|you said|was that|what was)\b", re.IGNORECASE)
+STOPWORDS = {"the", "a", "an", "is", "are", "do", "does", "you", "your", "i", "me", "my", "to",
+             "of", "for", "and", "it", "that", "this", "can", "could", "please", "um", "uh"}
+
+CATALOG_QUESTIONS = [
+    "what do you support",
+    "what issues do you handle",
+    "what can you help me with",
+    "what services do you offer",
+    "which problems can you fix",
+    "what kind of issues do you support",
+]
+
+
+def normalize_utterance(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def embed(text: str) -> Dict[str, float]:
+    """Sparse unit vector of content words and character trigrams"""
+    normalized = normalize_utterance(text)
+    words = [w for w in normalized.split() if w not in STOPWORDS]
+    features = Counter(f"w:{w}" for w in words)
+    for word in words:
+        padded = f" {word} "
+        features.update(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    norm = math.sqrt(sum(v * v for v in features.values())) or 1.0
+    return {k: v / norm for k, v in features.items()}
+
+
+def cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+def is_off_flow_question(text: str, new_fields: dict) -> bool:
+    """A question that did not also provide customer details"""
+    return bool(QUESTION_PATTERN.search(text)) and not new_fields
+
+
+def generic_intent(text: str) -> Optional[str]:
+    """The GENERIC_INTENTS name an utterance asks about, or None if its answer may depend on context"""
+    if CONTEXT_PATTERN.search(text):
+        return None
+    for intent, pattern in GENERIC_INTENTS.items():
+        if pattern.search(text):
+            return intent
+    return None
+
+
+def catalog_answer() -> str:
+    issues = ", ".join(f"{issue} for ${price:.0f}" for issue, price in SUPPORTED_ISSUES.items())
+    return f"We handle four issues: {issues}. Which one are you having?"
+
+
+def price_answer(issue: str) -> str:
+    return f"The service fee for {issue} is ${SUPPORTED_ISSUES[issue]:.0f}."
+
+
+class ResponseCache:
+    """Stage-keyed cache of answers with exact and similarity lookup"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 threshold: Optional[float] = None):
+        self.max_entries = max_entries or RESPONSE_CACHE_CONFIG["max_entries"]
+        self.ttl = ttl or RESPONSE_CACHE_CONFIG["ttl_seconds"]
+        self.threshold = threshold or RESPONSE_CACHE_CONFIG["similarity_threshold"]
+        # (stage, intent, normalized utterance) -> (vector, answer, expires_at)
+        self._entries: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        self._catalog_vectors = [embed(q) for q in CATALOG_QUESTIONS]
+
+    def _builtin(self, text: str) -> Optional[str]:
+        if PRICE_PATTERN.search(text):
+            issue = detect_issue(text)
+            if issue:
+                return price_answer(issue)
+        vector = embed(text)
+        if max(cosine(vector, c) for c in self._catalog_vectors) >= self.threshold:
+            return catalog_answer()
+        return None
+
+    def lookup(self, text: str, stage: str) -> Optional[str]:
+        """Return a cached answer for an utterance at a stage, or None"""
+        metrics.increment("response_cache.lookups")
+        answer = self._builtin(text)
+        if answer:
+            metrics.increment("response_cache.hits.catalog")
+            return answer
+
+        intent = generic_intent(text)
+        if intent is None:
+            metrics.increment("response_cache.misses")
+            return None
+
+        now = time.monotonic()
+        key = (stage, intent, normalize_utterance(text))
+        entry = self._entries.get(key)
+        if entry and entry[2] > now:
+            self._entries.move_to_end(key)
+            metrics.increment("response_cache.hits.exact")
+            return entry[1]
+
+        vector = embed(text)
+        best_key, best_score = None, 0.0
+        for entry_key, (entry_vector, _, expires_at) in self._entries.items():
+            if entry_key[:2] != (stage, intent) or expires_at <= now:
+                continue
+            score = cosine(vector, entry_vector)
+            if score > best_score:
+                best_key, best_score = entry_key, score
+        if best_key is not None and best_score >= self.threshold:
+            self._entries.move_to_end(best_key)
+            metrics.increment("response_cache.hits.similar")
+            return self._entries[best_key][1]
+
+        metrics.increment("response_cache.misses")
+        return None
+
+    def store(self, text: str, stage: str, answer: str, collected_info: Optional[dict] = None):
+        """Cache a model answer to a generic question unless it is specific to the caller or their ticket"""
+        intent = generic_intent(text)
+        if (intent is None or not answer.strip() or stage in UNCACHEABLE_STAGES
+                or DIGITS_PATTERN.search(answer)):
+            metrics.increment("response_cache.rejected")
+            return
+        for value in (collected_info or {}).values():
+            if isinstance(value, str) and value and value.lower() in answer.lower():
+                metrics.increment("response_cache.rejected")
+                return
+        key = (stage, intent, normalize_utterance(text))
+        self._entries[key] = (embed(text), answer, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        metrics.increment("response_cache.stores")
+
+    def hit_rate(self) -> float:
+        lookups = metrics.counter("response_cache.lookups")
+        hits = sum(metrics.counter(f"response_cache.hits.{kind}")
+                   for kind in ("catalog", "exact", "similar"))
+        return hits / lookups if lookups else 0.0
+
+
+# Module-level cache; with single-use job processes it serves one call
+response_cache = ResponseCache()
@@ -16,11 +16,14 @@ def main():
             # Run web interface only
             subprocess.run([sys.executable, '-c', 
                           "from web_interface import app; import uvicorn; uvicorn.run(app, host='0.0.0.0', port=8000)"])
+        elif mode in ['all', 'voice']:
+            # Run supervised worker pool
+            subprocess.run([sys.executable, 'main.py', mode] + sys.argv[2:])
         else:
             print(f"Unknown mode: {mode}")
-            print("Available modes: dev, start, console, web")
+            print("Available modes: dev, start, console, web, all, voice")
     else:
-        # Run main application with menu
+        # Run web interface and voice bot under the supervisor
         subprocess.run([sys.executable, 'main.py'])
 
 if __name__ == "__main__":
@@ -23,8 +23,8 @@ def setup_database():
     """Initialize the database"""
     print("Setting up database...")
     try:
-        from database import db
-        # Database is automatically initialized when imported
+        from database import get_db
+        get_db()
         print("✅ Database initialized successfully")
         return True
     except Exception as e:
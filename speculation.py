@@ -0,0 +1,123 @@
+"""
+Speculative Reply Generation
+
+This module starts the LLM as soon as a final transcript arrives, while
+the session is still waiting to confirm the end of the user's turn. If
+the committed turn matches the transcript, the agent's llm_node replays
+the speculative stream (already partly or fully generated) instead of
+starting a new request. If the user keeps talking or the text differs,
+the speculation is cancelled.
+
+Counters: speculation.started, .hits, .wasted; histogram
+speculation.latency_saved_seconds. Each call logs its hit rate and the
+latency saved in its call summary (call_summary.py).
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Optional
+
+from config import SPECULATION_CONFIG
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def normalize(text: str) -> str:
+    """Compare transcripts ignoring case, punctuation and spacing"""
+    return " ".join(re.sub(r"[^\w\s@.-]", " ", text.lower()).split()).strip(" .")
+
+
+class Speculation:
+    """One in-flight speculative LLM generation"""
+
+    def __init__(self, user_text: str):
+        self.user_text = user_text
+        self.key = normalize(user_text)
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+    async def run(self, llm_instance, chat_ctx, tools):
+        try:
+            async with llm_instance.chat(chat_ctx=chat_ctx, tools=tools) as stream:
+                async for chunk in stream:
+                    self.queue.put_nowait(chunk)
+            self.queue.put_nowait(_DONE)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.queue.put_nowait(e)
+        finally:
+            self.finished_at = time.perf_counter()
+
+    async def chunks(self):
+        """Yield the buffered chunks, then the rest as they are generated"""
+        while True:
+            item = await self.queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def cancel(self):
+        if self.task and not self.task.done():
+            self.task.cancel()
+
+
+class Speculator:
+    """Holds at most one speculation per session"""
+
+    def __init__(self):
+        self.pending: Optional[Speculation] = None
+
+    @property
+    def enabled(self) -> bool:
+        return SPECULATION_CONFIG["enabled"]
+
+    def start(self, user_text: str, llm_instance, chat_ctx, tools):
+        """Begin generating a reply for a tentative final transcript"""
+        if len(user_text.split()) < SPECULATION_CONFIG["min_words"]:
+            return
+        if self.pending and self.pending.key == normalize(user_text):
+            return  # already speculating on this text
+        self.discard("superseded by a newer transcript")
+
+        speculation = Speculation(user_text)
+        speculation.task = asyncio.create_task(speculation.run(llm_instance, chat_ctx, tools))
+        self.pending = speculation
+        metrics.increment("speculation.started")
+        logger.info(f"🔮 Speculating on: {user_text}")
+
+    def discard(self, reason: str):
+        """Cancel the pending speculation (the user kept talking, etc.)"""
+        if self.pending is None:
+            return
+        self.pending.cancel()
+        metrics.increment("speculation.wasted")
+        logger.info(f"🔮 Speculation discarded: {reason}")
+        self.pending = None
+
+    def take(self, user_text: str) -> Optional[Speculation]:
+        """Return the speculation if it matches the committed turn, else discard it"""
+        speculation = self.pending
+        if speculation is None:
+            return None
+        self.pending = None
+        if speculation.key != normalize(user_text):
+            speculation.cancel()
+            metrics.increment("speculation.wasted")
+            logger.info("🔮 Speculation discarded: committed turn differs")
+            return None
+
+        now = time.perf_counter()
+        end = min(now, speculation.finished_at or now)
+        metrics.increment("speculation.hits")
+        metrics.observe("speculation.latency_saved_seconds", end - speculation.started_at)
+        return speculation
@@ -0,0 +1,250 @@
+"""
+Process Supervisor
+
+This module starts the web interface, voice bot and background services
+(notification outbox, backups) as a pool of worker processes, restarts workers that exit or stop
+heartbeating, and drains them gracefully on SIGTERM/SIGINT.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Spawned (not forked) children so each worker starts from a clean interpreter
+mp = multiprocessing.get_context("spawn")
+
+
+def default_worker_counts(cpu_count: Optional[int] = None) -> Tuple[int, int]:
+    """Size (web_workers, voice_workers) to the host's CPU count"""
+    cpus = cpu_count or os.cpu_count() or 1
+    web_workers = max(1, cpus // 4)
+    voice_workers = max(1, cpus - web_workers)
+    return web_workers, voice_workers
+
+
+def run_web_worker(sock: socket.socket, heartbeat, interval: float):
+    """Serve the FastAPI app on a socket shared with the other web workers"""
+    import uvicorn
+
+    config = uvicorn.Config("web_interface:app", log_level="info")
+    server = uvicorn.Server(config)
+
+    async def beat():
+        # Runs on the server's event loop, so a stalled loop stops the heartbeat
+        while not server.should_exit:
+            heartbeat.value = time.time()
+            await asyncio.sleep(interval)
+
+    async def serve():
+        beat_task = asyncio.create_task(beat())
+        try:
+            await server.serve(sockets=[sock])
+        finally:
+            beat_task.cancel()
+
+    asyncio.run(serve())
+
+
+def voice_worker_healthy(health_port: int, timeout: float) -> bool:
+    """Probe a LiveKit worker's HTTP health check (served on its event loop)"""
+    from urllib.error import URLError
+    from urllib.request import urlopen
+
+    try:
+        with urlopen(f"http://127.0.0.1:{health_port}/", timeout=timeout) as response:
+            return response.status == 200
+    except (URLError, OSError):
+        return False
+
+
+def run_voice_worker(health_port: int, heartbeat, interval: float):
+    """Run one LiveKit agent worker in production mode"""
+    import threading
+    from livekit.agents import cli, WorkerOptions
+    from voice_bot import entrypoint, prewarm
+
+    def beat():
+        while True:
+            # Only beat when the worker's loop answers, so a hung loop (or a
+            # lost LiveKit connection, reported as 503) stops the heartbeat
+            if voice_worker_healthy(health_port, timeout=interval):
+                heartbeat.value = time.time()
+            time.sleep(interval)
+
+    # The agent worker owns its event loop; a thread probes its health check
+    threading.Thread(target=beat, daemon=True).start()
+
+    sys.argv = [sys.argv[0], "start"]
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm, port=health_port))
+
+
+def run_notifier_worker(heartbeat, interval: float):
+    """Deliver queued confirmation emails (notifications.py)"""
+    from notifications import run_outbox_worker
+    run_outbox_worker(heartbeat, interval)
+
+
+def run_backup_worker(heartbeat, interval: float):
+    """Take scheduled online backups of the ticket database (backup.py)"""
+    from backup import run_backup_worker as run_backups
+    run_backups(heartbeat, interval)
+
+
+# Single-process background services, by name
+BACKGROUND_WORKERS = {
+    "notifier": run_notifier_worker,
+    "backup": run_backup_worker,
+}
+
+
+class WorkerSlot:
+    """One supervised worker: how to start it and its restart bookkeeping"""
+
+    def __init__(self, name: str, target: Callable, args: tuple):
+        self.name = name
+        self.target = target
+        self.args = args
+        self.heartbeat = mp.Value("d", 0.0)
+        self.process = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.next_start = 0.0
+
+    def start(self, interval: float):
+        self.heartbeat.value = time.time()
+        self.process = mp.Process(
+            target=self.target,
+            args=self.args + (self.heartbeat, interval),
+            name=self.name,
+        )
+        self.process.start()
+        self.started_at = time.time()
+        logger.info(f"▶️  Started {self.name} (pid {self.process.pid})")
+
+
+class Supervisor:
+    """
+    Supervises web, voice and background worker processes
+
+    Workers are restarted with exponential backoff when they exit or their
+    heartbeat goes stale. On SIGTERM/SIGINT the supervisor stops restarting,
+    forwards SIGTERM to every worker and waits up to `drain_timeout` for
+    in-flight requests and calls to finish before killing stragglers.
+    """
+
+    def __init__(self, config: dict, web_workers: int, voice_workers: int,
+                 background: Sequence[str] = ()):
+        self.config = config
+        self.web_workers = web_workers
+        self.voice_workers = voice_workers
+        self.background = list(background)
+        self.slots: List[WorkerSlot] = []
+        self.sock = None
+        self.draining = False
+
+    def _bind_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.config["host"], self.config["port"]))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _build_slots(self):
+        if self.web_workers:
+            self.sock = self._bind_socket()
+            for i in range(self.web_workers):
+                self.slots.append(WorkerSlot(f"web-{i}", run_web_worker, (self.sock,)))
+        for i in range(self.voice_workers):
+            port = self.config["voice_health_port_base"] + i
+            self.slots.append(WorkerSlot(f"voice-{i}", run_voice_worker, (port,)))
+        for name in self.background:
+            self.slots.append(WorkerSlot(name, BACKGROUND_WORKERS[name], ()))
+
+    def _handle_signal(self, signum, frame):
+        if not self.draining:
+            logger.info(f"Received signal {signum}, draining workers...")
+            self.draining = True
+
+    def _needs_restart(self, slot: WorkerSlot, now: float) -> Optional[str]:
+        if not slot.process.is_alive():
+            return f"exited with code {slot.process.exitcode}"
+        if now - slot.heartbeat.value > self.config["heartbeat_timeout"]:
+            return "heartbeat timed out"
+        return None
+
+    def _restart(self, slot: WorkerSlot, reason: str, now: float):
+        logger.warning(f"⚠️  {slot.name} {reason}, restarting")
+        if slot.process.is_alive():
+            slot.process.terminate()
+            slot.process.join(5)
+            if slot.process.is_alive():
+                slot.process.kill()
+                slot.process.join()
+
+        # Reset backoff for workers that had been running stably for a while
+        if now - slot.started_at > self.config["restart_backoff_max"] * 2:
+            slot.restarts = 0
+        delay = min(self.config["restart_backoff_max"], 0.5 * (2 ** slot.restarts))
+        slot.restarts += 1
+        slot.next_start = now + delay
+        slot.process = None
+
+    def _drain(self):
+        for slot in self.slots:
+            if slot.process and slot.process.is_alive():
+                slot.process.terminate()
+
+        deadline = time.time() + self.config["drain_timeout"]
+        for slot in self.slots:
+            if slot.process:
+                slot.process.join(max(0.0, deadline - time.time()))
+
+        for slot in self.slots:
+            if slot.process and slot.process.is_alive():
+                logger.warning(f"{slot.name} did not drain in time, killing")
+                slot.process.kill()
+                slot.process.join()
+
+        if self.sock:
+            self.sock.close()
+        logger.info("✅ All workers stopped")
+
+    def run(self):
+        """Start all workers and supervise them until a shutdown signal arrives"""
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+        self._build_slots()
+        logger.info(f"Starting {self.web_workers} web worker(s) on "
+                    f"{self.config['host']}:{self.config['port']} and "
+                    f"{self.voice_workers} voice worker(s)"
+                    + (f", plus {', '.join(self.background)}" if self.background else ""))
+
+        interval = self.config["heartbeat_interval"]
+        for slot in self.slots:
+            slot.start(interval)
+
+        while not self.draining:
+            time.sleep(interval)
+            now = time.time()
+            for slot in self.slots:
+                if self.draining:
+                    break
+                if slot.process is None:
+                    if now >= slot.next_start:
+                        slot.start(interval)
+                    continue
+                reason = self._needs_restart(slot, now)
+                if reason:
+                    self._restart(slot, reason, now)
+
+        self._drain()
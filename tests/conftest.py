@@ -0,0 +1,63 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The modules live at the repository root and read their configuration on import
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+_scratch = tempfile.mkdtemp(prefix="helpdesk-tests-")
+os.environ.setdefault("DATABASE_PATH", os.path.join(_scratch, "tickets.db"))
+os.environ.setdefault("ARCHIVE_DIR", os.path.join(_scratch, "archive"))
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh SQLite ticket store, also returned by get_db()"""
+    import database
+
+    store = database.TicketDatabase(str(tmp_path / "tickets.db"), archive_dir=str(tmp_path / "archive"))
+    monkeypatch.setattr(database, "_db", store)
+    yield store
+    store.close()
+
+
+class Client:
+    """Synchronous requests against the web app (httpx's ASGI transport is async only)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def request(self, method, url, **kwargs):
+        import httpx
+
+        async def send():
+            transport = httpx.ASGITransport(app=self.app, client=("127.0.0.1", 5000))
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await http.request(method, url, **kwargs)
+        return asyncio.run(send())
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    """The web app backed by the test database, with fresh token cache and rate limits"""
+    from collections import OrderedDict
+
+    import web_interface
+    from config import RATE_LIMIT_CONFIG
+    from rate_limiter import RateLimiter
+
+    monkeypatch.setattr(web_interface, "token_cache", OrderedDict())
+    for name, key in (("ip_rate_limiter", "per_ip"), ("room_rate_limiter", "per_room")):
+        limits = RATE_LIMIT_CONFIG[key]
+        monkeypatch.setattr(web_interface, name,
+                            RateLimiter(limits["rate"], limits["burst"], RATE_LIMIT_CONFIG["max_keys"]))
+    return Client(web_interface.app)
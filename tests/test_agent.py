@@ -0,0 +1,45 @@
+import asyncio
+import types
+
+from livekit.agents import llm
+
+from agent import ITHelpDeskBot
+from context_manager import message_text
+from tools import VoiceBotState
+
+
+class RecordingSpeculator:
+    enabled = True
+
+    def __init__(self):
+        self.started = None
+
+    def start(self, user_text, llm_instance, chat_ctx, tools):
+        self.started = (user_text, chat_ctx)
+
+    def discard(self, reason):
+        pass
+
+
+def test_speculation_leaves_state_untouched(monkeypatch):
+    monkeypatch.setattr(ITHelpDeskBot, "session", property(lambda self: types.SimpleNamespace(llm=None)))
+    state = VoiceBotState()
+    agent = ITHelpDeskBot(state)
+    agent.speculator = RecordingSpeculator()
+
+    tentative = "My name is John Smith, email john@example.com"
+    agent.on_user_transcribed(tentative, is_final=True)
+
+    assert agent.speculator.started[0] == tentative
+    assert message_text(agent.speculator.started[1].items[-1]) == tentative
+    assert state.conversation_stage == "greeting"
+    assert state.collected_info["name"] is None
+    assert state.last_user_text is None
+
+    # The user kept talking; only the completed turn updates the state
+    final = "My name is Jane Doe, email jane@example.com"
+    message = llm.ChatMessage(role="user", content=[final])
+    asyncio.run(agent.on_user_turn_completed(llm.ChatContext.empty(), message))
+    assert state.collected_info["name"] == "Jane Doe"
+    assert state.collected_info["email"] == "jane@example.com"
+    assert state.conversation_stage == "collecting_details"
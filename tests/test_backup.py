@@ -0,0 +1,55 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import backup
+from database import TicketDatabase
+
+
+def old_ticket(n: int) -> dict:
+    created_at = (datetime.now() - timedelta(days=400)).replace(day=1).isoformat()
+    return {"name": f"Caller {n}", "email": f"caller{n}@example.com", "phone": "555-123-4567",
+            "address": f"{n} Main Street", "issue": "Wi-Fi not working", "price": 20.0,
+            "created_at": created_at}
+
+
+@pytest.fixture
+def archived_db(tmp_path):
+    os.makedirs(tmp_path / "live")
+    db = TicketDatabase(str(tmp_path / "live" / "tickets.db"), archive_dir=str(tmp_path / "live" / "archive"))
+    first, last = db.bulk_create_tickets([old_ticket(0), old_ticket(1)])["id_ranges"][0]
+    db.bulk_create_tickets([dict(old_ticket(2), created_at=datetime.now().isoformat())])
+    assert sum(db.archive_tickets(older_than_days=30).values()) == 2
+    return db, [first, last]
+
+
+def test_backup_includes_archive_partitions(archived_db, tmp_path):
+    db, archived_ids = archived_db
+    stats = backup.run_backup(db.db_path, str(tmp_path / "backups"), db.archive.directory)
+
+    assert stats["archive_partitions"] == 1
+    restored = TicketDatabase(stats["path"], archive_dir=backup.archive_backup_dir(stats["path"]))
+    assert [restored.get_ticket(i).name for i in archived_ids] == ["Caller 0", "Caller 1"]
+    assert len(restored.get_all_tickets(include_archived=True)) == 3
+
+
+def test_backup_is_discarded_when_partitions_cannot_be_copied(archived_db, tmp_path, monkeypatch):
+    db, _ = archived_db
+
+    def broken_copy(src, dst):
+        raise PermissionError(src)
+
+    monkeypatch.setattr(backup.shutil, "copy2", broken_copy)
+    with pytest.raises(OSError):
+        backup.run_backup(db.db_path, str(tmp_path / "backups"), db.archive.directory)
+    assert os.listdir(tmp_path / "backups") == []
+
+
+def test_prune_removes_archive_copies(tmp_path):
+    for stamp in ("20240101-000000", "20240102-000000"):
+        open(tmp_path / f"tickets-{stamp}.db", "w").close()
+        os.makedirs(tmp_path / f"tickets-{stamp}-archive")
+
+    backup.prune_backups(str(tmp_path), keep=1)
+    assert sorted(os.listdir(tmp_path)) == ["tickets-20240102-000000-archive", "tickets-20240102-000000.db"]
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+import import_tickets
+import web_interface
+
+
+def ndjson(*rows) -> str:
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows) + "\n"
+
+
+def ticket_row(n: int, **overrides) -> dict:
+    row = {"name": f"Caller {n}", "email": f"caller{n}@example.com", "phone": "555-123-4567",
+           "address": f"{n} Main Street", "issue": "Wi-Fi not working", "price": 20.0}
+    row.update(overrides)
+    return row
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(web_interface, "BULK_CHUNK_ROWS", 2)
+
+
+def test_bulk_create_reports_rows_across_chunks(client, db, small_chunks):
+    body = ndjson(ticket_row(0), ticket_row(1), ticket_row(2, email="broken"),
+                  "{not json", ticket_row(4), ticket_row(5))
+
+    result = client.post("/tickets/bulk", content=body).json()
+
+    assert result["rows"] == 6 and result["created"] == 4 and result["failed"] == 2
+    # Row numbers count from the start of the body, not the chunk
+    assert [error["row"] for error in result["errors"]] == [2, 3]
+    assert "email" in result["errors"][0]["error"]
+    assert result["errors"][1]["error"].startswith("invalid JSON")
+    # One ID range per chunk that inserted rows: [0, 1], [4, 5]
+    assert [last - first + 1 for first, last in result["id_ranges"]] == [2, 2]
+    assert sorted(t.name for t in db.get_all_tickets()) == [f"Caller {n}" for n in (0, 1, 4, 5)]
+
+
+def test_bulk_update_reports_rows_across_chunks(client, db, small_chunks):
+    first, last = db.bulk_create_tickets([ticket_row(n) for n in range(3)])["id_ranges"][0]
+    ids = list(range(first, last + 1))
+    body = ndjson({"id": ids[0], "price": 25.0}, {"id": ids[1], "email": "broken"},
+                  {"id": 9999, "price": 1.0}, {"id": ids[2], "price": 30.0})
+
+    result = client.post("/tickets/bulk-update", content=body).json()
+
+    assert result["rows"] == 4 and result["updated"] == 2 and result["failed"] == 2
+    assert [error["row"] for error in result["errors"]] == [1, 2]
+    assert [db.get_ticket(i).price for i in ids] == [25.0, 20.0, 30.0]
+
+
+def test_import_cli_reports_failed_rows(db, tmp_path, capsys):
+    path = tmp_path / "old.jsonl"
+    path.write_text(ndjson(ticket_row(0), "{not json", ticket_row(2), ticket_row(3, phone="")))
+
+    assert import_tickets.main([str(path), "--chunk-size", "2"]) == 1
+    result = json.loads(capsys.readouterr().out)
+
+    assert result["created"] == 2 and result["failed"] == 2
+    assert [error["row"] for error in result["errors"]] == [1, 3]
+
+
+def test_import_cli_csv(db, tmp_path, capsys):
+    path = tmp_path / "old.csv"
+    path.write_text("name,email,phone,address,issue,price,created_at\n"
+                    "Ann,ann@example.com,555-123-4567,1 Main Street,Wi-Fi not working,20,2024-01-15T10:00:00\n"
+                    "Bob,bob@example.com,555-123-4567,2 Main Street,Printer not working,15,\n")
+
+    assert import_tickets.main([str(path)]) == 0
+    capsys.readouterr()
+
+    tickets = sorted(db.get_all_tickets(), key=lambda t: t.name)
+    assert [t.price for t in tickets] == [20.0, 15.0]
+    assert tickets[0].created_at.startswith("2024-01-15")
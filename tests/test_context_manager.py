@@ -0,0 +1,105 @@
+import asyncio
+
+from livekit.agents import llm
+
+import config
+from context_manager import ContextCompactor, message_text
+from fake_providers import FakeLLM
+from text_session import TextSession
+from tools import VoiceBotState
+
+# Bare answers that conversation.py's field patterns do not capture
+DETAILS = {
+    "name": "Jane Doe",
+    "email": "jane.doe@example.com",
+    "phone": "555-123-4567",
+    "address": "12 Oak Street, Springfield",
+}
+TURNS = [
+    "Jane Doe",
+    "jane.doe@example.com",
+    "555-123-4567",
+    "12 Oak Street, Springfield",
+    "My Wi-Fi is not working",
+    "Which other issues can you help with?",
+    "How long does a technician usually take?",
+    "Do you also work on weekends?",
+    "Yes, please create the ticket",
+]
+PADDING = "Thanks, noted. " * 20
+
+
+class PromptReadingLLM(FakeLLM):
+    """Files the ticket with whatever details are still visible in the prompt"""
+
+    def next_action(self, chat_ctx):
+        action = super().next_action(chat_ctx)
+        if "tool" not in action:
+            return action
+        prompt = " ".join(message_text(item) for item in chat_ctx.items
+                          if getattr(item, "type", None) == "message")
+        arguments = {key: value if value in prompt else "unknown" for key, value in DETAILS.items()}
+        arguments.update(issue="Wi-Fi not working", price=20.0)
+        return {"tool": "create_ticket_tool", "arguments": arguments}
+
+
+def test_compaction_keeps_uncaptured_caller_details():
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="system", content="instructions")
+    for text in TURNS:
+        chat_ctx.add_message(role="user", content=text)
+        chat_ctx.add_message(role="assistant", content=PADDING)
+    state = VoiceBotState()
+
+    saved = ContextCompactor(token_budget=200, keep_recent_turns=2).compact(chat_ctx, state)
+
+    prompt = " ".join(message_text(item) for item in chat_ctx.items)
+    assert saved > 0
+    assert prompt.count(PADDING) == 2
+    for value in DETAILS.values():
+        assert value in prompt
+
+
+def test_long_conversation_still_produces_complete_ticket(db, monkeypatch):
+    monkeypatch.setitem(config.CONTEXT_CONFIG, "token_budget", 200)
+    monkeypatch.setitem(config.CONTEXT_CONFIG, "keep_recent_turns", 2)
+    script = {
+        "llm_turns": [{"say": "Welcome, may I have your name?"}]
+        + [{"say": PADDING} for _ in TURNS[:-1]]
+        + [{"tool": "create_ticket_tool", "arguments": {}}],
+        "tool_followup": "Your ticket ID is {ticket_id}.",
+        "fallback": "Anything else?",
+    }
+    session = TextSession(PromptReadingLLM(script=script, first_token_latency=0, token_latency=0))
+
+    async def run():
+        await session.greet()
+        for turn in TURNS:
+            await session.send(turn)
+
+    asyncio.run(run())
+
+    assert session.ticket_id is not None, session.tool_calls[-1]["output"]
+    ticket = db.get_ticket(session.ticket_id)
+    for key, value in DETAILS.items():
+        assert getattr(ticket, key) == value
+
+
+def test_savings_are_reported_in_call_summary():
+    from call_summary import CallSummary
+
+    chat_ctx = llm.ChatContext.empty()
+    chat_ctx.add_message(role="system", content="instructions")
+    for text in TURNS:
+        chat_ctx.add_message(role="user", content=text)
+        chat_ctx.add_message(role="assistant", content=PADDING)
+    compactor = ContextCompactor(token_budget=200, keep_recent_turns=2)
+    summary = CallSummary("room-1")
+
+    saved = compactor.compact(chat_ctx, VoiceBotState())
+    compactor.compact(llm.ChatContext.empty(), VoiceBotState())  # within budget
+
+    report = summary.report()["context"]
+    assert report["turns"] == 2 and report["compactions"] == 1
+    assert report["tokens_saved"] == saved
+    assert report["prompt_tokens_before"] - report["prompt_tokens_after"] == saved
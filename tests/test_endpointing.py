@@ -0,0 +1,77 @@
+from config import ENDPOINTING_CONFIG
+from endpointing import EndpointingController
+
+PROFILES = ENDPOINTING_CONFIG["profiles"]
+
+
+class StubSession:
+    def __init__(self):
+        self.calls = []
+
+    def update_options(self, *, min_endpointing_delay, max_endpointing_delay):
+        self.calls.append((min_endpointing_delay, max_endpointing_delay))
+
+
+class StubVAD:
+    def __init__(self):
+        self.calls = []
+
+    def update_options(self, *, min_silence_duration):
+        self.calls.append(min_silence_duration)
+
+
+def controller():
+    return EndpointingController(StubSession(), StubVAD())
+
+
+def test_delays_follow_the_conversation():
+    endpointing = controller()
+    for stage in ("greeting", "collecting_details", "understanding_issue", "confirming"):
+        endpointing.apply(stage)
+    delays, silences = endpointing.session.calls, endpointing.vad.calls
+
+    # Longer while callers dictate details, shortest for yes/no confirmations
+    assert delays[1][0] > delays[0][0] and silences[1] > silences[0]
+    assert delays[2][0] < delays[1][0] and silences[2] < silences[1]
+    assert delays[3] == min(delays) and silences[3] == min(silences)
+    assert endpointing.stage == "confirming" and endpointing.profile == PROFILES["confirming"]
+
+
+def test_delays_stay_within_configured_bounds():
+    endpointing = controller()
+    for stage in list(PROFILES) * 2:
+        endpointing.apply(stage)
+
+    lowest = min(p["min_delay"] for p in PROFILES.values())
+    highest = max(p["max_delay"] for p in PROFILES.values())
+    for min_delay, max_delay in endpointing.session.calls:
+        assert lowest <= min_delay <= max_delay <= highest
+    silences = [p["min_silence"] for p in PROFILES.values()]
+    assert all(min(silences) <= s <= max(silences) for s in endpointing.vad.calls)
+
+
+def test_unchanged_or_unknown_profile_is_not_reapplied():
+    endpointing = controller()
+    endpointing.apply("greeting")
+    endpointing.apply("greeting")
+    endpointing.apply("small_talk")
+
+    assert len(endpointing.session.calls) == 1
+    assert endpointing.stage == "small_talk" and endpointing.profile == PROFILES["greeting"]
+
+
+def test_disabled_leaves_session_alone(monkeypatch):
+    monkeypatch.setitem(ENDPOINTING_CONFIG, "enabled", False)
+    endpointing = controller()
+    endpointing.apply("confirming")
+    assert endpointing.session.calls == [] and endpointing.vad.calls == []
+
+
+def test_rejected_options_keep_previous_profile():
+    class OldSession:
+        def update_options(self, **kwargs):
+            raise TypeError("unexpected keyword argument")
+
+    endpointing = EndpointingController(OldSession(), StubVAD())
+    endpointing.apply("confirming")
+    assert endpointing.profile is None and endpointing.vad.calls == []
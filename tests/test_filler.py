@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+import filler
+from config import FILLER_CONFIG
+from fake_providers import FakeTTS
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setitem(FILLER_CONFIG, "cache_dir", str(tmp_path / "filler"))
+    monkeypatch.setattr(filler, "_rendered", {})
+    return tmp_path / "filler"
+
+
+def test_rendered_phrases_are_reused_from_disk(cache_dir, monkeypatch):
+    phrases = filler.all_phrases()
+    rendered = asyncio.run(filler.render_phrases(FakeTTS(latency=0), phrases))
+    assert rendered == len(phrases)
+    original = filler._rendered[phrases[0]]
+
+    # A new job process starts with nothing in memory
+    monkeypatch.setattr(filler, "_rendered", {})
+    assert filler.load_rendered() == len(phrases)
+
+    loaded = filler._rendered[phrases[0]]
+    assert b"".join(bytes(f.data) for f in loaded) == b"".join(bytes(f.data) for f in original)
+    assert loaded[0].sample_rate == original[0].sample_rate
+    assert len(list(cache_dir.iterdir())) == len(phrases)
+
+
+def test_load_rendered_skips_missing_phrases(cache_dir):
+    assert filler.load_rendered() == 0
+    assert filler.FillerPlayer()._next_phrase("tool") is None
+
+
+class StubBackground:
+    def __init__(self):
+        self.played = []
+
+    def play(self, audio):
+        self.played.append(audio)
+
+
+def test_masking_is_reported_in_call_summary(monkeypatch):
+    from call_summary import CallSummary
+
+    monkeypatch.setitem(FILLER_CONFIG, "enabled", True)
+    monkeypatch.setitem(FILLER_CONFIG, "thresholds", {"tool": 0.01, "llm": 0.01})
+    monkeypatch.setattr(filler, "_rendered", {phrase: [object()] for phrase in filler.all_phrases()})
+    player = filler.FillerPlayer()
+    player.background = StubBackground()
+    summary = CallSummary("room-1")
+
+    async def turns():
+        async with player.masking("tool"):
+            await asyncio.sleep(0.05)  # slow tool: a filler covers the silence
+        player.new_turn()
+        async with player.masking("tool"):
+            pass
+
+    asyncio.run(turns())
+
+    report = summary.report()["filler"]["tool"]
+    assert len(player.background.played) == 1
+    assert report["waits"] == 2 and report["masked_turns"] == 1 and report["not_ready"] == 0
+    assert 0 < report["masked_seconds"] < report["waits"] * report["wait_mean_seconds"]
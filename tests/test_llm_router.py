@@ -0,0 +1,80 @@
+import asyncio
+
+from livekit.agents import llm
+
+import llm_router
+from call_summary import CallSummary
+from config import ROUTING_CONFIG
+from metrics import MetricsRegistry
+from tools import VoiceBotState
+
+
+def state_after(text, stage="collecting_details", fields=None):
+    state = VoiceBotState()
+    state.conversation_stage = stage
+    state.last_user_text = text
+    state.last_turn_fields = fields or {}
+    return state
+
+
+def chat(*items):
+    ctx = llm.ChatContext()
+    for item in items:
+        ctx.items.append(item)
+    return ctx
+
+
+def test_routine_turns_use_fast_model():
+    assert llm_router.choose_route(state_after(None, "greeting"), chat()) == "fast"
+    assert llm_router.choose_route(state_after("yes that's right", "confirming"), chat()) == "fast"
+    assert llm_router.choose_route(state_after("John Smith", fields={"name": "John Smith"}), chat()) == "fast"
+
+
+def test_tool_results_are_read_back_by_fast_model():
+    output = llm.FunctionCallOutput(call_id="1", name="create_ticket", output="Ticket 7 created", is_error=False)
+    assert llm_router.choose_route(state_after("yes", "completed"), chat(output)) == "fast"
+
+
+def test_questions_and_complex_turns_use_capable_model():
+    assert llm_router.choose_route(state_after("How much does a printer repair cost?"), chat()) == "capable"
+    rambling = "well it started last week after the update and now nothing really works the way it did"
+    assert llm_router.choose_route(state_after(rambling), chat()) == "capable"
+    # After the ticket exists, corrections go to the capable model
+    assert llm_router.choose_route(state_after("change my phone", "completed"), chat()) == "capable"
+
+
+def test_force_route_overrides_stage(monkeypatch):
+    monkeypatch.setitem(ROUTING_CONFIG, "force_route", "fast")
+    assert llm_router.choose_route(state_after("How much does it cost?", "completed"), chat()) == "fast"
+
+
+def test_call_summary_reports_routes():
+    registry = MetricsRegistry()
+    registry.increment("llm.route.fast.requests", 5)
+    summary = CallSummary("room-1", registry)
+    registry.increment("llm.route.fast.requests", 2)
+    registry.increment("llm.route.fast.cost_usd", 0.0004)
+    registry.observe("llm.route.fast.ttft", 0.2)
+    registry.observe("llm.route.fast.ttft", 0.4)
+    registry.increment("llm.route.capable.requests")
+
+    routes = summary.report()["llm_routes"]
+
+    # Only what this call added
+    assert routes["fast"]["requests"] == 2 and routes["fast"]["cost_usd"] == 0.0004
+    assert routes["fast"]["ttft_mean_seconds"] == 0.3
+    assert routes["capable"]["requests"] == 1
+    asyncio.run(summary.log())
+
+
+def test_call_summary_reports_speculation():
+    registry = MetricsRegistry()
+    summary = CallSummary("room-1", registry)
+    registry.increment("speculation.started", 4)
+    registry.increment("speculation.hits", 3)
+    registry.increment("speculation.wasted", 1)
+    registry.observe("speculation.latency_saved_seconds", 0.25)
+    registry.observe("speculation.latency_saved_seconds", 0.5)
+
+    assert summary.report()["speculation"] == {"started": 4, "hits": 3, "wasted": 1, "hit_rate": 0.75,
+                                               "latency_saved_seconds": 0.75}
@@ -0,0 +1,20 @@
+import json
+
+import load_test
+
+
+def test_sessions_complete(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("DATABASE_PATH", str(tmp_path / "tickets.db"))
+
+    load_test.main(["--levels", "3", "--ramp", "0", "--time-scale", "0", "--endpointing-delay", "0",
+                    "--stt-latency", "0", "--llm-latency", "0", "--tts-latency", "0",
+                    "--database", str(tmp_path / "tickets.db"), "--json"])
+    report = json.loads(capsys.readouterr().out)
+
+    level = report["levels"][0]
+    assert level["completed"] == level["total_sessions"] == 3
+    assert level["session_errors"] == 0 and level["tool_errors"] == 0
+    assert level["voice_to_voice_ms"]["count"] > 0
+    # Each call creates a ticket, so every session's write is timed
+    assert level["db_writer_wait_ms"]["count"] >= 3
+    assert report["capacity_sessions_per_worker"] == 3
@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+
+import migrations
+from config import DATABASE_CONFIG
+from database import TicketDatabase
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "tickets.db")
+    monkeypatch.setitem(DATABASE_CONFIG, "backend", "sqlite")
+    monkeypatch.setitem(DATABASE_CONFIG, "path", path)
+    monkeypatch.setitem(DATABASE_CONFIG, "archive_dir", str(tmp_path / "archive"))
+    monkeypatch.setitem(DATABASE_CONFIG, "migrate_blocking", False)
+    return TicketDatabase(path, archive_dir=str(tmp_path / "archive"), migrate=False)
+
+
+def indexes(db):
+    conn = sqlite3.connect(db.db_path)
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    return names
+
+
+def test_dry_run_changes_nothing(fresh_db, capsys):
+    migrations.main(["--dry-run"])
+    out = capsys.readouterr().out
+
+    assert "1  index tickets by created_at (pending, blocks writers while it runs)" in out
+    assert "CREATE INDEX IF NOT EXISTS idx_tickets_created_at ON tickets (created_at)" in out
+    assert "idx_tickets_created_at" not in indexes(fresh_db)
+    assert migrations.applied_migrations(fresh_db) == []
+
+
+def test_status_lists_applied_and_pending(fresh_db, capsys):
+    migrations.main(["--status"])
+    assert capsys.readouterr().out.strip().endswith(f"{len(migrations.MIGRATIONS)} pending")
+
+    migrations.main([])
+    migrations.main(["--status"])
+    out = capsys.readouterr().out
+    assert "index tickets by created_at" in out
+    assert out.strip().endswith("0 pending")
+
+
+def test_reapplying_does_nothing(fresh_db, capsys):
+    first = migrations.apply_migrations(fresh_db, allow_blocking=True)
+    recorded = migrations.applied_migrations(fresh_db)
+
+    assert [result["version"] for result in first] == [m.version for m in migrations.MIGRATIONS]
+    assert migrations.apply_migrations(fresh_db, allow_blocking=True) == []
+    assert migrations.applied_migrations(fresh_db) == recorded
+
+    migrations.main([])
+    assert "Schema is up to date" in capsys.readouterr().out
+
+
+def test_migration_applied_elsewhere_is_skipped(fresh_db):
+    migration = migrations.MIGRATIONS[0]
+    assert migrations._apply_sqlite(fresh_db, migration)
+    assert not migrations._apply_sqlite(fresh_db, migration)
+    assert len(migrations.applied_migrations(fresh_db)) == 1
+
+
+def test_automatic_migration_defers_sqlite_index_builds(fresh_db):
+    results = migrations.apply_migrations(fresh_db)
+
+    assert all(result["deferred"] for result in results)
+    assert "idx_tickets_created_at" not in indexes(fresh_db)
+    assert len(migrations.pending_migrations(fresh_db)) == len(migrations.MIGRATIONS)
+
+    migrations.apply_migrations(fresh_db, allow_blocking=True)
+    assert "idx_tickets_created_at" in indexes(fresh_db)
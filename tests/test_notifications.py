@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+import notifications
+from config import NOTIFICATION_CONFIG
+from database import Ticket
+
+
+@pytest.fixture
+def outbox(db, monkeypatch):
+    monkeypatch.setitem(NOTIFICATION_CONFIG, "batch_size", 10)
+    monkeypatch.setitem(NOTIFICATION_CONFIG, "concurrency", 2)
+    monkeypatch.setitem(NOTIFICATION_CONFIG, "max_attempts", 2)
+    monkeypatch.setitem(NOTIFICATION_CONFIG, "lease_seconds", 60)
+    # Retries are due immediately so one test can walk a message to the dead-letter state
+    monkeypatch.setattr(notifications, "retry_delay", lambda attempts: -1.0)
+    for n in range(3):
+        db.create_ticket(Ticket(name=f"Caller {n}", email=f"caller{n}@example.com", phone="555-123-4567",
+                                address=f"{n} Main Street", issue="Wi-Fi not working", price=20.0))
+    return db
+
+
+def test_worker_sends_claimed_messages(outbox):
+    batches = []
+
+    def sender(messages):
+        batches.append([message["id"] for message in messages])
+        return {message["id"]: None for message in messages}
+
+    worker = notifications.OutboxWorker(outbox, sender)
+
+    assert asyncio.run(worker.deliver_due()) == 3
+    # Split across the configured number of connections, each message sent once
+    assert len(batches) == 2 and sorted(sum(batches, [])) == [1, 2, 3]
+    assert asyncio.run(worker.deliver_due()) == 0
+    assert outbox.get_outbox_stats() == {"sent": 3}
+
+
+def test_worker_retries_then_dead_letters(outbox):
+    attempts = []
+
+    def sender(messages):
+        attempts.extend(message["attempts"] for message in messages)
+        results = {message["id"]: "smtp down" for message in messages}
+        results[1] = None
+        results[3] = "permanent: mailbox unavailable"
+        return results
+
+    worker = notifications.OutboxWorker(outbox, sender)
+
+    assert asyncio.run(worker.deliver_due()) == 3
+    # Only the transient failure comes back, until it runs out of attempts
+    assert asyncio.run(worker.deliver_due()) == 1
+    assert asyncio.run(worker.deliver_due()) == 0
+    assert sorted(attempts) == [1, 1, 1, 2]
+    assert outbox.get_outbox_stats() == {"sent": 1, "dead": 2}
+
+
+def test_leased_messages_are_not_sent_twice(outbox):
+    outbox.claim_outbox(2, lease_seconds=60)
+    sent = []
+
+    def sender(messages):
+        sent.extend(message["id"] for message in messages)
+        return {message["id"]: None for message in messages}
+
+    assert asyncio.run(notifications.OutboxWorker(outbox, sender).deliver_due()) == 1
+    assert sent == [3]
@@ -0,0 +1,108 @@
+import asyncio
+import gzip
+import io
+import threading
+import types
+import wave
+
+import pytest
+from livekit import rtc
+from livekit.agents.voice import io as voice_io
+
+import recorder
+from config import RECORDING_CONFIG
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setitem(RECORDING_CONFIG, "chunk_bytes", 3200)
+    monkeypatch.setitem(RECORDING_CONFIG, "max_buffered_chunks", 2)
+
+
+def frame(samples: int = 1600, value: int = 1) -> rtc.AudioFrame:
+    return rtc.AudioFrame(value.to_bytes(2, "little", signed=True) * samples, 16000, 1, samples)
+
+
+def read_wav(path):
+    with wave.open(io.BytesIO(gzip.decompress(path.read_bytes()))) as wav:
+        return wav.getframerate(), wav.getnchannels(), wav.readframes(wav.getnframes())
+
+
+def test_tracks_round_trip_to_gzipped_wav(tmp_path, small_chunks, monkeypatch):
+    monkeypatch.setitem(RECORDING_CONFIG, "max_buffered_chunks", 16)
+
+    async def call():
+        rec = recorder.CallRecorder("room-1", directory=str(tmp_path))
+        for _ in range(5):
+            rec.write_frame(recorder.caller_track("alice"), frame(value=1))
+            rec.write_frame(recorder.caller_track("bob@example.com"), frame(value=2))
+        await rec.close()
+        return rec
+
+    rec = asyncio.run(call())
+
+    # One file per participant, never interleaved
+    alice = read_wav(tmp_path / f"room-1-{rec.session_id}" / "caller-alice.wav.gz")
+    bob = read_wav(tmp_path / f"room-1-{rec.session_id}" / "caller-bob_example.com.wav.gz")
+    assert alice[:2] == (16000, 1) and alice[2] == frame(value=1).data.tobytes() * 5
+    assert bob[2] == frame(value=2).data.tobytes() * 5
+    assert all(stats["bytes_dropped"] == 0 for stats in rec.stats().values())
+
+
+def test_full_queue_drops_instead_of_waiting(tmp_path, small_chunks, monkeypatch):
+    release = threading.Event()
+    original = recorder.TrackWriter._append
+
+    def slow_append(self, chunk):
+        release.wait(5)
+        return original(self, chunk)
+
+    monkeypatch.setattr(recorder.TrackWriter, "_append", slow_append)
+
+    async def call():
+        rec = recorder.CallRecorder("room-1", directory=str(tmp_path))
+        for _ in range(10):
+            rec.write_frame("agent", frame())  # returns at once even though the disk is stuck
+        dropped = rec.stats()["agent"]["bytes_dropped"]
+        release.set()
+        await rec.close()
+        return dropped, rec.stats()["agent"]
+
+    dropped, stats = asyncio.run(call())
+
+    assert dropped > 0 and stats["bytes_dropped"] == dropped
+    assert stats["bytes_in"] == 10 * 3200
+
+
+def test_agent_audio_is_forwarded_before_recording(tmp_path):
+    class RoomOutput(voice_io.AudioOutput):
+        def __init__(self):
+            super().__init__(label="room", capabilities=voice_io.AudioOutputCapabilities(pause=True),
+                             sample_rate=16000)
+            self.recorded_when_forwarded = []
+
+        async def capture_frame(self, frame):
+            await super().capture_frame(frame)
+            self.recorded_when_forwarded.append(rec.bytes_in)
+
+        def flush(self):
+            super().flush()
+
+        def clear_buffer(self):
+            pass
+
+    async def call():
+        room_output = RoomOutput()
+        session = types.SimpleNamespace(output=types.SimpleNamespace(audio=room_output))
+        room = types.SimpleNamespace(on=lambda event, handler: None, remote_participants={})
+        recorder.attach_recorder(room, session, rec)
+        await session.output.audio.capture_frame(frame())
+        await session.output.audio.capture_frame(frame())
+        await rec.close()
+        return room_output
+
+    rec = recorder.CallRecorder("room-1", directory=str(tmp_path))
+    room_output = asyncio.run(call())
+
+    assert room_output.recorded_when_forwarded == [0, 3200]
+    assert rec.stats()["agent"]["bytes_in"] == 6400
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+from livekit.agents import llm
+
+from fake_providers import FakeLLM
+from resilience import CircuitBreaker, GuardedLLM
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def open_breaker(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout  # cool-down over
+
+
+def chat_ctx():
+    ctx = llm.ChatContext.empty()
+    ctx.add_message(role="user", content="Hello")
+    return ctx
+
+
+def test_breaker_opens_and_probe_closes_it():
+    breaker = CircuitBreaker("llm.test", failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    breaker.opened_at -= 30
+    assert breaker.allow() and breaker.state == "half_open"
+    assert not breaker.allow()  # one probe at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_cancelled_probe_does_not_wedge_breaker():
+    async def run():
+        guarded = GuardedLLM(FakeLLM(first_token_latency=10, token_latency=0), "llm.fake.slow", 0)
+        open_breaker(guarded.breaker)
+
+        stream = guarded.chat(chat_ctx=chat_ctx())
+
+        async def drain():
+            async for _ in stream:
+                pass
+
+        consumer = asyncio.create_task(drain())
+        await asyncio.sleep(0.05)
+        assert guarded.breaker.state == "half_open"
+
+        # Barge-in: the agent cancels the in-flight reply
+        await stream.aclose()
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        return guarded.breaker
+
+    breaker = asyncio.run(run())
+    assert breaker.state == "open"
+    assert breaker.allow()  # the next request probes again
+
+
+def fallback_providers(**env):
+    """RESILIENCE_CONFIG fallback providers for a fresh process with `env`"""
+    script = ("import json, config; print(json.dumps({kind: [f['provider'] for f in "
+              "config.RESILIENCE_CONFIG[kind]['fallbacks']] for kind in ('stt', 'llm', 'tts')}))")
+    environment = {key: value for key, value in os.environ.items()
+                   if key not in ("FALLBACK_PROVIDER", "STT_PROVIDER", "LLM_PROVIDER", "TTS_PROVIDER")}
+    environment.update(env)
+    output = subprocess.run([sys.executable, "-c", script], env=environment, cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def test_fake_providers_have_no_fallbacks_by_default():
+    assert fallback_providers(STT_PROVIDER="fake", LLM_PROVIDER="fake", TTS_PROVIDER="fake") == {
+        "stt": [], "llm": [], "tts": []}
+    assert fallback_providers(STT_PROVIDER="fake") == {"stt": [], "llm": ["openai"], "tts": ["openai"]}
+    assert fallback_providers(LLM_PROVIDER="fake", FALLBACK_PROVIDER="fake")["llm"] == ["fake"]
+
+
+def test_check_environment_covers_fallbacks(monkeypatch):
+    import main
+    from config import PROVIDER_CONFIG, RESILIENCE_CONFIG, ROUTING_CONFIG
+
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    for kind in ("stt", "llm", "tts"):
+        monkeypatch.setitem(PROVIDER_CONFIG[kind], "provider", "fake")
+        monkeypatch.setitem(RESILIENCE_CONFIG[kind], "fallbacks", [])
+    assert main.check_environment()
+
+    monkeypatch.setitem(RESILIENCE_CONFIG["tts"], "fallbacks", [{"provider": "openai", "model": "tts-1"}])
+    assert not main.check_environment()
+    monkeypatch.setitem(RESILIENCE_CONFIG, "enabled", False)
+    assert main.check_environment()
+
+    # The router builds both of its models
+    monkeypatch.setitem(PROVIDER_CONFIG["llm"], "provider", "router")
+    monkeypatch.setitem(ROUTING_CONFIG["fast"], "provider", "fake")
+    monkeypatch.setitem(ROUTING_CONFIG["capable"], "provider", "openai")
+    assert not main.check_environment()
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    assert main.check_environment()
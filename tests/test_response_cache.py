@@ -0,0 +1,43 @@
+from response_cache import ResponseCache, catalog_answer
+
+QUESTION = "Do you offer remote sessions?"
+
+
+def test_catalog_answered_without_learning():
+    cache = ResponseCache()
+    assert cache.lookup("What issues do you handle?", "greeting") == catalog_answer()
+
+
+def test_generic_answer_is_learned_per_stage():
+    cache = ResponseCache()
+    cache.store(QUESTION, "understanding_issue", "Yes, a technician can connect remotely.")
+    assert cache.lookup(QUESTION, "understanding_issue") == "Yes, a technician can connect remotely."
+    assert cache.lookup(QUESTION, "greeting") is None
+
+
+def test_caller_specific_answers_are_not_learned():
+    cache = ResponseCache()
+    cache.store("What's my ticket number?", "understanding_issue", "Your ticket ID is 42.")
+    cache.store("Is that everything?", "confirming", "Yes, we have everything we need.")
+    cache.store("How much will that be?", "understanding_issue", "That will be $20.")
+    cache.store("Do you have my address?", "understanding_issue", "Yes, 12 Oak Street.",
+                {"address": "Oak Street"})
+
+    assert cache.lookup("What's my ticket number?", "understanding_issue") is None
+    assert cache.lookup("Is that everything?", "confirming") is None
+    assert cache.lookup("How much will that be?", "understanding_issue") is None
+    assert cache.lookup("Do you have my address?", "understanding_issue") is None
+
+
+def test_context_dependent_utterances_are_not_learned():
+    cache = ResponseCache()
+    for text in ("Could you repeat that?", "yes", "What was the ticket number?", "Is that right?",
+                 "Do you work weekends again, you said?"):
+        cache.store(text, "understanding_issue", "Sure, let me go over it once more.")
+        assert cache.lookup(text, "understanding_issue") is None
+
+
+def test_similar_generic_question_reuses_answer():
+    cache = ResponseCache()
+    cache.store("Are you open on weekends?", "greeting", "Yes, we work Saturdays and Sundays.")
+    assert cache.lookup("Are you open at weekends?", "greeting") == "Yes, we work Saturdays and Sundays."
@@ -0,0 +1,82 @@
+import asyncio
+
+from config import SPECULATION_CONFIG
+from metrics import metrics
+from speculation import Speculator
+
+
+class StubStream:
+    def __init__(self, chunks, delay):
+        self.chunks, self.delay = chunks, delay
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield chunk
+
+
+class StubLLM:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = 0
+
+    def chat(self, *, chat_ctx, tools):
+        self.requests += 1
+        return StubStream(["Thanks, ", "John."], self.delay)
+
+
+def counts():
+    return {name: metrics.counter(f"speculation.{name}") for name in ("started", "hits", "wasted")}
+
+
+def test_matching_turn_reuses_speculation():
+    async def scenario():
+        stub, speculator = StubLLM(), Speculator()
+        speculator.start("My name is John Smith", stub, None, [])
+        await asyncio.sleep(0.01)
+        # Case and punctuation differences still match
+        speculation = speculator.take("my name is John Smith.")
+        return stub, [chunk async for chunk in speculation.chunks()]
+
+    before = counts()
+    stub, chunks = asyncio.run(scenario())
+    after = counts()
+
+    assert chunks == ["Thanks, ", "John."] and stub.requests == 1
+    assert after["started"] - before["started"] == 1
+    assert after["hits"] - before["hits"] == 1 and after["wasted"] == before["wasted"]
+
+
+def test_different_turn_cancels_speculation():
+    async def scenario():
+        speculator = Speculator()
+        speculator.start("My name is John Smith", StubLLM(delay=10), None, [])
+        pending = speculator.pending
+        await asyncio.sleep(0)
+        taken = speculator.take("My name is John Smithson and my email is john@example.com")
+        await asyncio.sleep(0)
+        return taken, pending.task
+
+    before = counts()
+    taken, task = asyncio.run(scenario())
+    after = counts()
+
+    assert taken is None and task.cancelled()
+    assert after["wasted"] - before["wasted"] == 1 and after["hits"] == before["hits"]
+
+
+def test_short_transcripts_are_not_speculated(monkeypatch):
+    monkeypatch.setitem(SPECULATION_CONFIG, "min_words", 2)
+
+    async def scenario():
+        stub, speculator = StubLLM(), Speculator()
+        speculator.start("yes", stub, None, [])
+        return stub.requests, speculator.pending
+
+    assert asyncio.run(scenario()) == (0, None)
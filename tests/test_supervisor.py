@@ -0,0 +1,44 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from supervisor import voice_worker_healthy
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(status: int) -> HTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(status)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_voice_worker_health_probe():
+    healthy, failing = serve(200), serve(503)
+    try:
+        assert voice_worker_healthy(healthy.server_port, timeout=1)
+        assert not voice_worker_healthy(failing.server_port, timeout=1)
+        assert not voice_worker_healthy(free_port(), timeout=1)
+    finally:
+        healthy.shutdown()
+        failing.shutdown()
+
+
+def test_voice_worker_probe_times_out_on_hung_loop():
+    # Accepts connections but never answers, like a worker whose loop is stuck
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        assert not voice_worker_healthy(listener.getsockname()[1], timeout=0.2)
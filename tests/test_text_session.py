@@ -0,0 +1,35 @@
+import asyncio
+
+from fake_providers import DEFAULT_SCRIPT, FakeLLM
+from text_session import TextSession
+
+
+def fake_session():
+    return TextSession(FakeLLM(first_token_latency=0, token_latency=0))
+
+
+def test_concurrent_sessions_keep_their_own_state(db):
+    async def run():
+        finished, stalled = fake_session(), fake_session()
+
+        async def converse(session, turns):
+            await session.greet()
+            for turn in turns:
+                await session.send(turn)
+                await asyncio.sleep(0)
+
+        await asyncio.gather(converse(finished, DEFAULT_SCRIPT["transcripts"]),
+                             converse(stalled, DEFAULT_SCRIPT["transcripts"][:1]))
+        return finished, stalled
+
+    finished, stalled = asyncio.run(run())
+
+    assert finished.ticket_id is not None
+    assert finished.state.conversation_stage == "completed"
+    assert finished.state.current_ticket.id == finished.ticket_id
+    assert stalled.ticket_id is None
+    assert stalled.state.current_ticket is None
+    assert stalled.state.conversation_stage != "completed"
+    assert stalled.state.collected_info["issue"] is None
+    assert stalled.state is not finished.state
+    assert db.get_ticket(finished.ticket_id).name == "Jane Doe"
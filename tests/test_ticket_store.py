@@ -0,0 +1,246 @@
+"""
+TicketStore contract tests, run against every backend
+
+SQLite always runs; PostgreSQL runs when TEST_DATABASE_URL points at a
+scratch database (its public schema is dropped before each test).
+"""
+
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from database import Ticket, TicketDatabase
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def ticket_row(n: int = 0, **overrides) -> dict:
+    row = {"name": f"Caller {n}", "email": f"caller{n}@example.com", "phone": "555-123-4567",
+           "address": f"{n} Main Street", "issue": "Wi-Fi not working", "price": 20.0}
+    row.update(overrides)
+    return row
+
+
+def reset_postgres(url: str):
+    psycopg = pytest.importorskip("psycopg")
+    with psycopg.connect(url, autocommit=True) as conn:
+        conn.execute("DROP SCHEMA IF EXISTS public CASCADE")
+        conn.execute("CREATE SCHEMA public")
+
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def store(request, tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    if request.param == "sqlite":
+        db = TicketDatabase(str(tmp_path / "tickets.db"), archive_dir=archive_dir)
+    else:
+        if not TEST_DATABASE_URL:
+            pytest.skip("TEST_DATABASE_URL not set")
+        reset_postgres(TEST_DATABASE_URL)
+        from postgres_database import PostgresTicketDatabase
+        db = PostgresTicketDatabase(TEST_DATABASE_URL, archive_dir=archive_dir)
+    yield db
+    db.close()
+
+
+def test_create_get_and_change_stamp(store):
+    version, _ = store.get_change_stamp()
+    ticket_id = store.create_ticket(Ticket(**ticket_row(1)), "voice_bot", "room-1")
+
+    ticket = store.get_ticket(ticket_id)
+    assert ticket.name == "Caller 1" and ticket.price == 20.0 and ticket.created_at
+    assert store.get_ticket(ticket_id + 1000) is None
+    assert store.get_change_stamp()[0] > version
+
+
+def test_update_is_audited(store):
+    ticket_id = store.create_ticket(Ticket(**ticket_row(1)), "voice_bot", "room-1")
+    version, _ = store.get_change_stamp()
+
+    assert store.update_ticket(ticket_id, {"email": "new@example.com", "name": "Caller 1"}, "agent", "room-2")
+    assert not store.update_ticket(ticket_id + 1000, {"email": "x@example.com"})
+    assert not store.update_ticket(ticket_id, {"unknown": "value"})
+
+    assert store.get_ticket(ticket_id).email == "new@example.com"
+    assert store.get_change_stamp()[0] > version
+    history = store.get_ticket_history(ticket_id)
+    assert [event["field"] for event in history] == ["created", "email"]
+    assert history[0]["new_value"]["email"] == "caller1@example.com"
+    assert history[0]["actor"] == "voice_bot" and history[0]["session_id"] == "room-1"
+    assert history[1]["old_value"] == "caller1@example.com"
+    assert history[1]["new_value"] == "new@example.com"
+    assert history[1]["actor"] == "agent" and history[1]["session_id"] == "room-2"
+
+    before_update = history[0]["changed_at"]
+    assert store.get_ticket_as_of(ticket_id, before_update)["email"] == "caller1@example.com"
+    assert store.get_ticket_as_of(ticket_id, history[1]["changed_at"])["email"] == "new@example.com"
+
+
+def test_bulk_create_reports_rows_and_chunks(store):
+    rows = [ticket_row(0), ticket_row(1), ticket_row(2, email="not-an-email"), ticket_row(3),
+            ticket_row(4), "not an object", ticket_row(6, created_at="2024-01-15T10:00:00")]
+
+    result = store.bulk_create_tickets(rows, chunk_size=2, first_row=100)
+
+    assert result["created"] == 5 and result["failed"] == 2
+    assert [error["row"] for error in result["errors"]] == [102, 105]
+    assert "email" in result["errors"][0]["error"]
+    # One ID range per chunk that inserted rows: [0, 1], [3], [4], [6]
+    sizes = [last - first + 1 for first, last in result["id_ranges"]]
+    assert sizes == [2, 1, 1, 1]
+    ids = [i for first, last in result["id_ranges"] for i in range(first, last + 1)]
+    assert [store.get_ticket(i).name for i in ids] == [f"Caller {n}" for n in (0, 1, 3, 4, 6)]
+    assert store.get_ticket(ids[-1]).created_at.startswith("2024-01-15T10:00:00")
+    assert store.get_ticket_history(ids[0])[0]["actor"] == "import"
+    # Imported tickets do not send confirmation emails
+    assert store.claim_outbox(10, 60) == []
+
+
+def test_bulk_create_error_limit(store):
+    result = store.bulk_create_tickets([{"name": ""}] * 5, max_errors=2)
+    assert result["failed"] == 5 and len(result["errors"]) == 2 and result["id_ranges"] == []
+
+
+def test_bulk_update_reports_rows(store):
+    ids = [store.create_ticket(Ticket(**ticket_row(n))) for n in range(3)]
+    updates = [
+        {"id": ids[0], "phone": "555-000-0000"},
+        {"id": ids[1] + 1000, "phone": "555-000-0000"},
+        {"id": ids[1], "email": "broken"},
+        {"id": ids[1], "colour": "red"},
+        {"phone": "555-000-0000"},
+        {"id": ids[2], "issue": "Printer not working", "price": 15.0},
+    ]
+
+    result = store.bulk_update_tickets(updates, chunk_size=4, actor="crm")
+
+    assert result["updated"] == 2 and result["failed"] == 4
+    assert [error["row"] for error in result["errors"]] == [1, 2, 3, 4]
+    assert "not found" in result["errors"][0]["error"]
+    assert store.get_ticket(ids[0]).phone == "555-000-0000"
+    assert store.get_ticket(ids[1]).email == "caller1@example.com"
+    assert store.get_ticket(ids[2]).issue == "Printer not working"
+    events = store.get_ticket_history(ids[2])
+    assert sorted(event["field"] for event in events[1:]) == ["issue", "price"]
+    assert all(event["actor"] == "crm" for event in events[1:])
+
+
+def test_outbox_leases(store):
+    first = store.create_ticket(Ticket(**ticket_row(1)))
+    second = store.create_ticket(Ticket(**ticket_row(2)))
+
+    claimed = store.claim_outbox(1, lease_seconds=60)
+    assert len(claimed) == 1 and claimed[0]["attempts"] == 1
+    assert claimed[0]["topic"] == "ticket_confirmation"
+    assert claimed[0]["payload"]["ticket_id"] == first
+
+    # The leased message is hidden; the other one is still due
+    claimed_next = store.claim_outbox(10, lease_seconds=60)
+    assert [message["payload"]["ticket_id"] for message in claimed_next] == [second]
+    assert store.claim_outbox(10, lease_seconds=60) == []
+
+    store.complete_outbox([claimed[0]["id"]])
+    store.fail_outbox(claimed_next[0]["id"], "smtp down", retry_at=time.time() - 1)
+    retried = store.claim_outbox(10, lease_seconds=60)
+    assert [message["attempts"] for message in retried] == [2]
+
+    store.fail_outbox(retried[0]["id"], "smtp down", retry_at=None)
+    assert store.claim_outbox(10, lease_seconds=60) == []
+    assert store.get_outbox_stats() == {"sent": 1, "dead": 1}
+
+
+def test_expired_lease_is_claimed_again(store):
+    store.create_ticket(Ticket(**ticket_row(1)))
+    assert len(store.claim_outbox(10, lease_seconds=0)) == 1
+    time.sleep(0.01)
+    again = store.claim_outbox(10, lease_seconds=60)
+    assert len(again) == 1 and again[0]["attempts"] == 2
+
+
+def test_analytics_follow_writes(store):
+    rows = [ticket_row(0, created_at="2024-03-01T09:00:00"),
+            ticket_row(1, created_at="2024-03-01T17:00:00"),
+            ticket_row(2, created_at="2024-03-02T09:00:00", issue="Printer not working", price=15.0)]
+    ids = store.bulk_create_tickets(rows)["id_ranges"][0]
+
+    analytics = store.get_analytics("2024-03-01", "2024-03-02")
+    assert analytics["tickets"] == 3 and analytics["revenue"] == 55.0
+    assert analytics["days"][0] == {"day": "2024-03-01", "issue": "Wi-Fi not working",
+                                    "tickets": 2, "revenue": 40.0}
+
+    store.update_ticket(ids[0], {"issue": "Printer not working", "price": 15.0})
+    analytics = store.get_analytics("2024-03-01", "2024-03-01")
+    assert analytics["by_issue"] == {"Printer not working": {"tickets": 1, "revenue": 15.0},
+                                     "Wi-Fi not working": {"tickets": 1, "revenue": 20.0}}
+    assert store.get_analytics("2024-03-03")["tickets"] == 0
+
+
+def test_archive_moves_old_tickets(store):
+    old = (datetime.now() - timedelta(days=400)).replace(day=1, hour=12).isoformat()
+    ids = store.bulk_create_tickets([ticket_row(0, created_at=old), ticket_row(1, created_at=old)])["id_ranges"][0]
+    recent = store.create_ticket(Ticket(**ticket_row(2)))
+    month = old[:7]
+
+    assert store.archive_tickets(older_than_days=30) == {month: 2}
+    assert store.archive_tickets(older_than_days=30) == {}
+
+    assert [t.id for t in store.get_all_tickets()] == [recent]
+    assert {t.id for t in store.get_all_tickets(include_archived=True)} == {ids[0], ids[1], recent}
+    assert store.get_ticket(ids[0]).name == "Caller 0"
+    assert store.get_analytics(old[:10], old[:10])["tickets"] == 2
+    assert store.get_ticket_history(ids[0])[0]["field"] == "created"
+
+
+def reopen(store):
+    """Open the same database again, as another process or a restart would"""
+    if store.backend == "sqlite":
+        return TicketDatabase(store.db_path, archive_dir=store.archive.directory)
+    from postgres_database import PostgresTicketDatabase
+    return PostgresTicketDatabase(store.url, archive_dir=store.archive.directory)
+
+
+def forget_rollup_version(store):
+    """Make the next open rebuild the rollups, like a database from before rollup_state"""
+    sql = "DELETE FROM rollup_state"
+    if store.backend == "sqlite":
+        import sqlite3
+        with sqlite3.connect(store.db_path) as conn:
+            conn.execute(sql)
+        conn.close()
+    else:
+        with store._connection() as conn:
+            conn.execute(sql)
+
+
+def test_rollup_backfill_skips_interrupted_archive(store):
+    old = (datetime.now() - timedelta(days=400)).replace(day=1, hour=12).isoformat()
+    store.bulk_create_tickets([ticket_row(0, created_at=old), ticket_row(1, created_at=old)])
+    store.archive_tickets(older_than_days=30)
+    store.bulk_create_tickets([ticket_row(2, created_at=old)])
+    # An archive run that wrote the partition but stopped before deleting the hot row
+    hot = store.get_all_tickets()[0]
+    store.archive.write(old[:7], [(hot.id, hot.name, hot.email, hot.phone, hot.address,
+                                   hot.issue, hot.price, hot.created_at)])
+    forget_rollup_version(store)
+
+    for _ in range(2):
+        store.close()
+        store = reopen(store)
+        analytics = store.get_analytics(old[:10], old[:10])
+        assert analytics["tickets"] == 3 and analytics["revenue"] == 60.0
+    store.close()
+
+
+def test_reopen_keeps_rollups(store):
+    store.create_ticket(Ticket(**ticket_row(1)))
+    today = datetime.now().date().isoformat()
+    store.close()
+    store = reopen(store)
+    store.create_ticket(Ticket(**ticket_row(2)))
+    store.close()
+
+    store = reopen(store)
+    assert store.get_analytics(today, today)["tickets"] == 2
+    store.close()
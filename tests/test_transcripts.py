@@ -0,0 +1,66 @@
+import asyncio
+import gzip
+
+import pytest
+
+from config import TRANSCRIPT_CONFIG
+from transcripts import CallTranscript, TranscriptStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TranscriptStore(directory=str(tmp_path))
+
+
+def test_batches_append_to_one_segment_per_call(store, tmp_path, monkeypatch):
+    monkeypatch.setitem(TRANSCRIPT_CONFIG, "flush_turns", 2)
+
+    async def call():
+        transcript = CallTranscript("room-1", store=store)
+        for i in range(5):
+            transcript.add("user", f"question {i}")
+            transcript.add("assistant", f"answer {i}")
+        transcript.add_tool("create_ticket", '{"name": "Ann"}', "Ticket 7 created")
+        await transcript.close(ticket_id=7)
+        return transcript
+
+    transcript = asyncio.run(call())
+
+    entries = store.read(transcript.session_id)
+    assert [entry["text"] for entry in entries if entry["role"] != "tool"] == [
+        text for i in range(5) for text in (f"question {i}", f"answer {i}")
+    ]
+    assert entries[-1] == {"t": entries[-1]["t"], "role": "tool", "name": "create_ticket",
+                           "arguments": '{"name": "Ann"}', "output": "Ticket 7 created"}
+
+    segments = list(tmp_path.glob("*/*.jsonl.gz"))
+    assert [path.name for path in segments] == [f"{transcript.session_id}.jsonl.gz"]
+    # Three batches (two flushes and the close), each its own gzip member
+    assert segments[0].read_bytes().count(b"\x1f\x8b\x08") == 3
+    assert len(gzip.decompress(segments[0].read_bytes()).splitlines()) == 11
+
+    [record] = store.find_calls(room="room-1")
+    assert record["entries"] == 11
+    assert record["ticket_id"] == 7
+    assert record["ended_at"] is not None
+
+
+def test_find_and_read_by_ticket(store):
+    store.append("a", "room-1", 100.0, [{"role": "user", "text": "first call"}])
+    store.finish_call("a", "room-1", 100.0, 42)
+    store.append("b", "room-2", 200.0, [{"role": "user", "text": "second call"}])
+    store.finish_call("b", "room-2", 200.0, 42)
+    store.append("c", "room-1", 300.0, [{"role": "user", "text": "other ticket"}])
+    store.finish_call("c", "room-1", 300.0, 43)
+
+    assert [call["session_id"] for call in store.find_calls(ticket_id=42)] == ["b", "a"]
+    assert [call["session_id"] for call in store.find_calls(room="room-1")] == ["c", "a"]
+    assert [entry["text"] for entry in store.read_ticket(42)] == ["first call", "second call"]
+
+
+def test_call_without_entries_is_indexed(store):
+    store.finish_call("quiet", "room-3", 100.0, None)
+
+    assert store.read("quiet") == []
+    assert store.read("unknown") == []
+    assert store.find_calls(room="room-3")[0]["entries"] == 0
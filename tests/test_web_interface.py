@@ -0,0 +1,151 @@
+import jwt
+import pytest
+
+import web_interface
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    rooms = []
+
+    async def dispatch(room_name, config):
+        rooms.append(room_name)
+
+    async def start(room_name, config):
+        pass
+
+    monkeypatch.setattr(web_interface, "dispatch_voice_bot_to_room", dispatch)
+    monkeypatch.setattr(web_interface, "start_voice_bot_for_room", start)
+    return rooms
+
+
+def test_cached_token_still_dispatches_bot(client, dispatched):
+    first = client.post("/get-token", json={"room": "room-a"}).json()
+    again = client.post("/get-token", json={"room": "room-a"}).json()
+
+    assert again["token"] == first["token"]
+    assert dispatched == ["room-a", "room-a"]
+
+
+def test_identity_is_chosen_by_server(client, dispatched):
+    response = client.post("/get-token", json={"room": "room-b", "identity": "voice-bot"})
+    claims = jwt.decode(response.json()["token"], options={"verify_signature": False})
+
+    assert claims["sub"] == web_interface.USER_IDENTITY
+    assert claims["video"]["room"] == "room-b"
+
+
+
+def test_per_room_limit_returns_429_with_retry_after(client, dispatched):
+    for _ in range(3):  # TOKEN_BURST_PER_ROOM
+        assert client.post("/get-token", json={"room": "busy-room"}).status_code == 200
+
+    limited = client.post("/get-token", json={"room": "busy-room"})
+    assert limited.status_code == 429
+    assert limited.headers["retry-after"] == "5"  # one token at 0.2/s
+    # Other rooms are unaffected
+    assert client.post("/get-token", json={"room": "quiet-room"}).status_code == 200
+
+
+def test_per_ip_limit_returns_429_with_retry_after(client, dispatched):
+    for n in range(5):  # TOKEN_BURST_PER_IP
+        assert client.post("/get-token", json={"room": f"room-{n}"}).status_code == 200
+
+    limited = client.post("/get-token", json={"room": "room-new"})
+    assert limited.status_code == 429
+    assert limited.headers["retry-after"] == "2"  # one token at 0.5/s
+    assert "room-new" not in dispatched
+
+
+def test_token_bucket_refills_over_time(monkeypatch):
+    import types
+
+    import rate_limiter
+
+    now = [100.0]
+    monkeypatch.setattr(rate_limiter, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    limiter = rate_limiter.RateLimiter(rate=0.5, burst=2)
+
+    assert limiter.check("ip")[0] and limiter.check("ip")[0]
+    assert limiter.check("ip") == (False, 2.0)
+    now[0] += 2.0
+    assert limiter.check("ip") == (True, 0.0)
+    assert limiter.check("other")[0]
+
+
+def create_ticket(db, n: int = 1, **overrides) -> int:
+    from database import Ticket
+
+    fields = {"name": f"Caller {n}", "email": f"caller{n}@example.com", "phone": "555-123-4567",
+              "address": f"{n} Main Street", "issue": "Wi-Fi not working", "price": 20.0}
+    fields.update(overrides)
+    return db.create_ticket(Ticket(**fields), "voice_bot", f"room-{n}")
+
+
+@pytest.mark.parametrize("path", ["/tickets", "/tickets/{id}", "/tickets/{id}/history", "/analytics"])
+def test_conditional_get(client, db, path):
+    url = path.format(id=create_ticket(db))
+    first = client.get(url)
+    etag, modified = first.headers["etag"], first.headers["last-modified"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(url, headers={"If-Modified-Since": modified}).status_code == 304
+    assert client.get(url, headers={"If-None-Match": 'W/"stale"'}).status_code == 200
+
+    # Any ticket write changes the validators
+    create_ticket(db, 2)
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+
+def test_etag_takes_precedence_over_last_modified(client, db):
+    create_ticket(db)
+    etag = client.get("/tickets").headers["etag"]
+    create_ticket(db, 2)
+
+    # Last-Modified has second granularity, so a date alone can't tell two
+    # writes in the same second apart; a stale ETag must win over it
+    future = "Fri, 01 Jan 2100 00:00:00 GMT"
+    stale = client.get("/tickets", headers={"If-None-Match": etag, "If-Modified-Since": future})
+    assert stale.status_code == 200 and stale.headers["etag"] != etag
+
+    past = "Thu, 01 Jan 1970 00:00:00 GMT"
+    current = client.get("/tickets", headers={"If-None-Match": stale.headers["etag"], "If-Modified-Since": past})
+    assert current.status_code == 304
+
+
+def test_etags_differ_per_resource(client, db):
+    ticket_id = create_ticket(db)
+    paths = ["/tickets", "/tickets?include_archived=true", f"/tickets/{ticket_id}",
+             f"/tickets/{ticket_id}/history", "/analytics"]
+    etags = [client.get(path).headers["etag"] for path in paths]
+
+    assert len(set(etags)) == len(paths)
+    assert client.get("/analytics", headers={"If-None-Match": etags[0]}).status_code == 200
+
+
+def test_ticket_history_endpoint(client, db):
+    ticket_id = create_ticket(db)
+    db.update_ticket(ticket_id, {"price": 25.0}, actor="agent-7")
+
+    history = client.get(f"/tickets/{ticket_id}/history").json()
+
+    assert [event["field"] for event in history] == ["created", "price"]
+    assert history[1]["actor"] == "agent-7"
+    assert history[1]["old_value"] == 20.0 and history[1]["new_value"] == 25.0
+    assert client.get("/tickets/9999/history").json() == {"error": "Ticket not found"}
+
+
+def test_analytics_endpoint(client, db):
+    db.bulk_create_tickets([
+        {"name": "Ann", "email": "ann@example.com", "phone": "555-123-4567", "address": "1 Main Street",
+         "issue": "Wi-Fi not working", "price": 20.0, "created_at": "2024-03-01T09:00:00"},
+        {"name": "Bob", "email": "bob@example.com", "phone": "555-123-4567", "address": "2 Main Street",
+         "issue": "Printer not working", "price": 15.0, "created_at": "2024-03-02T09:00:00"},
+    ])
+
+    analytics = client.get("/analytics", params={"start": "2024-03-02", "end": "2024-03-02"}).json()
+
+    assert analytics["tickets"] == 1 and analytics["revenue"] == 15.0
+    assert analytics["by_issue"] == {"Printer not working": {"tickets": 1, "revenue": 15.0}}
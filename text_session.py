@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Text-only Conversation Engine
+
+Runs ITHelpDeskBot (SYSTEM_PROMPT + ALL_TOOLS) against typed or scripted
+user turns with the configured LLM provider, bypassing STT, TTS and VAD.
+Tool calls are executed against the real ticket tools.
+
+Modes:
+    python text_session.py                      # interactive, type user turns
+    python text_session.py --replay calls.jsonl --processes 8 --concurrency 20
+
+Replay files hold one conversation per line, either a JSON list of user
+turns or {"id": "...", "turns": [...]}. The replay report covers ticket
+rate, turns-to-ticket and token usage per conversation.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+from metrics import summarize
+
+logger = logging.getLogger(__name__)
+
+GREETING_INSTRUCTIONS = "Greet the user and offer your assistance."
+
+
+def tool_name(tool) -> str:
+    """Return the name the LLM uses for a function tool"""
+    info = getattr(tool, "info", None) or getattr(tool, "__livekit_tool_info", None)
+    return info.name if info is not None else tool.__name__
+
+
+class TextRunContext:
+    """Stands in for livekit's RunContext when tools run outside an AgentSession"""
+
+    def __init__(self, userdata):
+        self.userdata = userdata
+
+
+class TextSession:
+    """
+    One text conversation with ITHelpDeskBot
+
+    Keeps the chat context, runs the LLM/tool loop for each user turn and
+    accumulates token usage and whether a ticket was created. Each session
+    owns its VoiceBotState, so sessions replayed concurrently in one
+    process stay independent.
+    """
+
+    def __init__(self, llm_instance=None):
+        from livekit.agents import llm
+        from agent import ITHelpDeskBot
+        from llm_router import bind_state
+        from providers import build_llm
+        from tools import VoiceBotState
+
+        self._llm_module = llm
+        self.state = VoiceBotState()
+        self.agent = ITHelpDeskBot(self.state)
+        self.llm = llm_instance or build_llm()
+        bind_state(self.llm, self.state)
+        self.tools = {tool_name(tool): tool for tool in self.agent.tools}
+        self.chat_ctx = llm.ChatContext.empty()
+        self.chat_ctx.add_message(role="system", content=self.agent.instructions)
+
+        self.user_turns = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tool_calls: List[dict] = []
+        self.ticket_id: Optional[int] = None
+        self.turns_to_ticket: Optional[int] = None
+
+    async def respond(self, instructions: Optional[str] = None,
+                      turn_ctx=None) -> str:
+        """Run the LLM (and any tool calls) until it produces a text reply"""
+        llm = self._llm_module
+        # Like AgentSession, the prompt is a per-turn copy of the history
+        chat_ctx = turn_ctx if turn_ctx is not None else self.chat_ctx.copy()
+        if instructions:
+            # One-off instructions, like AgentSession.generate_reply(instructions=...)
+            chat_ctx.add_message(role="system", content=instructions)
+
+        while True:
+            text = ""
+            calls = []
+            async with self.llm.chat(chat_ctx=chat_ctx, tools=list(self.tools.values())) as stream:
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        self.prompt_tokens += chunk.usage.prompt_tokens
+                        self.completion_tokens += chunk.usage.completion_tokens
+                    if chunk.delta is None:
+                        continue
+                    text += chunk.delta.content or ""
+                    calls.extend(chunk.delta.tool_calls or [])
+
+            if not calls:
+                break
+
+            for call in calls:
+                output = await self.call_tool(call.name, call.arguments)
+                for ctx in (self.chat_ctx, chat_ctx):
+                    ctx.items.append(llm.FunctionCall(
+                        call_id=call.call_id, name=call.name, arguments=call.arguments))
+                    ctx.items.append(llm.FunctionCallOutput(
+                        call_id=call.call_id, name=call.name, output=output, is_error=False))
+
+        self.chat_ctx.add_message(role="assistant", content=text)
+        return text
+
+    async def call_tool(self, name: str, arguments: str) -> str:
+        start = time.perf_counter()
+        tool = self.tools.get(name)
+        if tool is None:
+            output = f"Unknown tool: {name}"
+        else:
+            try:
+                output = str(await tool(TextRunContext(self.state), **json.loads(arguments or "{}")))
+            except Exception as e:
+                logger.error(f"Error calling tool {name}: {e}")
+                output = f"Error calling {name}: {e}"
+        self.tool_calls.append({"name": name, "seconds": time.perf_counter() - start,
+                                "output": output})
+
+        if name == "create_ticket_tool" and output.startswith("Ticket created successfully"):
+            digits = "".join(c for c in output.split("ID:")[-1].split(".")[0] if c.isdigit())
+            self.ticket_id = int(digits) if digits else None
+            if self.turns_to_ticket is None:
+                self.turns_to_ticket = self.user_turns
+        return output
+
+    async def greet(self) -> str:
+        return await self.respond(GREETING_INSTRUCTIONS)
+
+    async def send(self, user_text: str) -> str:
+        """Add a user turn, run the agent's turn hook and return the reply"""
+        llm = self._llm_module
+        self.user_turns += 1
+        message = llm.ChatMessage(role="user", content=[user_text])
+        turn_ctx = self.chat_ctx.copy()
+        await self.agent.on_user_turn_completed(turn_ctx, message)
+        self.chat_ctx.items.append(message)
+        turn_ctx.items.append(message)
+        return await self.respond(turn_ctx=turn_ctx)
+
+    def stats(self) -> dict:
+        return {
+            "user_turns": self.user_turns,
+            "ticket_id": self.ticket_id,
+            "turns_to_ticket": self.turns_to_ticket,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tool_calls": len(self.tool_calls),
+        }
+
+
+async def replay_conversation(conversation: dict) -> dict:
+    session = TextSession()
+    start = time.perf_counter()
+    try:
+        await session.greet()
+        for turn in conversation["turns"]:
+            await session.send(turn)
+            if session.ticket_id is not None:
+                break
+        result = session.stats()
+    except Exception as e:
+        result = session.stats()
+        result["error"] = repr(e)
+    result["id"] = conversation["id"]
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+async def replay_batch(conversations: List[dict], concurrency: int) -> List[dict]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(conversation):
+        async with semaphore:
+            return await replay_conversation(conversation)
+
+    return await asyncio.gather(*(limited(c) for c in conversations))
+
+
+def replay_worker(args: tuple) -> List[dict]:
+    conversations, concurrency = args
+    logging.getLogger().setLevel(logging.WARNING)
+    return asyncio.run(replay_batch(conversations, concurrency))
+
+
+def load_conversations(path: str) -> List[dict]:
+    conversations = []
+    with open(path) as f:
+        for n, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            data = json.loads(line)
+            if isinstance(data, list):
+                data = {"turns": data}
+            data.setdefault("id", str(n))
+            conversations.append(data)
+    return conversations
+
+
+def replay(path: str, processes: int, concurrency: int) -> dict:
+    """Replay conversations across processes and summarize the results"""
+    conversations = load_conversations(path)
+    chunks = [conversations[i::processes] for i in range(processes)]
+    ctx = multiprocessing.get_context("spawn")
+    start = time.perf_counter()
+    with ctx.Pool(processes) as pool:
+        results = [r for batch in pool.map(replay_worker, [(c, concurrency) for c in chunks if c])
+                   for r in batch]
+    elapsed = time.perf_counter() - start
+
+    with_ticket = [r for r in results if r["turns_to_ticket"] is not None]
+    return {
+        "conversations": len(results),
+        "errors": sum(1 for r in results if "error" in r),
+        "ticket_rate": len(with_ticket) / len(results) if results else 0.0,
+        "turns_to_ticket": summarize(r["turns_to_ticket"] for r in with_ticket),
+        "prompt_tokens": summarize(r["prompt_tokens"] for r in results),
+        "completion_tokens": summarize(r["completion_tokens"] for r in results),
+        "seconds_per_conversation": summarize(r["seconds"] for r in results),
+        "conversations_per_second": len(results) / elapsed if elapsed else 0.0,
+        "results": results,
+    }
+
+
+async def interactive():
+    session = TextSession()
+    print(f"Bot: {await session.greet()}")
+    while True:
+        try:
+            user_text = await asyncio.to_thread(input, "You: ")
+        except (EOFError, KeyboardInterrupt):
+            break
+        if not user_text.strip():
+            continue
+        print(f"Bot: {await session.send(user_text)}")
+    print(f"\n{json.dumps(session.stats())}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Text-only ITHelpDeskBot sessions")
+    parser.add_argument("--replay", help="JSONL file of scripted conversations")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="Concurrent conversations per process")
+    parser.add_argument("--database", help="SQLite file for tickets (default: temporary when replaying)")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable replay output")
+    parser.add_argument("--details", action="store_true", help="Include per-conversation results")
+    args = parser.parse_args(argv)
+
+    if args.database:
+        os.environ["DATABASE_PATH"] = args.database
+    elif args.replay:
+        os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "text_session.db")
+
+    if not args.replay:
+        logging.basicConfig(level=logging.WARNING)
+        asyncio.run(interactive())
+        return
+
+    report = replay(args.replay, max(1, args.processes), max(1, args.concurrency))
+    if not args.details:
+        report.pop("results")
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("💬 Text session replay")
+    print("=" * 40)
+    print(f"Conversations: {report['conversations']} ({report['errors']} errors), "
+          f"{report['conversations_per_second']:.1f}/s")
+    print(f"Ticket rate: {report['ticket_rate']:.1%}")
+    for key in ("turns_to_ticket", "prompt_tokens", "completion_tokens"):
+        s = report[key]
+        if s.get("count"):
+            print(f"{key:<18} mean {s['mean']:>8.1f}  p50 {s['p50']:>8.1f}  p95 {s['p95']:>8.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
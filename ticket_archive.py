@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Ticket Archive
+
+This module stores old tickets outside the hot `tickets` table, in one
+compressed SQLite file per month (`tickets-YYYY-MM.db.gz`). The hot table
+stays small for listing, sorting and backups, while TicketDatabase reads
+archived tickets through the same API.
+
+Partitions are gzip-compressed when written and decompressed on first
+read into a per-process cache directory. Archived tickets are read-only.
+
+Usage:
+    python ticket_archive.py                      # archive tickets older than ARCHIVE_AFTER_DAYS
+    python ticket_archive.py --older-than-days 30
+"""
+
+import argparse
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+TICKET_COLUMNS = "id, name, email, phone, address, issue, price, created_at"
+
+
+def default_archive_dir(db_path: str) -> str:
+    """Where a database keeps its partitions when ARCHIVE_DIR is not set"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "archive")
+
+
+class TicketArchive:
+    """Monthly compressed SQLite partitions of archived tickets"""
+
+    def __init__(self, directory: str, cache_dir: Optional[str] = None):
+        self.directory = directory
+        self.cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "ticket_archive_cache")
+
+    def partition_paths(self) -> List[str]:
+        """Paths of every partition file"""
+        return [self.partition_path(month) for month in self.months()]
+
+    def partition_path(self, month: str) -> str:
+        return os.path.join(self.directory, f"tickets-{month}.db.gz")
+
+    def months(self) -> List[str]:
+        """Archived months, newest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        months = [name[len("tickets-"):-len(".db.gz")] for name in os.listdir(self.directory)
+                  if name.startswith("tickets-") and name.endswith(".db.gz")]
+        return sorted(months, reverse=True)
+
+    def _materialize(self, month: str) -> Optional[str]:
+        """Return the path of a decompressed copy of a partition, or None if it does not exist"""
+        path = self.partition_path(month)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        # The cached copy is keyed by the partition's identity, so rewritten
+        # partitions are decompressed again
+        key = hashlib.sha1(f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}".encode()).hexdigest()
+        cached = os.path.join(self.cache_dir, f"tickets-{month}-{key[:16]}.db")
+        if not os.path.exists(cached):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            partial = f"{cached}.{os.getpid()}.tmp"
+            with gzip.open(path, "rb") as src, open(partial, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(partial, cached)
+        return cached
+
+    def _connect(self, month: str) -> Optional[sqlite3.Connection]:
+        path = self._materialize(month)
+        if path is None:
+            return None
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def get(self, month: str, ticket_id: int) -> Optional[tuple]:
+        conn = self._connect(month)
+        if conn is None:
+            return None
+        try:
+            return conn.execute(f"SELECT {TICKET_COLUMNS} FROM tickets WHERE id = ?", (ticket_id,)).fetchone()
+        finally:
+            conn.close()
+
+    def rows(self, month: str) -> List[tuple]:
+        conn = self._connect(month)
+        if conn is None:
+            return []
+        try:
+            return conn.execute(f"SELECT {TICKET_COLUMNS} FROM tickets ORDER BY created_at DESC").fetchall()
+        finally:
+            conn.close()
+
+    def write(self, month: str, rows: List[tuple]):
+        """Merge ticket rows into a month's partition, replacing it atomically"""
+        os.makedirs(self.directory, exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix="ticket_archive_")
+        try:
+            work = os.path.join(work_dir, "partition.db")
+            existing = self._materialize(month)
+            if existing is not None:
+                shutil.copyfile(existing, work)
+
+            conn = sqlite3.connect(work)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS tickets (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    phone TEXT NOT NULL,
+                    address TEXT NOT NULL,
+                    issue TEXT NOT NULL,
+                    price REAL NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+            ''')
+            conn.executemany(f"INSERT OR REPLACE INTO tickets ({TICKET_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             rows)
+            conn.commit()
+            conn.execute("VACUUM")
+            conn.close()
+
+            partial = self.partition_path(month) + ".tmp"
+            with open(work, "rb") as src, gzip.open(partial, "wb", compresslevel=9) as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(partial, self.partition_path(month))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    from config import ARCHIVE_CONFIG
+    from database import get_db
+
+    parser = argparse.ArgumentParser(description="Move old tickets into monthly archive partitions")
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_CONFIG["archive_after_days"])
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    archived = get_db().archive_tickets(args.older_than_days)
+    print(f"Archived {sum(archived.values())} tickets: {archived}")
+
+
+if __name__ == "__main__":
+    main()
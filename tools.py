@@ -5,15 +5,24 @@ This module contains the function tools that the voice bot can use
 to interact with the ticket system.
 """
 
+import asyncio
 import logging
-from livekit.agents import llm
-from database import db, Ticket
+from livekit.agents import RunContext, llm
+from database import get_db, Ticket
+from filler import filler_player
 
 logger = logging.getLogger(__name__)
 
-# Global bot state - will be imported and used by the main voice bot
 class VoiceBotState:
-    def __init__(self):
+    """
+    Conversation state of one call
+    
+    Owned by the call's ITHelpDeskBot and passed to the tools as the
+    AgentSession's userdata (RunContext.userdata), so concurrent sessions
+    in one process (text replays, load tests) never share it.
+    """
+    
+    def __init__(self, session_id=None):
         self.current_ticket = None
         self.conversation_stage = "greeting"  # greeting, collecting_details, understanding_issue, confirming, completed
         self.collected_info = {
@@ -24,13 +33,16 @@ class VoiceBotState:
             "issue": None,
             "price": None
         }
-
-# Global state instance
-bot_state = VoiceBotState()
+        # Last caller utterance and the details extracted from it (see conversation.py)
+        self.last_user_text = None
+        self.last_turn_fields = {}
+        # Call identifier (the LiveKit room) recorded with ticket audit events
+        self.session_id = session_id
 
 
 @llm.function_tool
 async def create_ticket_tool(
+    context: RunContext[VoiceBotState],
     name: str,          # Customer's full name (required, minimum 2 characters, cannot be placeholder)
     email: str,         # Valid email address (required, must contain @ and domain)
     phone: str,         # Customer's phone number (required, minimum 7 characters)
@@ -85,12 +97,16 @@ async def create_ticket_tool(
             price=price
         )
         
-        ticket_id = db.create_ticket(ticket)
+        # Run the write off the event loop so audio (and filler) keeps flowing
+        async with filler_player.masking("tool"):
+            ticket_id = await asyncio.to_thread(get_db().create_ticket, ticket,
+                                              "voice_bot", context.userdata.session_id)
         
         # Update bot state
-        bot_state.current_ticket = ticket
-        bot_state.current_ticket.id = ticket_id
-        bot_state.conversation_stage = "completed"
+        state = context.userdata
+        state.current_ticket = ticket
+        state.current_ticket.id = ticket_id
+        state.conversation_stage = "completed"
         
         return f"Ticket created successfully with ID: {ticket_id}. Confirmation number is {ticket_id}."
     except Exception as e:
@@ -99,13 +115,16 @@ async def create_ticket_tool(
 
 
 @llm.function_tool
-async def update_ticket_name(ticket_id: int, name: str) -> str:
+async def update_ticket_name(context: RunContext[VoiceBotState], ticket_id: int, name: str) -> str:
     """Update the name on a ticket"""
+    state = context.userdata
     try:
-        success = db.update_ticket(ticket_id, {"name": name})
+        async with filler_player.masking("tool"):
+            success = await asyncio.to_thread(get_db().update_ticket, ticket_id, {"name": name},
+                                                "voice_bot", state.session_id)
         if success:
-            if bot_state.current_ticket and bot_state.current_ticket.id == ticket_id:
-                bot_state.current_ticket.name = name
+            if state.current_ticket and state.current_ticket.id == ticket_id:
+                state.current_ticket.name = name
             return f"Ticket {ticket_id} name updated to: {name}"
         else:
             return f"Sorry, I couldn't find ticket {ticket_id}."
@@ -115,13 +134,16 @@ async def update_ticket_name(ticket_id: int, name: str) -> str:
 
 
 @llm.function_tool
-async def update_ticket_email(ticket_id: int, email: str) -> str:
+async def update_ticket_email(context: RunContext[VoiceBotState], ticket_id: int, email: str) -> str:
     """Update the email on a ticket"""
+    state = context.userdata
     try:
-        success = db.update_ticket(ticket_id, {"email": email})
+        async with filler_player.masking("tool"):
+            success = await asyncio.to_thread(get_db().update_ticket, ticket_id, {"email": email},
+                                                "voice_bot", state.session_id)
         if success:
-            if bot_state.current_ticket and bot_state.current_ticket.id == ticket_id:
-                bot_state.current_ticket.email = email
+            if state.current_ticket and state.current_ticket.id == ticket_id:
+                state.current_ticket.email = email
             return f"Ticket {ticket_id} email updated to: {email}"
         else:
             return f"Sorry, I couldn't find ticket {ticket_id}."
@@ -0,0 +1,200 @@
+"""
+Call Transcripts
+
+This module records both sides of each call (caller and bot turns with
+timestamps, plus tool calls) for auditing. Entries are buffered in
+memory per call and written in batches - every few caller turns and at
+call end - off the event loop.
+
+Job processes are single-use, so a segment is one call: each batch is
+one gzip member appended to that call's file under a monthly directory
+(concatenated members are still a valid gzip stream), so segment files
+are never rewritten. A small SQLite index maps rooms and ticket IDs to
+calls and calls to their segment files.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+from config import TRANSCRIPT_CONFIG
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptStore:
+    """Append-only compressed transcript segments with a SQLite index"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or TRANSCRIPT_CONFIG["directory"]
+        os.makedirs(self.directory, exist_ok=True)
+        self.index_path = os.path.join(self.directory, "index.db")
+        self._lock = threading.Lock()
+        self._init_index()
+
+    def _init_index(self):
+        with sqlite3.connect(self.index_path) as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS calls (
+                    session_id TEXT PRIMARY KEY,
+                    room TEXT NOT NULL,
+                    ticket_id INTEGER,
+                    started_at REAL NOT NULL,
+                    ended_at REAL,
+                    entries INTEGER DEFAULT 0,
+                    file TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_calls_room ON calls(room);
+                CREATE INDEX IF NOT EXISTS idx_calls_ticket ON calls(ticket_id);
+            """)
+
+    @staticmethod
+    def _segment_file(session_id: str, started_at: float) -> str:
+        # One file per call, grouped by the month the call started
+        return os.path.join(time.strftime("%Y%m", time.gmtime(started_at)), f"{session_id}.jsonl.gz")
+
+    def _register(self, conn: sqlite3.Connection, session_id: str, room: str, started_at: float):
+        conn.execute(
+            "INSERT OR IGNORE INTO calls (session_id, room, started_at, file) VALUES (?, ?, ?, ?)",
+            (session_id, room, started_at, self._segment_file(session_id, started_at)),
+        )
+
+    def append(self, session_id: str, room: str, started_at: float, entries: List[dict]):
+        """Append one batch of entries to a call's segment"""
+        if not entries:
+            return
+        payload = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries)
+        data = gzip.compress(payload.encode(), compresslevel=TRANSCRIPT_CONFIG["compression_level"])
+        path = os.path.join(self.directory, self._segment_file(session_id, started_at))
+
+        start = time.perf_counter()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(data)
+        with self._lock, sqlite3.connect(self.index_path) as conn:
+            self._register(conn, session_id, room, started_at)
+            conn.execute(
+                "UPDATE calls SET entries = entries + ? WHERE session_id = ?",
+                (len(entries), session_id),
+            )
+        metrics.observe("transcripts.flush_seconds", time.perf_counter() - start)
+        metrics.increment("transcripts.bytes_raw", len(payload))
+        metrics.increment("transcripts.bytes_written", len(data))
+
+    def finish_call(self, session_id: str, room: str, started_at: float, ticket_id: Optional[int]):
+        """Record the end of a call and the ticket it produced"""
+        with self._lock, sqlite3.connect(self.index_path) as conn:
+            self._register(conn, session_id, room, started_at)
+            conn.execute(
+                "UPDATE calls SET ended_at = ?, ticket_id = ? WHERE session_id = ?",
+                (time.time(), ticket_id, session_id),
+            )
+
+    def find_calls(self, room: Optional[str] = None, ticket_id: Optional[int] = None) -> List[dict]:
+        """Return call records for a room and/or ticket ID, newest first"""
+        query = "SELECT * FROM calls WHERE 1 = 1"
+        params: list = []
+        if room is not None:
+            query += " AND room = ?"
+            params.append(room)
+        if ticket_id is not None:
+            query += " AND ticket_id = ?"
+            params.append(ticket_id)
+        with sqlite3.connect(self.index_path) as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(query + " ORDER BY started_at DESC", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def read(self, session_id: str) -> List[dict]:
+        """Return all entries of a call in order"""
+        with sqlite3.connect(self.index_path) as conn:
+            row = conn.execute("SELECT file FROM calls WHERE session_id = ?", (session_id,)).fetchone()
+        path = os.path.join(self.directory, row[0]) if row else None
+        if path is None or not os.path.exists(path):
+            return []
+        with gzip.open(path, "rt") as f:
+            return [json.loads(line) for line in f]
+
+    def read_ticket(self, ticket_id: int) -> List[dict]:
+        """Return the entries of every call that touched a ticket"""
+        entries = []
+        for call in reversed(self.find_calls(ticket_id=ticket_id)):
+            entries.extend(self.read(call["session_id"]))
+        return entries
+
+
+_store: Optional[TranscriptStore] = None
+
+
+def get_transcript_store() -> TranscriptStore:
+    """Return the process-wide transcript store, creating it on first use"""
+    global _store
+    if _store is None:
+        _store = TranscriptStore()
+    return _store
+
+
+class CallTranscript:
+    """In-memory transcript buffer for one call"""
+
+    def __init__(self, room: str, store: Optional[TranscriptStore] = None):
+        self.room = room
+        self.session_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.store = store or get_transcript_store()
+        self.flush_turns = TRANSCRIPT_CONFIG["flush_turns"]
+        self._buffer: List[dict] = []
+        self._turns_since_flush = 0
+        self._pending: Optional[asyncio.Task] = None
+
+    def add(self, role: str, text: str, **extra):
+        """Buffer one caller/bot turn"""
+        if not text:
+            return
+        self._buffer.append({"t": round(time.time(), 3), "role": role, "text": text, **extra})
+        if role == "user":
+            self._turns_since_flush += 1
+            if self._turns_since_flush >= self.flush_turns:
+                self._schedule_flush()
+
+    def add_tool(self, name: str, arguments: str, output: Optional[str]):
+        """Buffer one tool call and its result"""
+        self._buffer.append({"t": round(time.time(), 3), "role": "tool", "name": name,
+                             "arguments": arguments, "output": output})
+
+    def _take_batch(self) -> List[dict]:
+        batch, self._buffer = self._buffer, []
+        self._turns_since_flush = 0
+        return batch
+
+    def _schedule_flush(self):
+        batch = self._take_batch()
+        previous = self._pending
+
+        async def write():
+            if previous is not None:
+                await previous  # keep batches in order
+            await asyncio.to_thread(self.store.append, self.session_id, self.room, self.started_at, batch)
+
+        self._pending = asyncio.create_task(write())
+
+    async def close(self, ticket_id: Optional[int] = None):
+        """Write the remaining entries and index the call under its ticket"""
+        if self._pending is not None:
+            await self._pending
+        batch = self._take_batch()
+        try:
+            await asyncio.to_thread(self.store.append, self.session_id, self.room, self.started_at, batch)
+            await asyncio.to_thread(self.store.finish_call, self.session_id, self.room,
+                                    self.started_at, ticket_id)
+            logger.info(f"📝 Transcript saved for room {self.room} (ticket {ticket_id})")
+        except Exception as e:
+            logger.error(f"Error saving transcript for room {self.room}: {e}")
@@ -8,9 +8,10 @@ IT help desk conversations and ticket creation.
 import asyncio
 import logging
 import os
-from livekit.agents import JobContext, WorkerOptions, cli
+from livekit.agents import APIConnectOptions, JobContext, JobProcess, WorkerOptions, cli
 from livekit.agents.voice import AgentSession
-from livekit.plugins import openai, silero
+from livekit.agents.voice.agent_session import SessionConnectOptions
+from livekit.plugins import silero
 
 # Load environment variables
 try:
@@ -20,12 +21,43 @@ except ImportError:
     pass
 
 from agent import ITHelpDeskBot
+from config import RECORDING_CONFIG, RESILIENCE_CONFIG, TRANSCRIPT_CONFIG
+from providers import build_stt, build_llm, build_tts
+from resilience import resilient_llm, resilient_stt, resilient_tts
+from filler import filler_player, load_rendered
+from endpointing import EndpointingController
+from transcripts import CallTranscript
+from recorder import CallRecorder, attach_recorder
+from context_manager import message_text
+from tools import VoiceBotState
+from llm_router import bind_state
+from call_summary import CallSummary
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def prewarm(proc: JobProcess):
+    """
+    Load per-process resources before the first job arrives
+    
+    The Silero VAD model is loaded once per job process instead of on
+    every call, which removes it from the first-job latency. Filler
+    phrases are loaded from their on-disk cache the same way.
+    """
+    proc.userdata["vad"] = silero.VAD.load()
+    load_rendered()
+
+
+def get_vad(ctx: JobContext):
+    """Return the prewarmed VAD for this job process, loading it if needed"""
+    proc = getattr(ctx, "proc", None)
+    if proc is not None and "vad" in proc.userdata:
+        return proc.userdata["vad"]
+    return silero.VAD.load()
+
+
 async def entrypoint(ctx: JobContext):
     """
     Main entrypoint for the voice bot
@@ -36,31 +68,72 @@ async def entrypoint(ctx: JobContext):
     """
     logger.info(f"Voice bot assigned to room: {ctx.room.name}")
     
+    # Route/cost and latency figures for this call, logged when it ends
+    summary = CallSummary(ctx.room.name)
+    ctx.add_shutdown_callback(summary.log)
+    
     try:
         # Create AgentSession with STT, LLM, TTS, and VAD configuration
         logger.info("Creating agent session with voice components...")
+        vad = get_vad(ctx)
+        stt, llm, tts = build_stt(), build_llm(), build_tts()
+        # This call's conversation state: the agent, its tools (via
+        # session userdata) and the model router all read the same object
+        state = VoiceBotState(session_id=ctx.room.name)
+        bind_state(llm, state)
+        conn_options = SessionConnectOptions()
+        if RESILIENCE_CONFIG["enabled"]:
+            # Deadlines, circuit breakers and fallback chains per provider
+            stt, llm, tts = resilient_stt(stt, vad), resilient_llm(llm), resilient_tts(tts)
+            conn_options = SessionConnectOptions(
+                stt_conn_options=APIConnectOptions(timeout=RESILIENCE_CONFIG["stt"]["timeout"]),
+                tts_conn_options=APIConnectOptions(timeout=RESILIENCE_CONFIG["tts"]["timeout"]),
+            )
         session = AgentSession(
-            stt=openai.STT(
-                model="whisper-1",
-                language="en",
-            ),
-            llm=openai.LLM(
-                model="gpt-4",
-                temperature=0.7,
-            ),
-            tts=openai.TTS(
-                model="tts-1",
-                voice="alloy",
-            ),
-            vad=silero.VAD.load(),
+            stt=stt,
+            llm=llm,
+            tts=tts,
+            vad=vad,
+            conn_options=conn_options,
+            userdata=state,
         )
         logger.info("✅ Agent session created")
         
         # Create the voice assistant
         logger.info("Creating voice assistant...")
-        assistant = ITHelpDeskBot()
+        assistant = ITHelpDeskBot(state)
         logger.info("✅ Voice assistant created")
         
+        # Stage-specific VAD silence and end-of-turn delays
+        assistant.endpointing = EndpointingController(session, vad)
+        assistant.endpointing.apply("greeting")
+        session.on("metrics_collected", assistant.endpointing.on_metrics)
+        
+        # Speculative replies: start on final transcripts, drop if the user keeps talking
+        session.on("user_input_transcribed",
+                   lambda ev: assistant.on_user_transcribed(ev.transcript, ev.is_final))
+        session.on("user_state_changed",
+                   lambda ev: assistant.on_user_speaking() if ev.new_state == "speaking" else None)
+        
+        # Buffered call transcript, written in batches and at call end
+        if TRANSCRIPT_CONFIG["enabled"]:
+            transcript = CallTranscript(ctx.room.name)
+            session.on("conversation_item_added",
+                       lambda ev: transcript.add(ev.item.role, message_text(ev.item))
+                       if getattr(ev.item, "type", None) == "message" else None)
+            
+            def on_tools_executed(ev):
+                for call, output in zip(ev.function_calls, ev.function_call_outputs):
+                    transcript.add_tool(call.name, call.arguments, output.output if output else None)
+            
+            session.on("function_tools_executed", on_tools_executed)
+            
+            async def save_transcript():
+                ticket = state.current_ticket
+                await transcript.close(ticket.id if ticket is not None else None)
+            
+            ctx.add_shutdown_callback(save_transcript)
+        
         # Start the session with room and agent
         logger.info("Starting agent session...")
         await session.start(
@@ -69,6 +142,15 @@ async def entrypoint(ctx: JobContext):
         )
         logger.info("✅ Agent session started successfully")
         
+        # Optional QA recording of both sides, streamed to disk in chunks
+        if RECORDING_CONFIG["enabled"]:
+            recorder = CallRecorder(ctx.room.name)
+            attach_recorder(ctx.room, session, recorder)
+            ctx.add_shutdown_callback(recorder.close)
+        
+        # Background track for latency-masking filler phrases
+        await filler_player.attach(ctx.room, session)
+        
         # Generate initial greeting
         logger.info("Generating initial greeting...")
         await session.generate_reply(
@@ -84,4 +166,4 @@ async def entrypoint(ctx: JobContext):
 
 if __name__ == "__main__":
     # Run the LiveKit worker with our entrypoint function
-    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint))
\ No newline at end of file
+    cli.run_app(WorkerOptions(entrypoint_fnc=entrypoint, prewarm_fnc=prewarm))
\ No newline at end of file
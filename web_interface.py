@@ -1,18 +1,29 @@
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 import json
 import asyncio
 import logging
-from typing import Dict, List
+from typing import Dict, List, Optional
 import uvicorn
 import os
-from datetime import datetime, timedelta
-from database import db, Ticket
-from config import LIVEKIT_CONFIG
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from database import get_db, Ticket
+from config import LIVEKIT_CONFIG, TOKEN_CONFIG, RATE_LIMIT_CONFIG
+from rate_limiter import RateLimiter
 import jwt
 from dotenv import load_dotenv
 
+# Fast JSON encoding for large ticket listings (optional dependency)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Load environment variables
 load_dotenv()
 
@@ -708,46 +719,111 @@ async def get_homepage():
     </html>
     """
 
+@lru_cache(maxsize=1)
+def get_signing_config() -> Dict[str, str]:
+    """Read the LiveKit signing configuration from the environment once"""
+    return {
+        "url": os.getenv("LIVEKIT_URL", "ws://localhost:7880"),
+        "api_key": os.getenv("LIVEKIT_API_KEY", "devkey"),
+        "api_secret": os.getenv("LIVEKIT_API_SECRET", "secret"),
+    }
+
+# The caller's LiveKit identity is set by the server, never by the client
+USER_IDENTITY = "user-demo"
+
+# Signed-token reuse per (room, identity): (token, expires_at). Like the
+# rate limiters below, this lives in each web worker process.
+MAX_CACHED_TOKENS = 10000
+token_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+ip_rate_limiter = RateLimiter(
+    RATE_LIMIT_CONFIG["per_ip"]["rate"],
+    RATE_LIMIT_CONFIG["per_ip"]["burst"],
+    RATE_LIMIT_CONFIG["max_keys"],
+)
+room_rate_limiter = RateLimiter(
+    RATE_LIMIT_CONFIG["per_room"]["rate"],
+    RATE_LIMIT_CONFIG["per_room"]["burst"],
+    RATE_LIMIT_CONFIG["max_keys"],
+)
+
+def get_cached_token(room_name: str, identity: str):
+    """Return a cached token that is not close to expiry, or None"""
+    entry = token_cache.get((room_name, identity))
+    if entry is None:
+        return None
+    token, expires_at = entry
+    if expires_at - time.time() <= TOKEN_CONFIG["reuse_margin_seconds"]:
+        del token_cache[(room_name, identity)]
+        return None
+    return token
+
+def mint_access_token(room_name: str, identity: str, config: Dict[str, str]) -> str:
+    """Sign a LiveKit access token and remember it for reuse"""
+    issued_at = datetime.utcnow()
+    ttl = TOKEN_CONFIG["ttl_seconds"]
+    
+    payload = {
+        "iss": config["api_key"],
+        "sub": identity,
+        "iat": issued_at,
+        "exp": issued_at + timedelta(seconds=ttl),
+        "name": identity,
+        "video": {
+            "room": room_name,
+            "roomJoin": True,
+            "canPublish": True,
+            "canSubscribe": True,
+            "canPublishData": True
+        }
+    }
+    
+    access_token = jwt.encode(payload, config["api_secret"], algorithm="HS256")
+    
+    token_cache[(room_name, identity)] = (access_token, time.time() + ttl)
+    token_cache.move_to_end((room_name, identity))
+    while len(token_cache) > MAX_CACHED_TOKENS:
+        token_cache.popitem(last=False)
+    
+    return access_token
+
+def rate_limited_response(retry_after: float) -> HTTPException:
+    """Build a 429 error with a Retry-After header"""
+    return HTTPException(
+        status_code=429,
+        detail="Too many token requests, please retry later",
+        headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+    )
+
 @app.post("/get-token")
 async def get_access_token(request: Request):
     """Generate LiveKit access token for voice bot connection"""
+    client_ip = request.client.host if request.client else "unknown"
+    allowed, retry_after = ip_rate_limiter.check(client_ip)
+    if not allowed:
+        logger.warning(f"Rate limited token request from {client_ip}")
+        raise rate_limited_response(retry_after)
+    
     try:
         data = await request.json()
         room_name = data.get("room", "voice-bot-demo")
         
-        # Reload config to ensure we have latest env vars
-        from config import LIVEKIT_CONFIG as fresh_config
-        current_config = {
-            "url": os.getenv("LIVEKIT_URL", "ws://localhost:7880"),
-            "api_key": os.getenv("LIVEKIT_API_KEY", "devkey"),
-            "api_secret": os.getenv("LIVEKIT_API_SECRET", "secret"),
-        }
-        
-        logger.info(f"Generating token for room: {room_name}")
-        logger.info(f"Fresh config from env: {current_config}")
-        logger.info(f"Cached LIVEKIT_CONFIG: {LIVEKIT_CONFIG}")
+        allowed, retry_after = room_rate_limiter.check(room_name)
+        if not allowed:
+            logger.warning(f"Rate limited token request for room {room_name}")
+            raise rate_limited_response(retry_after)
         
-        # Use current config instead of cached
-        config_to_use = current_config
-        
-        # Create JWT token for LiveKit
-        payload = {
-            "iss": config_to_use["api_key"],
-            "sub": "user-demo",
-            "iat": datetime.utcnow(),
-            "exp": datetime.utcnow() + timedelta(hours=1),
-            "name": "user-demo",
-            "video": {
-                "room": room_name,
-                "roomJoin": True,
-                "canPublish": True,
-                "canSubscribe": True,
-                "canPublishData": True
-            }
-        }
+        config_to_use = get_signing_config()
         
-        access_token = jwt.encode(payload, config_to_use["api_secret"], algorithm="HS256")
-        logger.info("JWT token generated successfully")
+        # Reuse a recent signed token; the bot is still dispatched below,
+        # since a caller reconnecting needs a bot in the room again
+        access_token = get_cached_token(room_name, USER_IDENTITY)
+        if access_token:
+            logger.info(f"Reusing cached token for room: {room_name}")
+        else:
+            logger.info(f"Generating token for room: {room_name}")
+            access_token = mint_access_token(room_name, USER_IDENTITY, config_to_use)
+            logger.info("JWT token generated successfully")
         
         # Create room and start voice bot for this specific room
         try:
@@ -765,6 +841,8 @@ async def get_access_token(request: Request):
             "room": room_name
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in get_access_token: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to generate access token: {str(e)}")
@@ -793,28 +871,178 @@ async def websocket_endpoint(websocket: WebSocket):
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
+def _encode_json(payload) -> bytes:
+    """Serialize a JSON payload, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+def _ticket_cache_headers(resource: str) -> Dict[str, str]:
+    """Build ETag/Last-Modified headers for `resource` from the tickets table change counter
+
+    The ETag changes on every write. Last-Modified only has second
+    granularity, so two writes in the same second share it; it is kept
+    for clients that don't send If-None-Match.
+    """
+    version, updated_at = get_db().get_change_stamp()
+    headers = {
+        "ETag": f'W/"{resource}-{version}"',
+        "Cache-Control": "no-cache",
+    }
+    if updated_at:
+        # Triggers store UTC without an offset
+        modified = datetime.fromisoformat(updated_at)
+        if modified.tzinfo is None:
+            modified = modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(modified.replace(microsecond=0), usegmt=True)
+    return headers
+
+def _is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """Check the request's conditional headers against the current ones
+
+    If-None-Match takes precedence: when present, If-Modified-Since is
+    ignored (RFC 9110 section 13.2.2).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in etags or headers["ETag"] in etags
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            return parsedate_to_datetime(headers["Last-Modified"]) <= since
+        except (TypeError, ValueError):
+            return False
+    return False
+
 @app.get("/tickets")
-async def get_tickets():
-    """Get all support tickets"""
+async def get_tickets(request: Request, include_archived: bool = False):
+    """Get all support tickets (?include_archived=true adds archived ones)"""
     try:
-        tickets = db.get_all_tickets()
-        return tickets
+        headers = _ticket_cache_headers("tickets-all" if include_archived else "tickets")
+        if _is_not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
+        
+        tickets = get_db().get_all_tickets(include_archived=include_archived)
+        content = _encode_json([ticket.model_dump() for ticket in tickets])
+        return Response(content=content, media_type="application/json", headers=headers)
     except Exception as e:
         logger.error(f"Error fetching tickets: {e}")
         return []
 
 @app.get("/tickets/{ticket_id}")
-async def get_ticket(ticket_id: int):
+async def get_ticket(ticket_id: int, request: Request):
     """Get a specific ticket by ID"""
     try:
-        ticket = db.get_ticket(ticket_id)
+        headers = _ticket_cache_headers(f"ticket-{ticket_id}")
+        if _is_not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
+        
+        ticket = get_db().get_ticket(ticket_id)
         if ticket:
-            return ticket
+            return Response(content=_encode_json(ticket.model_dump()),
+                            media_type="application/json", headers=headers)
         else:
             return {"error": "Ticket not found"}
     except Exception as e:
         logger.error(f"Error fetching ticket {ticket_id}: {e}")
         return {"error": str(e)}
 
+@app.get("/tickets/{ticket_id}/history")
+async def get_ticket_history(ticket_id: int, request: Request):
+    """Get the audit history of a ticket, oldest change first"""
+    try:
+        # Audit events are written in the same transaction as the ticket change
+        headers = _ticket_cache_headers(f"history-{ticket_id}")
+        if _is_not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
+        
+        history = get_db().get_ticket_history(ticket_id)
+        if not history:
+            return {"error": "Ticket not found"}
+        return Response(content=_encode_json(history), media_type="application/json", headers=headers)
+    except Exception as e:
+        logger.error(f"Error fetching history for ticket {ticket_id}: {e}")
+        return {"error": str(e)}
+
+# Rows per bulk transaction; only one chunk of a request body is in memory
+BULK_CHUNK_ROWS = 1000
+
+async def _ndjson_chunks(request: Request):
+    """Yield lists of raw lines from a newline-delimited JSON request body"""
+    buffer = b""
+    lines: List[bytes] = []
+    async for data in request.stream():
+        buffer += data
+        *complete, buffer = buffer.split(b"\n")
+        for line in complete:
+            if line.strip():
+                lines.append(line)
+                if len(lines) >= BULK_CHUNK_ROWS:
+                    yield lines
+                    lines = []
+    if buffer.strip():
+        lines.append(buffer)
+    if lines:
+        yield lines
+
+async def _run_bulk(request: Request, operation) -> Dict:
+    """Feed an NDJSON body to a bulk database operation chunk by chunk and merge the results"""
+    result: Dict = {"failed": 0, "errors": []}
+    row = 0
+    async for lines in _ndjson_chunks(request):
+        rows, invalid = [], {}
+        for n, line in enumerate(lines):
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                rows.append(None)
+                invalid[row + n] = f"invalid JSON: {e}"
+        chunk = await asyncio.to_thread(operation, rows, chunk_size=len(rows), first_row=row)
+        for error in chunk.pop("errors"):
+            error["error"] = invalid.get(error["row"], error["error"])
+            if len(result["errors"]) < 1000:
+                result["errors"].append(error)
+        for key, value in chunk.items():
+            result[key] = result.get(key, 0 if not isinstance(value, list) else []) + value
+        row += len(rows)
+    result["rows"] = row
+    return result
+
+@app.post("/tickets/bulk")
+async def bulk_create_tickets(request: Request):
+    """Import tickets from a newline-delimited JSON body (one ticket object per line)"""
+    try:
+        return await _run_bulk(request, get_db().bulk_create_tickets)
+    except Exception as e:
+        logger.error(f"Error importing tickets: {e}")
+        return {"error": str(e)}
+
+@app.post("/tickets/bulk-update")
+async def bulk_update_tickets(request: Request):
+    """Update tickets from a newline-delimited JSON body ({"id": ..., "price": ...} per line)"""
+    try:
+        return await _run_bulk(request, get_db().bulk_update_tickets)
+    except Exception as e:
+        logger.error(f"Error updating tickets: {e}")
+        return {"error": str(e)}
+
+@app.get("/analytics")
+async def get_analytics(request: Request, start: Optional[str] = None, end: Optional[str] = None):
+    """Ticket volume and revenue per issue per day (start/end: YYYY-MM-DD, inclusive)"""
+    try:
+        # Rollups change exactly when tickets do, so the tickets change counter applies
+        headers = _ticket_cache_headers("analytics")
+        if _is_not_modified(request, headers):
+            return Response(status_code=304, headers=headers)
+        
+        analytics = get_db().get_analytics(start, end)
+        return Response(content=_encode_json(analytics), media_type="application/json", headers=headers)
+    except Exception as e:
+        logger.error(f"Error fetching analytics: {e}")
+        return {"error": str(e)}
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)